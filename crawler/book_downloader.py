@@ -1,33 +1,818 @@
 from playwright.sync_api import sync_playwright
 import time
 import os
-import re
 import json
+import queue
+import argparse
+import threading
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
+from catalog import upsert_book
+from work_queue import EnrichmentQueue, QUEUE_PATH
+from seen_index import SeenIndex, SEEN_INDEX_PATH
+from keyword_filter import KeywordFilter, has_korean
+from limit_detector import check_download_limit, format_wait
+from metadata_store import atomic_write, write_metadata, METADATA_DIR
+from resource_blocker import ResourceBlocker, launch_browser
+from session_store import (LEGACY_SESSION_STATE_PATH, SESSION_STATE_PATH, clear_storage_state,
+                           load_storage_state, save_storage_state)
+from direct_download import DIRECT_DOWNLOAD, DirectDownloader, remove_partial
+from content_index import CONTENT_INDEX_PATH, ContentIndex
+from data_dir import LEGACY_BOOKS_DIR, move_legacy_file
+from waits import (reset_wait_log, scroll_and_settle, wait_for_count_above, wait_for_load,
+                   wait_for_selector)
+
 # Load environment variables
 load_dotenv()
 
-# 제외 키워드
-EXCLUDED = ['주식', '금융', '투자', '재테크', '경제학', '증권', '자본가', '자본',
-            'sex', '섹스']
+BASE_URL = "https://ko.z-library.ec"
+
+# Parallel download workers (1 = sequential download on the listing page)
+DEFAULT_WORKERS = int(os.getenv('DOWNLOAD_WORKERS', '1'))
+# Upper bound on simultaneous downloads for one Z-Library account
+MAX_CONCURRENT_PER_ACCOUNT = int(os.getenv('MAX_CONCURRENT_PER_ACCOUNT', '3'))
+# Books whose metadata and cover are resolved while waiting out the daily limit
+PREFETCH_MAX_BOOKS = int(os.getenv('PREFETCH_MAX_BOOKS', '20'))
+# Extra wait after the reported reset time
+LIMIT_RESET_MARGIN_SECONDS = 10
+# Attempts per book in one run before a failing book is left alone (later rounds retry it)
+MAX_DOWNLOAD_ATTEMPTS = 3
+
+# Page readiness conditions (waits end as soon as these match, see waits.py)
+BOOK_LINK_SELECTOR = 'a[href*="/book/"]'
+BOOK_PAGE_READY_SELECTOR = ('a:has-text("EPUB"), .book-description, .bookDescriptionBox, '
+                            '[itemprop="description"], [itemprop="author"]')
+LOGIN_LINK_SELECTOR = 'a:has-text("Log In"), a:has-text("로그인")'
+LOAD_MORE_SELECTORS = [
+    'button:has-text("Load more")',
+    'a:has-text("Load more")',
+    'button:has-text("업로드 계속")',
+    'a:has-text("업로드 계속")',
+    '.load-more'
+]
+
+# 제외 키워드 (EXCLUDE_KEYWORDS_FILE, 없으면 keyword_filter.DEFAULT_KEYWORDS)
+# 파일을 고치면 실행 중에도 다시 읽음
+title_filter = KeywordFilter()
 
 def should_exclude(title):
     """제외 대상 확인"""
-    title_lower = title.lower()
-    for keyword in EXCLUDED:
-        if keyword.lower() in title_lower:
+    return title_filter.should_exclude(title)
+
+# Collects every listing link in one round trip.
+# Playwright locators pierce open shadow roots, so the page-side query does the same.
+EXTRACT_BOOK_LINKS_JS = """
+() => {
+    const deepQuery = (root, selector) => {
+        const found = root.querySelector(selector);
+        if (found) return found;
+        for (const el of root.querySelectorAll('*')) {
+            if (el.shadowRoot) {
+                const inner = deepQuery(el.shadowRoot, selector);
+                if (inner) return inner;
+            }
+        }
+        return null;
+    };
+    return Array.from(document.querySelectorAll('a[href*="/book/"]')).map((link) => {
+        const cover = deepQuery(link, 'z-cover');
+        return {
+            href: link.getAttribute('href'),
+            title: cover ? cover.getAttribute('title') : null,
+            hasCover: !!cover,
+            hasDownloadBadge: !!(cover && deepQuery(cover, '[class*="download"]')),
+        };
+    });
+}
+"""
+
+def safe_filename_stem(title):
+    """File name base shared by the EPUB, cover and metadata JSON"""
+    safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
+    return safe_title[:100]
+
+def extract_book_links(page):
+    """Return [{href, title, hasCover, hasDownloadBadge}] for all book links on the listing"""
+    return page.evaluate(EXTRACT_BOOK_LINKS_JS)
+
+def select_books(book_links, seen_hrefs, downloaded_titles, seen_index=None):
+    """Filter extracted links down to new Korean books worth downloading.
+
+    seen_index (persistent across restarts) skips books handled by earlier runs
+    without opening their pages. Selected hrefs are marked seen too; a download
+    that fails transiently is released again with DownloadState.retry_later.
+
+    Returns (books_to_download, checked_count, skipped_no_cover).
+    """
+    books = []
+    checked_count = 0
+    skipped_no_cover = 0
+
+    for link in book_links:
+        href = link.get('href')
+        title = link.get('title')
+
+        # Listing stays loaded across rounds - skip links handled in earlier rounds
+        if not href or href in seen_hrefs:
+            continue
+
+        # Check if cover is loaded
+        if not link.get('hasCover') or not title:
+            skipped_no_cover += 1
+            continue
+
+        seen_hrefs.add(href)
+
+        # Skip if already downloaded in this session
+        if title in downloaded_titles:
+            continue
+
+        # Check if Korean first
+        if not has_korean(title):
+            continue
+
+        checked_count += 1
+
+        # Known from an earlier run (or already in books/)
+        if seen_index is not None and seen_index.is_known(title, href, safe_filename_stem(title)):
+            print(f"  ⏭️  Skipping (in seen index): {title[:50]}")
+            continue
+
+        # Check if already downloaded
+        # Downloaded books have an element with class containing "download"
+        if link.get('hasDownloadBadge'):
+            print(f"  ⏭️  Skipping (already downloaded): {title[:50]}")
+            if seen_index is not None:
+                seen_index.remember(title, href)
+            continue
+
+        # Check if should exclude
+        if should_exclude(title):
+            print(f"  ⏭️  Skipping (excluded category): {title[:50]}")
+            continue
+
+        print(f"  ✅ Will download: {title[:50]}")
+        books.append({'title': title, 'href': href})
+
+    return books, checked_count, skipped_no_cover
+
+def read_download_limit(page):
+    """Return the remaining wait in seconds if the page shows the daily limit (0 if unparsable), else None"""
+    wait_seconds = check_download_limit(page)
+    if wait_seconds:
+        print(f"  ⏰ Need to wait {format_wait(wait_seconds)}")
+    return wait_seconds
+
+def wait_for_limit_reset(total_wait_seconds, downloaded_titles, prefetch=None):
+    """Publish download status for web UI and enricher, then wait until the limit resets.
+
+    prefetch(deadline) runs first and may use the window up to the monotonic
+    deadline; only the time it leaves over is slept.
+    """
+    deadline = time.monotonic() + total_wait_seconds + LIMIT_RESET_MARGIN_SECONDS
+
+    # Save download status for web UI and enricher
+    wait_until = datetime.now() + timedelta(seconds=total_wait_seconds)
+    status_data = {
+        "waitUntil": wait_until.isoformat(),
+        "lastUpdate": datetime.now().isoformat(),
+        "downloadedFiles": list(downloaded_titles)  # List of downloaded book titles
+    }
+    status_path = "./books/download_status.json"
+    status_tmp_path = "./books/download_status.tmp"
+    try:
+        # Atomic write: write to temp file, then rename
+        with open(status_tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(status_data, f, ensure_ascii=False, indent=2)
+        # Atomic rename - OS guarantees atomicity
+        os.replace(status_tmp_path, status_path)
+        print(f"  📝 Saved download status: wait until {wait_until.strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"  📋 Tracked {len(downloaded_titles)} downloaded files for enrichment")
+    except Exception as status_err:
+        print(f"  ⚠️ Could not save status: {status_err}")
+        # Clean up temp file if it exists
+        if os.path.exists(status_tmp_path):
+            os.remove(status_tmp_path)
+
+    if prefetch:
+        try:
+            prefetch(deadline)
+        except Exception as e:
+            print(f"  ⚠️ Prefetch stopped: {str(e)[:50]}")
+
+    remaining = deadline - time.monotonic()
+    if remaining > 0:
+        print(f"  💤 Waiting {remaining:.0f}s...")
+        time.sleep(remaining)
+    print(f"  ✅ Wait completed! Retrying...")
+
+    # Clear download status after wait
+    try:
+        if os.path.exists(status_path):
+            os.remove(status_path)
+            print(f"  🗑️ Cleared download status")
+    except Exception as clear_err:
+        print(f"  ⚠️ Could not clear status: {clear_err}")
+
+def load_more_books(page):
+    """Click the listing's Load More button. Returns False when no more books can be loaded."""
+    print(f"\n📥 Clicking Load More to get next batch...")
+    try:
+        # Scroll to bottom and give the button a moment to render
+        page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        wait_for_selector(page, ', '.join(LOAD_MORE_SELECTORS), 'listing: load more button', timeout=2)
+
+        # Try to find and click load more
+        for selector in LOAD_MORE_SELECTORS:
+            try:
+                load_more = page.locator(selector).first
+                if load_more.is_visible():
+                    link_count = page.locator(BOOK_LINK_SELECTOR).count()
+                    load_more.click()
+                    print(f"  ✅ Clicked Load More")
+                    wait_for_count_above(page, BOOK_LINK_SELECTOR, link_count, 'listing: load more', timeout=15)
+                    return True
+            except:
+                continue
+
+        print(f"  ℹ️  No more Load More button - all books loaded")
+        return False
+
+    except Exception as e:
+        print(f"  ⚠️  Could not load more: {str(e)[:50]}")
+        return False
+
+def find_epub_button(page):
+    """Return the visible EPUB (not PDF) download button, or None"""
+    for btn in page.locator('a:has-text("EPUB")').all():
+        btn_text = btn.inner_text()
+        if 'PDF' not in btn_text.upper():
+            return btn if btn.is_visible() else None
+    return None
+
+def extract_book_metadata(page, title, book_url):
+    """Read cover URL, description, author and year from an open book page.
+
+    Returns (metadata, cover_src_url, cover_ext).
+    """
+    metadata = {'title': title, 'url': book_url}
+    cover_src_url = None
+    cover_ext = 'jpg'
+
+    # Get cover image URL
+    try:
+        cover_img = page.locator('img.cover').first
+        if cover_img.count() > 0:
+            cover_src = cover_img.get_attribute('src')
+            if cover_src:
+                if not cover_src.startswith('http'):
+                    cover_src = f"{BASE_URL}{cover_src}"
+                cover_src_url = cover_src
+                cover_ext = cover_src.split('.')[-1].split('?')[0] or 'jpg'
+                print(f"    📷 Cover URL found")
+    except Exception as e:
+        print(f"    ⚠️ Cover URL failed: {str(e)[:40]}")
+
+    # Get description
+    try:
+        desc_elem = page.locator('.book-description, .bookDescriptionBox, [itemprop="description"]').first
+        if desc_elem.count() > 0:
+            description = desc_elem.inner_text().strip()
+            metadata['description'] = description
+            print(f"    ✅ Description: {description[:50]}...")
+    except Exception as e:
+        print(f"    ⚠️ Description failed: {str(e)[:40]}")
+
+    # Get author
+    try:
+        author_elem = page.locator('[itemprop="author"], .author').first
+        if author_elem.count() > 0:
+            author = author_elem.inner_text().strip()
+            metadata['author'] = author
+            print(f"    ✅ Author: {author}")
+    except Exception as e:
+        print(f"    ⚠️ Author failed: {str(e)[:40]}")
+
+    # Get year
+    try:
+        year_elem = page.locator('[itemprop="datePublished"], .property_year .property_value').first
+        if year_elem.count() > 0:
+            year = year_elem.inner_text().strip()
+            metadata['year'] = year
+            print(f"    ✅ Year: {year}")
+    except Exception as e:
+        print(f"    ⚠️ Year failed: {str(e)[:40]}")
+
+    return metadata, cover_src_url, cover_ext
+
+def prefetch_book(page, title, href):
+    """Resolve a book's metadata and cover without downloading the EPUB.
+
+    Returns prefetched details for download_book, or None if the book has no EPUB button.
+    """
+    book_url = f"{BASE_URL}{href}"
+    print(f"  → Prefetching: {title[:60]}")
+    page.goto(book_url, timeout=90000)
+    wait_for_selector(page, BOOK_PAGE_READY_SELECTOR, 'book page: ready', timeout=5, state='attached')
+
+    if not find_epub_button(page):
+        return None
+
+    metadata, cover_src_url, cover_ext = extract_book_metadata(page, title, book_url)
+
+    cover_body = None
+    if cover_src_url:
+        try:
+            response = page.request.get(cover_src_url)
+            if response.ok:
+                cover_body = response.body()
+        except Exception as e:
+            print(f"    ⚠️ Cover prefetch failed: {str(e)[:40]}")
+
+    return {
+        'metadata': metadata,
+        'cover_url': cover_src_url,
+        'cover_ext': cover_ext,
+        'cover_body': cover_body,
+    }
+
+def unlink_if_linked(path):
+    """Remove path if it is a hardlink shared with another file (dedupe), so it can be rewritten"""
+    try:
+        if os.stat(path).st_nlink > 1:
+            os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+def register_content(content_index, path, sha256=None):
+    """Record a saved file in the content index; returns the original it duplicates, if any"""
+    try:
+        return content_index.register(path, sha256)
+    except Exception as e:
+        print(f"    ⚠️ Content index update failed: {str(e)[:40]}")
+        return None
+
+def download_book(page, title, href, enrich_queue, seen_index=None, prefetched=None, direct=None,
+                  content_index=None):
+    """Open a book page and save EPUB, cover and metadata.
+
+    prefetched (from prefetch_book) skips metadata extraction and the cover request.
+    direct (DirectDownloader) streams the EPUB link straight into books/, falling
+    back to the browser download when that fails.
+    content_index (ContentIndex) turns an EPUB or cover identical to one already in
+    books/ into a hardlink of it and records the original as duplicate_of.
+    Returns the EPUB size in MB, or None if the book has no EPUB button.
+    Raises on navigation/download failure (caller checks for the download limit).
+    """
+    book_url = f"{BASE_URL}{href}"
+    print(f"  → Navigating: {book_url[:80]}...")
+    page.goto(book_url, timeout=90000)
+    wait_for_selector(page, BOOK_PAGE_READY_SELECTOR, 'book page: ready', timeout=5, state='attached')
+
+    # Find EPUB button (not PDF)
+    epub_btn = find_epub_button(page)
+    if not epub_btn:
+        return None
+
+    # Prepare safe filename for this book (will be used later)
+    safe_title = safe_filename_stem(title)
+
+    # Extract metadata (but don't save yet - wait for EPUB success)
+    if prefetched:
+        print(f"  → Using prefetched metadata")
+        metadata = dict(prefetched['metadata'])
+        cover_src_url = prefetched['cover_url']
+        cover_ext = prefetched['cover_ext']
+    else:
+        print(f"  → Preparing metadata extraction...")
+        metadata, cover_src_url, cover_ext = extract_book_metadata(page, title, book_url)
+
+    # Save EPUB
+    filename = f"{safe_title}.epub"
+    filepath = f"./books/{filename}"
+    sha256 = None
+
+    if direct:
+        print(f"  → Downloading EPUB directly...")
+        try:
+            _, sha256 = direct.download(epub_btn.get_attribute('href'), filepath, referer=book_url)
+        except Exception as e:
+            print(f"  ⚠️ Direct download failed ({str(e)[:60]}), using the browser")
+
+    if sha256 is None:
+        print(f"  → Clicking EPUB...")
+
+        # Download with context manager
+        with page.expect_download(timeout=90000) as download_info:
+            epub_btn.click()
+
+        download = download_info.value
+        # save_as writes in place - never through a hardlink shared with another book
+        unlink_if_linked(filepath)
+        download.save_as(filepath)
+        if direct:
+            remove_partial(filepath)
+
+    filesize = os.path.getsize(filepath) / 1024 / 1024
+
+    if content_index is not None:
+        duplicate_of = register_content(content_index, filepath, sha256)
+        if duplicate_of:
+            metadata['duplicate_of'] = duplicate_of
+            print(f"    🔗 Same file as {duplicate_of}")
+
+    # EPUB download succeeded - now save cover with matching filename
+    if cover_src_url:
+        try:
+            cover_body = prefetched['cover_body'] if prefetched else None
+            if cover_body is None:
+                response = page.request.get(cover_src_url)
+                cover_body = response.body() if response.ok else None
+
+            if cover_body is not None:
+                # Use same safe_title as EPUB
+                cover_filename = f"{safe_title}.{cover_ext}"
+                cover_path = f"./books/covers/{cover_filename}"
+
+                atomic_write(cover_path, cover_body)
+                if content_index is not None:
+                    register_content(content_index, cover_path)
+
+                metadata['cover'] = cover_filename
+                print(f"    ✅ Cover saved: {cover_filename}")
+        except Exception as e:
+            print(f"    ⚠️ Cover download failed: {str(e)[:40]}")
+
+    # Save metadata JSON with same filename base
+    metadata['filename'] = filename
+    metadata['filesize'] = filesize
+    if sha256:
+        metadata['sha256'] = sha256
+    metadata['downloadedAt'] = datetime.now().isoformat()
+
+    metadata_filename = f"{safe_title}.json"
+    write_metadata(METADATA_DIR / metadata_filename, metadata)
+
+    # Keep books/catalog.json in sync for the web listing
+    try:
+        upsert_book(filename, metadata)
+    except Exception as e:
+        print(f"    ⚠️ Catalog update failed: {str(e)[:40]}")
+
+    # Queue for enrichment (re-downloads are enriched again)
+    try:
+        enrich_queue.push(filename, force=True)
+    except Exception as e:
+        print(f"    ⚠️ Enrichment queue push failed: {str(e)[:40]}")
+
+    # Remember across restarts so the next run skips this book without a page visit
+    if seen_index is not None:
+        try:
+            seen_index.remember(title, href, safe_title)
+        except Exception as e:
+            print(f"    ⚠️ Seen index update failed: {str(e)[:40]}")
+
+    return filesize
+
+class DownloadState:
+    """Download progress shared by the listing loop and download workers"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.downloaded_titles = set()  # Track what we've downloaded
+        # Claims are keyed by the file name stem: different titles can sanitize to the
+        # same books/<stem>.epub, and two workers must never write the same files
+        self.downloaded_stems = set()
+        self.in_progress = set()        # Stems a worker is downloading right now
+        self.downloaded_count = 0
+
+        # Listing links already handled this run (selected or skipped for good)
+        self.seen_hrefs = set()
+        self.failed_attempts = {}  # href -> failed download attempts this run
+
+        # Set by a worker that hit the daily limit; other workers stop taking books
+        self.limit_hit = threading.Event()
+        self.limit_wait_seconds = 0
+        self.deferred = []  # Books to retry after the limit resets
+        self.prefetched = {}  # href -> details resolved during a limit wait
+
+    def claim(self, title):
+        """Reserve a book's output files so two workers never write the same EPUB/cover/JSON"""
+        stem = safe_filename_stem(title)
+        with self.lock:
+            if title in self.downloaded_titles or stem in self.downloaded_stems or stem in self.in_progress:
+                return False
+            self.in_progress.add(stem)
+            return True
+
+    def finish(self, title, downloaded):
+        stem = safe_filename_stem(title)
+        with self.lock:
+            self.in_progress.discard(stem)
+            if downloaded:
+                self.downloaded_titles.add(title)
+                self.downloaded_stems.add(stem)
+                self.downloaded_count += 1
+            return self.downloaded_count
+
+    def retry_later(self, book):
+        """Un-mark a transiently failed book so a later round selects it again.
+
+        Returns False once the book has failed MAX_DOWNLOAD_ATTEMPTS times (it stays seen).
+        """
+        with self.lock:
+            attempts = self.failed_attempts.get(book['href'], 0) + 1
+            self.failed_attempts[book['href']] = attempts
+            if attempts >= MAX_DOWNLOAD_ATTEMPTS:
+                return False
+            self.seen_hrefs.discard(book['href'])
             return True
-    return False
 
-def download_incremental():
+    def defer(self, book, prefetched=None):
+        """Hand the book back for the next round, keeping details already taken from the prefetch cache"""
+        with self.lock:
+            self.in_progress.discard(safe_filename_stem(book['title']))
+            self.deferred.append(book)
+            if prefetched is not None:
+                self.prefetched[book['href']] = prefetched
+
+    def report_limit(self, wait_seconds):
+        with self.lock:
+            self.limit_wait_seconds = max(self.limit_wait_seconds, wait_seconds)
+        self.limit_hit.set()
+
+    def take_deferred(self):
+        with self.lock:
+            deferred, self.deferred = self.deferred, []
+            return deferred
+
+    def add_prefetched(self, href, details):
+        with self.lock:
+            self.prefetched[href] = details
+
+    def take_prefetched(self, href):
+        with self.lock:
+            return self.prefetched.pop(href, None)
+
+    def is_prefetched(self, href):
+        with self.lock:
+            return href in self.prefetched
+
+class LimitWaitPrefetcher:
+    """Turns the daily-limit wait into useful work.
+
+    While the limit is active it resolves metadata and covers for the books
+    still pending, keeps loading the listing to line up upcoming candidates,
+    and resolves those too. Downloads resume at the reset time with a warm
+    queue: upcoming books are served first next round and skip metadata
+    extraction and the cover request.
+    """
+
+    # Stop prefetching this long before the reset so downloads start on time
+    STOP_BEFORE_RESET_SECONDS = 30
+
+    def __init__(self, listing_page, context, state, seen_hrefs, seen_index,
+                 book_page=None, max_books=PREFETCH_MAX_BOOKS):
+        self.listing_page = listing_page
+        self.context = context
+        self.state = state
+        self.seen_hrefs = seen_hrefs
+        self.seen_index = seen_index
+        self.max_books = max_books
+        self.book_page = book_page  # Opened on first use when not shared with the sequential loop
+        self.upcoming = []     # Books selected during the wait, downloaded first next round
+        self.no_epub = set()   # Hrefs found to have no EPUB while prefetching
+        self.listing_exhausted = False
+
+    def _page(self):
+        if self.book_page is None:
+            self.book_page = self.context.new_page()
+            self.listing_page.bring_to_front()
+        return self.book_page
+
+    def _collect_more(self):
+        """Load the next listing batch into upcoming. Returns False when the listing is exhausted."""
+        if self.listing_exhausted or not load_more_books(self.listing_page):
+            self.listing_exhausted = True
+            return False
+        books, _, _ = select_books(extract_book_links(self.listing_page), self.seen_hrefs,
+                                   self.state.downloaded_titles, self.seen_index)
+        self.upcoming.extend(books)
+        return True
+
+    def run_until(self, deadline, pending_books=()):
+        """Prefetch pending books, then upcoming ones, until the monotonic deadline"""
+        print(f"  🔭 Using the wait to prefetch up to {self.max_books} books...")
+        attempted = set()
+        resolved = 0
+
+        while time.monotonic() < deadline - self.STOP_BEFORE_RESET_SECONDS and resolved < self.max_books:
+            book = next((b for b in list(pending_books) + self.upcoming
+                         if b['href'] not in attempted and not self.state.is_prefetched(b['href'])), None)
+            if book is None:
+                if not self._collect_more():
+                    break
+                continue
+
+            attempted.add(book['href'])
+            try:
+                details = prefetch_book(self._page(), book['title'], book['href'])
+            except Exception as e:
+                print(f"    ⚠️ Prefetch failed: {book['title'][:50]} - {str(e)[:50]}")
+                continue
+
+            if details is None:
+                print(f"    ❌ No EPUB button: {book['title'][:50]}")
+                self.no_epub.add(book['href'])
+            else:
+                self.state.add_prefetched(book['href'], details)
+                resolved += 1
+
+        print(f"  🔭 Prefetched {resolved} books, {len(self.upcoming)} upcoming in queue")
+
+    def has_upcoming(self):
+        return bool(self.upcoming)
+
+    def take_upcoming(self):
+        upcoming, self.upcoming = self.upcoming, []
+        return [book for book in upcoming if book['href'] not in self.no_epub]
+
+class DownloadWorkerPool:
+    """N browser contexts that consume book hrefs collected by the listing page.
+
+    Playwright's sync API is bound to the thread that created it, so every
+    worker runs its own browser and reuses the login via storage_state.
+    """
+
+    def __init__(self, workers, storage_state, state, enrich_queue, seen_index=None, resource_blocker=None,
+                 content_index=None):
+        self.state = state
+        self.enrich_queue = enrich_queue
+        self.seen_index = seen_index
+        self.content_index = content_index
+        self.storage_state = storage_state
+        self.resource_blocker = resource_blocker
+        self.tasks = queue.Queue()
+        self.account_slots = threading.Semaphore(min(workers, MAX_CONCURRENT_PER_ACCOUNT))
+        self.threads = [
+            threading.Thread(target=self._worker_loop, args=(i + 1,), daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def _worker_loop(self, worker_id):
+        with sync_playwright() as p:
+            browser = launch_browser(p)
+            context = browser.new_context(accept_downloads=True, storage_state=self.storage_state)
+            if self.resource_blocker:
+                self.resource_blocker.attach(context)
+            page = context.new_page()
+            direct = make_direct_downloader(context, page)
+
+            try:
+                while True:
+                    book = self.tasks.get()
+                    if book is None:
+                        self.tasks.task_done()
+                        break
+
+                    try:
+                        self._download(worker_id, page, book, direct)
+                    except Exception as e:
+                        # Keep the worker alive whatever happens to one book
+                        print(f"  ❌ [W{worker_id}] Error: {book['title'][:50]} - {str(e)[:50]}")
+                        self.state.finish(book['title'], False)
+                        self.state.retry_later(book)
+                    finally:
+                        self.tasks.task_done()
+            finally:
+                if direct:
+                    direct.close()
+                browser.close()
+
+    def _download(self, worker_id, page, book, direct=None):
+        title = book['title']
+
+        # Stop taking new books once any worker hit the limit
+        if self.state.limit_hit.is_set():
+            self.state.defer(book)
+            return
+
+        if not self.state.claim(title):
+            return
+
+        with self.account_slots:
+            print(f"  [W{worker_id}] ⬇️  {title[:60]}")
+            prefetched = self.state.take_prefetched(book['href'])
+            try:
+                filesize = download_book(page, title, book['href'], self.enrich_queue, self.seen_index,
+                                         prefetched, direct, self.content_index)
+            except Exception as e:
+                wait_seconds = read_download_limit(page)
+                if wait_seconds is not None:
+                    print(f"\n⏳ [W{worker_id}] Download limit detected!")
+                    self.state.report_limit(wait_seconds)
+                    # The next round reuses the details instead of opening the book page again
+                    self.state.defer(book, prefetched)
+                    return
+
+                print(f"  ❌ [W{worker_id}] Failed: {title[:50]} - {str(e)[:50]}")
+                self.state.finish(title, False)
+                if self.state.retry_later(book):
+                    print(f"  ↻ [W{worker_id}] Will retry in a later round: {title[:50]}")
+                return
+
+        if filesize is None:
+            print(f"  ❌ [W{worker_id}] No EPUB button: {title[:50]}")
+            self.state.finish(title, False)
+        else:
+            total = self.state.finish(title, True)
+            print(f"  ✅ [W{worker_id}] {title[:50]} - {filesize:.1f} MB (Total: {total})")
+
+    def download_all(self, books, prefetcher=None):
+        """Download a round of books, waiting out the daily limit as needed.
+
+        prefetcher (LimitWaitPrefetcher) works through the wait window on the caller's thread.
+        """
+        pending = books
+        while pending:
+            for book in pending:
+                self.tasks.put(book)
+            self.tasks.join()
+
+            pending = self.state.take_deferred()
+            if self.state.limit_hit.is_set():
+                total_wait_seconds = self.state.limit_wait_seconds
+                if total_wait_seconds > 0:
+                    prefetch = (lambda deadline: prefetcher.run_until(deadline, pending)) if prefetcher else None
+                    wait_for_limit_reset(total_wait_seconds, self.state.downloaded_titles, prefetch)
+                else:
+                    print(f"  ⚠️ Could not parse wait time, skipping {len(pending)} books...")
+                    for book in pending:
+                        self.state.retry_later(book)
+                    pending = []
+                self.state.limit_wait_seconds = 0
+                self.state.limit_hit.clear()
+
+    def close(self):
+        for _ in self.threads:
+            self.tasks.put(None)
+        for thread in self.threads:
+            thread.join()
+
+def make_direct_downloader(context, page):
+    """DirectDownloader for this context when DIRECT_DOWNLOAD=1, else None"""
+    if not DIRECT_DOWNLOAD:
+        return None
+    # Same User-Agent as the browser so the session cookies are accepted
+    return DirectDownloader(context, BASE_URL, user_agent=page.evaluate("navigator.userAgent"))
+
+def session_is_active(page):
+    """True if the open home page shows a logged-in user (no Log In link)"""
+    wait_for_selector(page, f"{LOGIN_LINK_SELECTOR}, {BOOK_LINK_SELECTOR}", 'login: session check',
+                      state='attached')
+    try:
+        return not page.locator(LOGIN_LINK_SELECTOR).first.is_visible()
+    except Exception:
+        return False
+
+def log_in(page):
+    """Log in through the form, starting from the open home page"""
+    zlibrary_email = os.getenv('ZLIBRARY_EMAIL')
+    zlibrary_password = os.getenv('ZLIBRARY_PASSWORD')
+
+    if not zlibrary_email or not zlibrary_password:
+        raise ValueError("ZLIBRARY_EMAIL and ZLIBRARY_PASSWORD must be set in .env file")
+
+    wait_for_selector(page, LOGIN_LINK_SELECTOR, 'login: home page')
+    page.click(LOGIN_LINK_SELECTOR)
+    wait_for_selector(page, 'input[name="password"]', 'login: form')
+
+    page.locator('input[name="email"]').first.fill(zlibrary_email)
+    page.locator('input[name="password"]').first.fill(zlibrary_password)
+    page.locator('button:has-text("Log In"), button:has-text("로그인")').first.click()
+    wait_for_selector(page, 'input[name="password"]', 'login: submit', timeout=15, state='hidden')
+
+def persist_session(context):
+    """Save the context's cookies so the next start can skip the login"""
+    try:
+        save_storage_state(context.storage_state())
+    except Exception as e:
+        print(f"  ⚠️ Could not save session: {str(e)[:50]}")
+
+def download_incremental(workers=DEFAULT_WORKERS):
     print("="*70)
     print("Z-Library Incremental Downloader")
     print("="*70)
 
-    downloaded_count = 0
-    downloaded_titles = set()  # Track what we've downloaded
+    state = DownloadState()
+    wait_log = reset_wait_log()
+    downloaded_titles = state.downloaded_titles
+    pool = None
+    book_page = None
+    direct = None
 
     if not os.path.exists('./books'):
         os.makedirs('./books')
@@ -38,43 +823,74 @@ def download_incremental():
     if not os.path.exists('./books/metadata'):
         os.makedirs('./books/metadata')
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(accept_downloads=True)
-        page = context.new_page()
+    # State files used to live in books/, which the web container serves as-is
+    move_legacy_file(LEGACY_BOOKS_DIR / QUEUE_PATH.name, QUEUE_PATH, sqlite=True)
+    move_legacy_file(LEGACY_BOOKS_DIR / SEEN_INDEX_PATH.name, SEEN_INDEX_PATH)
+    move_legacy_file(LEGACY_BOOKS_DIR / CONTENT_INDEX_PATH.name, CONTENT_INDEX_PATH, sqlite=True)
+    move_legacy_file(LEGACY_SESSION_STATE_PATH, SESSION_STATE_PATH)
 
-        try:
-            # Login
-            print("\n🔐 Logging in...")
-            page.goto("https://ko.z-library.ec/", timeout=60000)
-            time.sleep(2)
+    # Books saved here are picked up by the metadata enricher
+    enrich_queue = EnrichmentQueue(QUEUE_PATH)
 
-            page.click('a:has-text("Log In"), a:has-text("로그인")')
-            time.sleep(2)
+    # Titles/hrefs/files handled by earlier runs survive container restarts
+    seen_index = SeenIndex()
+    seeded = seen_index.seed_from_library()
+    print(f"🗂️  Seen index: {len(seen_index)} entries ({seeded} new from books/)")
 
-            zlibrary_email = os.getenv('ZLIBRARY_EMAIL')
-            zlibrary_password = os.getenv('ZLIBRARY_PASSWORD')
+    # SHA-256 of every EPUB/cover, so a repeat download becomes a hardlink of the original
+    content_index = ContentIndex()
+    scanned = content_index.scan()
+    print(f"🧬 Content index: {scanned['hashed']} hashed, {scanned['unchanged']} unchanged, "
+          f"{scanned['removed']} removed")
 
-            if not zlibrary_email or not zlibrary_password:
-                raise ValueError("ZLIBRARY_EMAIL and ZLIBRARY_PASSWORD must be set in .env file")
+    # Images, fonts and trackers are never used (covers are fetched via page.request)
+    resource_blocker = ResourceBlocker()
 
-            page.locator('input[name="email"]').first.fill(zlibrary_email)
-            page.locator('input[name="password"]').first.fill(zlibrary_password)
-            page.locator('button:has-text("Log In"), button:has-text("로그인")').first.click()
-            time.sleep(3)
+    # Login cookies from an earlier run (data/session, expired sessions are dropped here)
+    saved_session = load_storage_state()
+    logged_in = False
 
-            print("✅ Logged in\n")
+    with sync_playwright() as p:
+        browser = launch_browser(p)
+        context = browser.new_context(accept_downloads=True, storage_state=saved_session)
+        resource_blocker.attach(context)
+        page = context.new_page()
+
+        try:
+            # Login (skipped while the saved session is still accepted)
+            page.goto(f"{BASE_URL}/", timeout=60000)
+            if saved_session and session_is_active(page):
+                print("\n✅ Reusing saved session\n")
+            else:
+                if saved_session:
+                    print("\n⌛ Saved session rejected by the site")
+                    clear_storage_state()
+                print("\n🔐 Logging in...")
+                log_in(page)
+                print("✅ Logged in\n")
+                persist_session(context)
+            logged_in = True
+
+            # Worker mode: this page only collects hrefs, workers download with the same session
+            if workers > 1:
+                print(f"👷 Starting {workers} download workers "
+                      f"(max {min(workers, MAX_CONCURRENT_PER_ACCOUNT)} concurrent per account)")
+                pool = DownloadWorkerPool(workers, context.storage_state(), state, enrich_queue, seen_index,
+                                          resource_blocker, content_index)
+            else:
+                # Sequential mode: book pages open in a second tab so the listing never reloads
+                book_page = context.new_page()
+                page.bring_to_front()
+                direct = make_direct_downloader(context, page)
 
             # Wait for page to fully load
             print("⏳ Waiting for page to load...")
-            page.wait_for_load_state('networkidle', timeout=10000)
-            time.sleep(2)
+            wait_for_load(page, 'listing: network idle', timeout=10)
 
             # Try to find recommended section (with timeout fallback)
             print("📜 Checking page structure...")
             for _ in range(5):
-                page.evaluate("window.scrollBy(0, 500)")
-                time.sleep(0.5)
+                scroll_and_settle(page, 'listing: scroll step', dy=500)
 
             try:
                 # Try multiple selectors
@@ -102,17 +918,18 @@ def download_incremental():
                     print("  ⚠️  Could not find recommended section - will try to download visible books")
                     # Scroll to ensure books are loaded
                     for _ in range(3):
-                        page.evaluate("window.scrollBy(0, 800)")
-                        time.sleep(0.5)
+                        scroll_and_settle(page, 'listing: scroll step', dy=800)
             except Exception as e:
                 print(f"  ⚠️  Section finder failed: {str(e)[:50]}")
                 print("  → Continuing with visible books...")
 
-            time.sleep(2)
+            wait_for_selector(page, BOOK_LINK_SELECTOR, 'listing: book links', state='attached')
             print("✅ Ready to collect books\n")
 
             # Main loop: download batch, then load more
             round_number = 0
+            seen_hrefs = state.seen_hrefs  # Links already handled on this listing page
+            prefetcher = LimitWaitPrefetcher(page, context, state, seen_hrefs, seen_index, book_page)
             while True:
                 round_number += 1
                 print(f"\n{'='*70}")
@@ -121,61 +938,14 @@ def download_incremental():
 
                 # Get current visible books (only those with loaded covers)
                 print("📚 Collecting books with loaded covers...")
-                book_links = page.locator('a[href*="/book/"]').all()
+                book_links = extract_book_links(page)
                 print(f"Found {len(book_links)} total book links")
 
-                # Collect books to download this round
-                books_this_round = []
-                checked_count = 0
-                skipped_no_cover = 0
-
-                for link in book_links:
-                    try:
-                        # Check if cover is loaded (quick check)
-                        cover_count = link.locator('z-cover').count()
-                        if cover_count == 0:
-                            skipped_no_cover += 1
-                            continue
-
-                        cover = link.locator('z-cover').first
-
-                        # Use shorter timeout
-                        title = cover.get_attribute('title', timeout=3000)
-                        href = link.get_attribute('href', timeout=3000)
-
-                        # Skip if already downloaded in this session
-                        if title in downloaded_titles:
-                            continue
-
-                        # Check if Korean first
-                        has_korean = any('\uac00' <= c <= '\ud7a3' for c in title)
-                        if not has_korean:
-                            continue
-
-                        checked_count += 1
-
-                        # Check if already downloaded
-                        # Downloaded books have an element with class containing "download"
-                        try:
-                            download_badge_count = cover.locator('[class*="download"]').count()
-                            if download_badge_count > 0:
-                                print(f"  ⏭️  Skipping (already downloaded): {title[:50]}")
-                                continue
-                        except Exception as e:
-                            print(f"  ⚠️  Error checking badge for {title[:30]}: {e}")
-                            pass
-
-                        # Check if should exclude
-                        if should_exclude(title):
-                            print(f"  ⏭️  Skipping (excluded category): {title[:50]}")
-                            continue
-
-                        print(f"  ✅ Will download: {title[:50]}")
-                        books_this_round.append({'title': title, 'href': href})
-
-                    except Exception as e:
-                        print(f"  ❌ Error processing book: {e}")
-                        continue
+                # Collect books to download this round (after those lined up during a limit wait)
+                upcoming = prefetcher.take_upcoming()
+                books_this_round, checked_count, skipped_no_cover = select_books(
+                    book_links, seen_hrefs, downloaded_titles, seen_index)
+                books_this_round = upcoming + books_this_round
 
                 print(f"\nChecked {checked_count} Korean books")
                 print(f"Skipped {skipped_no_cover} books without loaded covers")
@@ -184,6 +954,10 @@ def download_incremental():
 
                 if len(books_this_round) == 0:
                     print("No new books to download this round")
+                elif pool:
+                    # Workers download in parallel while this page stays on the listing
+                    print(f"Starting parallel download for {len(books_this_round)} books...\n")
+                    pool.download_all(books_this_round, prefetcher)
                 else:
                     # Download books one by one
                     print(f"Starting sequential download for {len(books_this_round)} books...\n")
@@ -198,279 +972,56 @@ def download_incremental():
                         print(f"[{idx + 1}/{len(books_this_round)}] {title[:60]}")
                         print(f"{'='*70}")
 
+                        prefetched = state.take_prefetched(href)
                         try:
-                            book_url = f"https://ko.z-library.ec{href}"
-                            print(f"  → Navigating: {book_url[:80]}...")
-                            page.goto(book_url, timeout=90000)
-                            time.sleep(1)
-
-                            # Find EPUB button (not PDF)
-                            epub_btns = page.locator('a:has-text("EPUB")').all()
-                            epub_btn = None
-
-                            # Find the actual EPUB button (not PDF)
-                            for btn in epub_btns:
-                                btn_text = btn.inner_text()
-                                if 'PDF' not in btn_text.upper():
-                                    epub_btn = btn
-                                    break
-
-                            if epub_btn and epub_btn.is_visible():
-                                print(f"  → Preparing metadata extraction...")
-
-                                # Prepare safe filename for this book (will be used later)
-                                safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
-
-                                # Extract metadata (but don't save yet - wait for EPUB success)
-                                metadata = {'title': title, 'url': book_url}
-                                cover_src_url = None
-                                cover_ext = 'jpg'
-
-                                # Get cover image URL
-                                try:
-                                    cover_img = page.locator('img.cover').first
-                                    if cover_img.count() > 0:
-                                        cover_src = cover_img.get_attribute('src')
-                                        if cover_src:
-                                            if not cover_src.startswith('http'):
-                                                cover_src = f"https://ko.z-library.ec{cover_src}"
-                                            cover_src_url = cover_src
-                                            cover_ext = cover_src.split('.')[-1].split('?')[0] or 'jpg'
-                                            print(f"    📷 Cover URL found")
-                                except Exception as e:
-                                    print(f"    ⚠️ Cover URL failed: {str(e)[:40]}")
-
-                                # Get description
-                                try:
-                                    desc_elem = page.locator('.book-description, .bookDescriptionBox, [itemprop="description"]').first
-                                    if desc_elem.count() > 0:
-                                        description = desc_elem.inner_text().strip()
-                                        metadata['description'] = description
-                                        print(f"    ✅ Description: {description[:50]}...")
-                                except Exception as e:
-                                    print(f"    ⚠️ Description failed: {str(e)[:40]}")
-
-                                # Get author
-                                try:
-                                    author_elem = page.locator('[itemprop="author"], .author').first
-                                    if author_elem.count() > 0:
-                                        author = author_elem.inner_text().strip()
-                                        metadata['author'] = author
-                                        print(f"    ✅ Author: {author}")
-                                except Exception as e:
-                                    print(f"    ⚠️ Author failed: {str(e)[:40]}")
-
-                                # Get year
-                                try:
-                                    year_elem = page.locator('[itemprop="datePublished"], .property_year .property_value').first
-                                    if year_elem.count() > 0:
-                                        year = year_elem.inner_text().strip()
-                                        metadata['year'] = year
-                                        print(f"    ✅ Year: {year}")
-                                except Exception as e:
-                                    print(f"    ⚠️ Year failed: {str(e)[:40]}")
-
-                                print(f"  → Clicking EPUB...")
-
-                                # Download with context manager
-                                with page.expect_download(timeout=90000) as download_info:
-                                    epub_btn.click()
-
-                                download = download_info.value
-
-                                # Save EPUB
-                                filename = f"{safe_title[:100]}.epub"
-                                filepath = f"./books/{filename}"
-
-                                download.save_as(filepath)
-                                filesize = os.path.getsize(filepath) / 1024 / 1024
-
-                                # EPUB download succeeded - now save cover with matching filename
-                                if cover_src_url:
-                                    try:
-                                        response = page.request.get(cover_src_url)
-                                        if response.ok:
-                                            # Use same safe_title as EPUB
-                                            cover_filename = f"{safe_title[:100]}.{cover_ext}"
-                                            cover_path = f"./books/covers/{cover_filename}"
-
-                                            with open(cover_path, 'wb') as f:
-                                                f.write(response.body())
-
-                                            metadata['cover'] = cover_filename
-                                            print(f"    ✅ Cover saved: {cover_filename}")
-                                    except Exception as e:
-                                        print(f"    ⚠️ Cover download failed: {str(e)[:40]}")
-
-                                # Save metadata JSON with same filename base
-                                metadata['filename'] = filename
-                                metadata['filesize'] = filesize
-                                metadata['downloadedAt'] = datetime.now().isoformat()
-
-                                metadata_filename = f"{safe_title[:100]}.json"
-                                metadata_path = f"./books/metadata/{metadata_filename}"
-                                with open(metadata_path, 'w', encoding='utf-8') as f:
-                                    json.dump(metadata, f, ensure_ascii=False, indent=2)
-
-                                downloaded_count += 1
-                                downloaded_titles.add(title)
-                                print(f"  ✅ {title[:50]} - {filesize:.1f} MB (Total: {downloaded_count})")
-                                idx += 1
+                            filesize = download_book(book_page, title, href, enrich_queue, seen_index,
+                                                     prefetched, direct, content_index)
 
+                            if filesize is not None:
+                                downloaded_count = state.finish(title, True)
+                                print(f"  ✅ {title[:50]} - {filesize:.1f} MB (Total: {downloaded_count})")
                             else:
                                 print(f"  ❌ No EPUB button")
-                                idx += 1
+                            idx += 1
 
                         except Exception as e:
-                            # Check for download limit (English + Korean)
-                            if 'dailylimit' in page.url.lower() or \
-                               page.locator('text=/daily.*limit.*reached/i').count() > 0 or \
-                               page.locator('text=/1일.*제한.*최대/i').count() > 0 or \
-                               page.locator('text=/제한.*도달/i').count() > 0:
+                            total_wait_seconds = read_download_limit(book_page)
+                            if total_wait_seconds is not None:
                                 print(f"\n⏳ Download limit detected!")
-
-                                page_text = page.content()
-
-                                # English patterns
-                                tooltip_match = re.search(r'(\d+)h\s*(\d+)m', page_text, re.IGNORECASE)
-                                combined_match = re.search(r'(\d+)\s*hour[s]?\s+(\d+)\s*minute[s]?', page_text, re.IGNORECASE)
-                                hour_only_match = re.search(r'(\d+)\s*hour[s]?', page_text, re.IGNORECASE)
-                                minute_only_match = re.search(r'(\d+)\s*minute[s]?', page_text, re.IGNORECASE)
-
-                                # Korean patterns
-                                korean_combined_match = re.search(r'(\d+)\s*시간\s+(\d+)\s*분', page_text)
-                                korean_hour_match = re.search(r'(\d+)\s*시간', page_text)
-                                korean_minute_match = re.search(r'(\d+)\s*분', page_text)
-
-                                total_wait_seconds = 0
-                                if tooltip_match:
-                                    wait_hours = int(tooltip_match.group(1))
-                                    wait_minutes = int(tooltip_match.group(2))
-                                    total_wait_seconds = (wait_hours * 3600) + (wait_minutes * 60)
-                                    print(f"  ⏰ Need to wait {wait_hours}h {wait_minutes}m = {total_wait_seconds}s")
-                                elif combined_match:
-                                    wait_hours = int(combined_match.group(1))
-                                    wait_minutes = int(combined_match.group(2))
-                                    total_wait_seconds = (wait_hours * 3600) + (wait_minutes * 60)
-                                    print(f"  ⏰ Need to wait {wait_hours}h {wait_minutes}m = {total_wait_seconds}s")
-                                elif korean_combined_match:
-                                    wait_hours = int(korean_combined_match.group(1))
-                                    wait_minutes = int(korean_combined_match.group(2))
-                                    total_wait_seconds = (wait_hours * 3600) + (wait_minutes * 60)
-                                    print(f"  ⏰ 대기 시간: {wait_hours}시간 {wait_minutes}분 = {total_wait_seconds}초")
-                                elif hour_only_match:
-                                    wait_hours = int(hour_only_match.group(1))
-                                    total_wait_seconds = wait_hours * 3600
-                                    print(f"  ⏰ Need to wait {wait_hours}h = {total_wait_seconds}s")
-                                elif korean_hour_match:
-                                    wait_hours = int(korean_hour_match.group(1))
-                                    total_wait_seconds = wait_hours * 3600
-                                    print(f"  ⏰ 대기 시간: {wait_hours}시간 = {total_wait_seconds}초")
-                                elif minute_only_match:
-                                    wait_minutes = int(minute_only_match.group(1))
-                                    total_wait_seconds = wait_minutes * 60
-                                    print(f"  ⏰ Need to wait {wait_minutes}m = {total_wait_seconds}s")
-                                elif korean_minute_match:
-                                    wait_minutes = int(korean_minute_match.group(1))
-                                    total_wait_seconds = wait_minutes * 60
-                                    print(f"  ⏰ 대기 시간: {wait_minutes}분 = {total_wait_seconds}초")
+                                # Keep the details for the retry of this book after the wait
+                                if prefetched is not None:
+                                    state.add_prefetched(href, prefetched)
 
                                 if total_wait_seconds > 0:
-                                    # Save download status for web UI and enricher
-                                    wait_until = datetime.now() + timedelta(seconds=total_wait_seconds)
-                                    status_data = {
-                                        "waitUntil": wait_until.isoformat(),
-                                        "lastUpdate": datetime.now().isoformat(),
-                                        "downloadedFiles": list(downloaded_titles)  # List of downloaded book titles
-                                    }
-                                    status_path = "./books/download_status.json"
-                                    status_tmp_path = "./books/download_status.tmp"
-                                    try:
-                                        # Atomic write: write to temp file, then rename
-                                        with open(status_tmp_path, 'w', encoding='utf-8') as f:
-                                            json.dump(status_data, f, ensure_ascii=False, indent=2)
-                                        # Atomic rename - OS guarantees atomicity
-                                        os.replace(status_tmp_path, status_path)
-                                        print(f"  📝 Saved download status: wait until {wait_until.strftime('%Y-%m-%d %H:%M:%S')}")
-                                        print(f"  📋 Tracked {len(downloaded_titles)} downloaded files for enrichment")
-                                    except Exception as status_err:
-                                        print(f"  ⚠️ Could not save status: {status_err}")
-                                        # Clean up temp file if it exists
-                                        if os.path.exists(status_tmp_path):
-                                            os.remove(status_tmp_path)
-
-                                    print(f"  💤 Waiting {total_wait_seconds + 10}s...")
-                                    time.sleep(total_wait_seconds + 10)
-                                    print(f"  ✅ Wait completed! Retrying this book...")
-
-                                    # Clear download status after wait
-                                    try:
-                                        if os.path.exists(status_path):
-                                            os.remove(status_path)
-                                            print(f"  🗑️ Cleared download status")
-                                    except Exception as clear_err:
-                                        print(f"  ⚠️ Could not clear status: {clear_err}")
+                                    remaining_books = books_this_round[idx:]
+                                    wait_for_limit_reset(
+                                        total_wait_seconds, downloaded_titles,
+                                        lambda deadline: prefetcher.run_until(deadline, remaining_books))
 
                                     # Don't increment idx, retry the same book
                                     continue
                                 else:
                                     print(f"  ⚠️ Could not parse wait time, skipping...")
+                                    state.retry_later(book)
                                     idx += 1
                                     continue
 
                             print(f"  ❌ Failed: {title[:50]} - {str(e)[:50]}")
+                            if state.retry_later(book):
+                                print(f"  ↻ Will retry in a later round")
                             idx += 1
 
-                        # Return to main page
-                        page.goto("https://ko.z-library.ec/", timeout=60000)
-                        time.sleep(1)
-                        for _ in range(5):
-                            page.evaluate("window.scrollBy(0, 500)")
-                            time.sleep(0.3)
-
-                # Now click Load More to get next batch
-                print(f"\n📥 Clicking Load More to get next batch...")
-                try:
-                    # Scroll to bottom
-                    page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                    time.sleep(2)
-
-                    # Try to find and click load more
-                    load_more_selectors = [
-                        'button:has-text("Load more")',
-                        'a:has-text("Load more")',
-                        'button:has-text("업로드 계속")',
-                        'a:has-text("업로드 계속")',
-                        '.load-more'
-                    ]
-
-                    clicked = False
-                    for selector in load_more_selectors:
-                        try:
-                            load_more = page.locator(selector).first
-                            if load_more.is_visible():
-                                load_more.click()
-                                print(f"  ✅ Clicked Load More")
-                                time.sleep(3)
-                                clicked = True
-                                break
-                        except:
-                            continue
-
-                    if not clicked:
-                        print(f"  ℹ️  No more Load More button - all books loaded")
-                        break
-
-                except Exception as e:
-                    print(f"  ⚠️  Could not load more: {str(e)[:50]}")
+                # Now click Load More to get next batch (books lined up during a limit wait go first)
+                if not load_more_books(page) and not prefetcher.has_upcoming():
                     break
 
             # Summary
             print("\n" + "="*70)
             print("📊 DOWNLOAD SUMMARY")
             print("="*70)
-            print(f"✅ Downloaded: {downloaded_count} books")
+            print(f"✅ Downloaded: {state.downloaded_count} books")
             print(f"📁 Location: ./books/")
+            print(resource_blocker.report())
             print("="*70)
 
         except Exception as e:
@@ -480,9 +1031,21 @@ def download_incremental():
                 traceback.print_exc()
 
         finally:
-            print("\n⏸️  Closing in 10 seconds...")
-            time.sleep(10)
+            if pool:
+                pool.close()
+            print("\n" + wait_log.summary())
+            if logged_in:
+                # Cookies may have been refreshed during the run
+                persist_session(context)
+            if direct:
+                direct.close()
             browser.close()
+            content_index.close()
 
 if __name__ == "__main__":
-    download_incremental()
+    parser = argparse.ArgumentParser(description="Z-Library incremental downloader")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"parallel download workers (default: {DEFAULT_WORKERS})")
+    args = parser.parse_args()
+
+    download_incremental(workers=max(1, args.workers))
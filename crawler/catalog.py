@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+통합 카탈로그 인덱스
+
+books/catalog.json 하나에 모든 책의 메타데이터를 모아 둡니다.
+웹 목록 API와 스크립트는 EPUB/메타데이터 파일을 하나씩 열지 않고 이 파일만 읽으면 됩니다.
+
+- 다운로더/보완 스크립트가 책을 바꿀 때마다 해당 항목만 갱신 (upsert_book, upsert_books)
+- 임시 파일에 쓴 뒤 os.replace로 교체하므로 읽는 쪽은 항상 완전한 파일을 봄
+- 쓰기는 books/.catalog.lock 잠금 파일로 직렬화 (웹 관리자 수정 web/lib/catalog.ts와 같은 규칙)
+- 책 ID는 한 번 부여되면 바뀌지 않음 (nextId로 단조 증가)
+- 처음 만들 때는 카탈로그 이전 웹 목록과 같은 ID (readdir 순서의 .epub 번호 + 1)
+  사용자별 downloadedBooks, 다운로드 기록의 bookId가 같은 책을 가리키도록
+- catalog.json이 손상되었거나 버전이 다르면 빈 카탈로그가 아니라 전체 스캔으로 재생성
+- 쓸 때마다 etag가 바뀌어 캐시 검증에 사용 가능
+
+직접 실행하면 books/ 전체를 스캔해 카탈로그를 다시 만듭니다 (기존 ID 유지).
+--reseed-ids: 예전 웹 목록 순서로 ID를 다시 부여 (생성 시각 순서로 ID를 부여하던 카탈로그 복구용)
+"""
+
+import os
+import json
+import time
+import uuid
+import ctypes
+import struct
+import argparse
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from metadata_store import atomic_write, metadata_path_for, read_metadata
+
+# 경로 설정
+BOOKS_DIR = Path("books")
+METADATA_DIR = BOOKS_DIR / "metadata"
+CATALOG_PATH = BOOKS_DIR / "catalog.json"
+CATALOG_LOCK_PATH = BOOKS_DIR / ".catalog.lock"
+
+# 잠금 파일이 이보다 오래 갱신되지 않았으면 잡은 프로세스가 죽은 것으로 보고 제거
+# (web/lib/catalog.ts와 같은 값이어야 함)
+CATALOG_LOCK_STALE_SECONDS = 60
+CATALOG_LOCK_TIMEOUT_SECONDS = 120
+CATALOG_LOCK_POLL_SECONDS = 0.05
+
+# 카탈로그 스키마 버전 (형식이 바뀌면 올림)
+CATALOG_VERSION = 1
+
+
+# statx(2) - Python은 Linux에서 st_birthtime을 제공하지 않음 (Node의 stats.birthtime과 같은 값)
+AT_FDCWD = -100
+STATX_BTIME = 0x800
+STATX_BUFFER_SIZE = 256
+STATX_MASK_OFFSET = 0
+STATX_BTIME_OFFSET = 80
+
+try:
+    _statx = ctypes.CDLL(None, use_errno=True).statx
+except (AttributeError, OSError):
+    _statx = None
+
+
+def birth_time(path: Path, stats: Optional[os.stat_result] = None) -> float:
+    """파일 생성 시각 (지원하지 않는 파일시스템은 수정 시각)"""
+    stats = stats or path.stat()
+    birthtime = getattr(stats, 'st_birthtime', None)
+    if birthtime:
+        return birthtime
+
+    if _statx is not None:
+        buffer = ctypes.create_string_buffer(STATX_BUFFER_SIZE)
+        if _statx(AT_FDCWD, os.fsencode(str(path)), 0, STATX_BTIME, buffer) == 0:
+            mask, = struct.unpack_from('<I', buffer.raw, STATX_MASK_OFFSET)
+            seconds, nanoseconds = struct.unpack_from('<qI', buffer.raw, STATX_BTIME_OFFSET)
+            if mask & STATX_BTIME and seconds > 0:
+                return seconds + nanoseconds / 1e9
+
+    return stats.st_mtime
+
+
+def legacy_epub_order() -> List[str]:
+    """카탈로그 이전 웹 목록의 책 순서 (Node readdirSync = 바이트 순 정렬, .epub으로 끝나는 항목)
+
+    웹은 이 순서의 번호 + 1을 책 ID로 썼음
+    """
+    names = sorted(os.listdir(BOOKS_DIR), key=os.fsencode) if BOOKS_DIR.exists() else []
+    return [name for name in names if name.endswith('.epub')]
+
+
+def _iso_timestamp(ts: float) -> str:
+    """JS Date.toISOString()과 같은 형식의 UTC 시각"""
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def _remove_stale_lock():
+    """오래된 잠금 파일 제거 (잠금을 잡은 채 비정상 종료한 프로세스)"""
+    try:
+        stats = CATALOG_LOCK_PATH.stat()
+        if time.time() - stats.st_mtime > CATALOG_LOCK_STALE_SECONDS:
+            print(f"⚠️  오래된 카탈로그 잠금 제거 ({CATALOG_LOCK_PATH})")
+            CATALOG_LOCK_PATH.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _refresh_lock():
+    """긴 작업 중 잠금 파일 시각 갱신 (다른 프로세스가 오래된 잠금으로 보지 않도록)"""
+    try:
+        os.utime(CATALOG_LOCK_PATH)
+    except FileNotFoundError:
+        pass
+
+
+@contextmanager
+def catalog_lock():
+    """프로세스 간 카탈로그 갱신 직렬화 (다운로더/보완 컨테이너와 웹이 같은 볼륨 공유)
+
+    Node에는 flock이 없으므로 잠금 파일을 씀: O_EXCL로 .catalog.lock을 만들면 잠금, 지우면 해제.
+    """
+    BOOKS_DIR.mkdir(parents=True, exist_ok=True)
+    deadline = time.monotonic() + CATALOG_LOCK_TIMEOUT_SECONDS
+
+    while True:
+        try:
+            fd = os.open(CATALOG_LOCK_PATH, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            break
+        except FileExistsError:
+            _remove_stale_lock()
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"카탈로그 잠금을 얻지 못함 ({CATALOG_LOCK_TIMEOUT_SECONDS}초)")
+            time.sleep(CATALOG_LOCK_POLL_SECONDS)
+
+    try:
+        os.write(fd, f"{os.getpid()} catalog.py\n".encode())
+        lock_inode = os.fstat(fd).st_ino
+    finally:
+        os.close(fd)
+
+    try:
+        yield
+    finally:
+        # 오래된 잠금으로 제거된 뒤 다른 프로세스가 잡은 잠금은 지우지 않음
+        try:
+            if CATALOG_LOCK_PATH.stat().st_ino == lock_inode:
+                CATALOG_LOCK_PATH.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def empty_catalog() -> Dict:
+    return {
+        'version': CATALOG_VERSION,
+        'etag': None,
+        'updatedAt': None,
+        'nextId': 1,
+        'books': {},
+    }
+
+
+def _read_catalog_file() -> Tuple[Optional[Dict], Optional[Dict]]:
+    """(카탈로그, ID를 이어받을 수 있는 예전 카탈로그)
+
+    버전이 다르면 (None, 예전 카탈로그), 없거나 손상되었으면 (None, None)
+    """
+    if not CATALOG_PATH.exists():
+        return None, None
+
+    try:
+        with open(CATALOG_PATH, 'r', encoding='utf-8') as f:
+            catalog = json.load(f)
+    except Exception as e:
+        print(f"⚠️  catalog.json을 읽을 수 없음, 전체 스캔으로 다시 만듭니다: {e}")
+        return None, None
+
+    if not isinstance(catalog, dict) or catalog.get('version') != CATALOG_VERSION:
+        version = catalog.get('version') if isinstance(catalog, dict) else None
+        print(f"⚠️  catalog.json 버전 불일치 ({version}), 전체 스캔으로 다시 만듭니다")
+        return None, catalog if isinstance(catalog, dict) else None
+
+    return catalog, None
+
+
+def _load_locked() -> Dict:
+    """잠금 안에서 카탈로그 읽기 (없거나 읽을 수 없으면 재생성)
+
+    빈 카탈로그로 시작하면 다음 저장에서 갱신한 책만 남고 ID가 1부터 다시 부여되므로
+    반드시 전체 스캔으로 다시 만듦
+    """
+    catalog, previous = _read_catalog_file()
+    if catalog is None:
+        catalog = _rebuild_locked(previous)
+    return catalog
+
+
+def load_catalog() -> Dict:
+    """카탈로그 읽기 (없거나, 손상되었거나, 버전이 다르면 전체 스캔으로 재생성)"""
+    catalog, _ = _read_catalog_file()
+    if catalog is None:
+        # 다른 프로세스가 먼저 재생성했을 수 있으므로 잠금 안에서 다시 읽음
+        with catalog_lock():
+            catalog = _load_locked()
+    return catalog
+
+
+def save_catalog(catalog: Dict):
+    """원자적 쓰기: 임시 파일에 쓴 뒤 rename"""
+    catalog['etag'] = uuid.uuid4().hex
+    catalog['updatedAt'] = _iso_timestamp(datetime.now().timestamp())
+
+    atomic_write(CATALOG_PATH, json.dumps(catalog, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def read_metadata_file(epub_filename: str) -> Dict:
+    metadata_path = metadata_path_for(epub_filename, METADATA_DIR)
+    try:
+        return read_metadata(metadata_path)
+    except Exception as e:
+        print(f"⚠️  메타데이터를 읽을 수 없음 ({metadata_path.name}): {e}")
+        return {}
+
+
+def _build_entry(catalog: Dict, epub_filename: str, metadata: Dict) -> Optional[Dict]:
+    epub_path = BOOKS_DIR / epub_filename
+    if not epub_path.exists():
+        return None
+
+    stats = epub_path.stat()
+    existing = catalog['books'].get(epub_filename)
+
+    if existing:
+        book_id = existing['id']
+    else:
+        book_id = catalog['nextId']
+        catalog['nextId'] += 1
+
+    return {
+        'id': book_id,
+        'filename': epub_filename,
+        'size': stats.st_size,
+        # 웹 목록과 같은 기준: 생성 시각 (지원하지 않는 파일시스템은 수정 시각)
+        'addedDate': _iso_timestamp(birth_time(epub_path, stats)),
+        'metadata': metadata,
+    }
+
+
+def upsert_book(epub_filename: str, metadata: Optional[Dict] = None):
+    """책 한 권의 카탈로그 항목 추가/갱신 (metadata가 없으면 파일에서 읽음)"""
+    upsert_books({epub_filename: metadata})
+
+
+def upsert_books(updates: Dict[str, Optional[Dict]]):
+    """여러 책의 카탈로그 항목을 한 번의 쓰기로 갱신 {EPUB 파일명: 메타데이터 또는 None}"""
+    if not updates:
+        return
+
+    updates = {
+        filename: metadata if metadata is not None else read_metadata_file(filename)
+        for filename, metadata in updates.items()
+    }
+
+    with catalog_lock():
+        catalog = _load_locked()
+        changed = False
+
+        for epub_filename, metadata in updates.items():
+            entry = _build_entry(catalog, epub_filename, metadata)
+
+            if entry is None:
+                changed |= catalog['books'].pop(epub_filename, None) is not None
+            elif catalog['books'].get(epub_filename) != entry:
+                catalog['books'][epub_filename] = entry
+                changed = True
+
+        if changed:
+            save_catalog(catalog)
+
+
+def remove_book(epub_filename: str):
+    with catalog_lock():
+        catalog = _load_locked()
+        if catalog['books'].pop(epub_filename, None) is not None:
+            save_catalog(catalog)
+
+
+def _seed_ids(previous: Optional[Dict]) -> Dict:
+    """재생성할 카탈로그의 ID 자리 (예전 카탈로그의 ID, 없으면 카탈로그 이전 웹 목록 순서)"""
+    catalog = empty_catalog()
+    previous_books = previous.get('books') if previous else None
+
+    if isinstance(previous_books, dict) and previous_books:
+        for epub_filename, entry in previous_books.items():
+            if isinstance(entry, dict) and isinstance(entry.get('id'), int):
+                catalog['books'][epub_filename] = {'id': entry['id']}
+        max_id = max((entry['id'] for entry in catalog['books'].values()), default=0)
+        catalog['nextId'] = max(previous.get('nextId') or 1, max_id + 1)
+    else:
+        for index, epub_filename in enumerate(legacy_epub_order()):
+            catalog['books'][epub_filename] = {'id': index + 1}
+        catalog['nextId'] = len(catalog['books']) + 1
+
+    return catalog
+
+
+def _rebuild_locked(previous: Optional[Dict]) -> Dict:
+    """잠금 안에서 books/ 전체 스캔으로 카탈로그 재생성 (ID는 previous 기준, _seed_ids)"""
+    catalog = _seed_ids(previous)
+    epub_paths = list(BOOKS_DIR.glob("*.epub"))
+
+    # 새 책은 추가된 순서대로 ID 부여
+    epub_paths.sort(key=lambda p: (birth_time(p), p.name))
+
+    books = {}
+    for index, epub_path in enumerate(epub_paths):
+        if index % 500 == 499:
+            _refresh_lock()
+        entry = _build_entry(catalog, epub_path.name, read_metadata_file(epub_path.name))
+        if entry:
+            books[epub_path.name] = entry
+
+    catalog['books'] = books
+    save_catalog(catalog)
+    return catalog
+
+
+def rebuild_catalog(reseed_ids: bool = False) -> Dict:
+    """books/ 전체 스캔으로 카탈로그 재생성 (기존 책 ID 유지, reseed_ids면 예전 웹 목록 순서로 다시 부여)"""
+    with catalog_lock():
+        if reseed_ids:
+            return _rebuild_locked(None)
+        catalog, previous = _read_catalog_file()
+        return _rebuild_locked(catalog if catalog is not None else previous)
+
+
+def ensure_catalog() -> Dict:
+    """카탈로그가 없으면 한 번 전체 스캔으로 생성"""
+    if not CATALOG_PATH.exists():
+        print("📇 catalog.json이 없어 새로 생성합니다...")
+        return rebuild_catalog()
+    return load_catalog()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="books/catalog.json 재생성")
+    parser.add_argument('--reseed-ids', action='store_true',
+                        help="기존 ID 대신 카탈로그 이전 웹 목록 순서(readdir 순서)로 ID를 다시 부여")
+    args = parser.parse_args()
+
+    catalog = rebuild_catalog(reseed_ids=args.reseed_ids)
+    print(f"📇 카탈로그 생성 완료: {len(catalog['books'])}권 (etag {catalog['etag']})")
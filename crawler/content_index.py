@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+내용 기반 중복 제거 인덱스
+
+books/*.epub 과 books/covers/ 이미지의 SHA-256을 SQLite에 기록합니다 (sha256 → 경로).
+파일 경로는 제목(safe_title[:100])으로만 정해지므로, 같은 책이 다른 제목으로 두 번 저장되거나
+같은 표지가 여러 책에 쓰이면 디스크와 백업에 같은 내용이 여러 번 들어갑니다.
+
+- 새로 받은 파일이 이미 있는 내용과 같으면 기존 파일의 하드링크로 교체 (이름은 그대로, 공간은 하나)
+  하드링크를 만들 수 없는 파일시스템이면 파일은 두고 중복 원본 이름만 반환 (메타데이터에 기록)
+- 교체는 같은 디렉토리의 임시 링크 + os.replace라 읽는 쪽은 항상 완전한 파일을 봄
+- 크기/수정 시각이 그대로인 파일은 다시 해시하지 않음
+- 하드링크된 파일은 반드시 os.replace로 교체해서 써야 함 (제자리 쓰기는 양쪽이 같이 바뀜)
+- 인덱스 파일은 크롤러 전용 데이터 디렉토리에 둠 (웹이 내보내는 books/ 볼륨 밖)
+
+사용법:
+    python content_index.py report            # 중복 묶음과 회수 가능한 용량
+    python content_index.py apply             # 중복을 하드링크로 바꿔 공간 회수
+    python content_index.py report --kind epub
+"""
+
+import os
+import re
+import sys
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from data_dir import DATA_DIR, move_legacy_file
+
+BOOKS_DIR = Path("books")
+CONTENT_INDEX_PATH = DATA_DIR / "content_index.db"
+
+COVER_SUFFIXES = {'.jpg', '.jpeg', '.png', '.webp', '.gif'}
+
+# cover_derivatives.py가 표지에서 다시 만드는 축소본 ({제목}.jpg.w160.webp, {제목}.jpg.w160.eink.jpg)
+DERIVATIVE_PATTERN = re.compile(r'\.w\d+(\.eink)?\.(webp|jpg)$')
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: Path) -> Tuple[str, int]:
+    """(SHA-256 hex, 크기)"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def kind_of(path: Path) -> Optional[str]:
+    """인덱스 대상 종류 ('epub', 'cover') 또는 None"""
+    if path.name.startswith('.'):
+        return None
+    if path.suffix.lower() == '.epub':
+        return 'epub'
+    if path.suffix.lower() in COVER_SUFFIXES and not DERIVATIVE_PATTERN.search(path.name):
+        return 'cover'
+    return None
+
+
+def replace_with_link(canonical: Path, duplicate: Path):
+    """duplicate를 canonical의 하드링크로 원자적으로 교체"""
+    tmp_path = duplicate.with_name(f".{duplicate.name}.{os.getpid()}.link")
+    try:
+        os.link(canonical, tmp_path)
+        os.replace(tmp_path, duplicate)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class ContentIndex:
+    """sha256 → 경로 인덱스 (프로세스/스레드 간 공유)"""
+
+    def __init__(self, path: Path = CONTENT_INDEX_PATH, books_dir: Path = BOOKS_DIR):
+        self.path = Path(path)
+        self.books_dir = Path(books_dir)
+        self.lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False,
+                                    isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                indexed_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_files_sha256 ON files(sha256)")
+
+    def _key(self, path: Path) -> str:
+        """books/ 기준 상대 경로 (컨테이너마다 절대 경로가 달라도 같은 키)"""
+        path = Path(path)
+        try:
+            return str(path.resolve().relative_to(self.books_dir.resolve()))
+        except ValueError:
+            return str(path)
+
+    def _upsert(self, key: str, kind: str, sha256: str, stat: os.stat_result):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, kind, sha256, size, mtime_ns, indexed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, kind, sha256, stat.st_size, stat.st_mtime_ns, time.time())
+        )
+
+    def _find_canonical(self, sha256: str, size: int, exclude_key: str) -> Optional[Path]:
+        """같은 내용의 다른 파일 (가장 오래된 것, 실제로 있는 것만)"""
+        rows = self.conn.execute(
+            "SELECT path FROM files WHERE sha256 = ? AND size = ? AND path != ? ORDER BY mtime_ns, path",
+            (sha256, size, exclude_key)
+        ).fetchall()
+        for (key,) in rows:
+            candidate = self.books_dir / key
+            if candidate.exists():
+                return candidate
+            self.conn.execute("DELETE FROM files WHERE path = ?", (key,))
+        return None
+
+    def register(self, path: Path, sha256: Optional[str] = None, link: bool = True) -> Optional[str]:
+        """새로 저장한 파일 기록
+
+        같은 내용의 파일이 이미 있으면 (link=True) 하드링크로 바꾸고, 그 원본의 books/ 기준 경로 반환.
+        중복이 아니면 None.
+        """
+        path = Path(path)
+        kind = kind_of(path)
+        if kind is None:
+            return None
+        if sha256 is None:
+            sha256, _ = hash_file(path)
+
+        key = self._key(path)
+        with self.lock:
+            stat = path.stat()
+            canonical = self._find_canonical(sha256, stat.st_size, key)
+            if canonical is not None and link and not os.path.samefile(canonical, path):
+                try:
+                    replace_with_link(canonical, path)
+                    stat = path.stat()
+                except OSError as e:
+                    # 하드링크 불가 (다른 파일시스템, 지원 안 함) - 파일은 그대로 두고 중복만 알림
+                    print(f"    ⚠️ Could not hardlink duplicate: {str(e)[:50]}")
+            self._upsert(key, kind, sha256, stat)
+            return self._key(canonical) if canonical is not None else None
+
+    def scan(self) -> Dict[str, int]:
+        """books/ 전체를 인덱스에 반영 (바뀐 파일만 해시), 집계 반환"""
+        files = [p for p in self.books_dir.glob("*.epub")]
+        covers_dir = self.books_dir / "covers"
+        if covers_dir.exists():
+            files.extend(p for p in covers_dir.iterdir() if p.is_file())
+
+        with self.lock:
+            known = {key: (size, mtime_ns) for key, size, mtime_ns in
+                     self.conn.execute("SELECT path, size, mtime_ns FROM files")}
+
+        hashed = unchanged = 0
+        present = set()
+        for path in files:
+            kind = kind_of(path)
+            if kind is None:
+                continue
+            key = self._key(path)
+            present.add(key)
+            try:
+                stat = path.stat()
+                if known.get(key) == (stat.st_size, stat.st_mtime_ns):
+                    unchanged += 1
+                    continue
+                sha256, _ = hash_file(path)
+            except OSError as e:
+                print(f"  ⚠️  {path.name}: {e}")
+                continue
+            with self.lock:
+                self._upsert(key, kind, sha256, stat)
+            hashed += 1
+
+        removed = [key for key in known if key not in present]
+        with self.lock:
+            self.conn.executemany("DELETE FROM files WHERE path = ?", [(key,) for key in removed])
+        return {'hashed': hashed, 'unchanged': unchanged, 'removed': len(removed)}
+
+    def duplicate_groups(self, kind: Optional[str] = None) -> List[List[Tuple[str, int]]]:
+        """같은 내용의 파일 묶음 [[(경로, 크기), ...], ...] (첫 항목이 원본)"""
+        query = ("SELECT sha256, path, size FROM files WHERE sha256 IN "
+                 "(SELECT sha256 FROM files GROUP BY sha256, size HAVING COUNT(*) > 1)")
+        params = ()
+        if kind:
+            query += " AND kind = ?"
+            params = (kind,)
+        query += " ORDER BY sha256, mtime_ns, path"
+
+        groups: Dict[str, List[Tuple[str, int]]] = {}
+        with self.lock:
+            for sha256, key, size in self.conn.execute(query, params):
+                groups.setdefault(sha256, []).append((key, size))
+        return [group for group in groups.values() if len(group) > 1]
+
+    def dedupe(self, kind: Optional[str] = None, apply: bool = False) -> Dict[str, int]:
+        """중복을 하드링크로 교체 (apply=False면 회수 가능한 용량만 계산)"""
+        totals = {'groups': 0, 'duplicates': 0, 'linked': 0, 'reclaimable_bytes': 0, 'reclaimed_bytes': 0}
+        for group in self.duplicate_groups(kind):
+            canonical = self.books_dir / group[0][0]
+            if not canonical.exists():
+                continue
+            totals['groups'] += 1
+            print(f"  📚 {group[0][0]} ({group[0][1] / 1024 / 1024:.1f} MB)")
+
+            for key, size in group[1:]:
+                duplicate = self.books_dir / key
+                if not duplicate.exists():
+                    continue
+                totals['duplicates'] += 1
+                if os.path.samefile(canonical, duplicate):
+                    print(f"     = {key} (already linked)")
+                    continue
+
+                totals['reclaimable_bytes'] += size
+                if not apply:
+                    print(f"     ≡ {key}")
+                    continue
+                try:
+                    replace_with_link(canonical, duplicate)
+                except OSError as e:
+                    print(f"     ❌ {key}: {e}")
+                    continue
+                with self.lock:
+                    self._upsert(key, kind_of(duplicate), self._sha_of(group[0][0]), duplicate.stat())
+                totals['linked'] += 1
+                totals['reclaimed_bytes'] += size
+                print(f"     🔗 {key}")
+        return totals
+
+    def _sha_of(self, key: str) -> str:
+        return self.conn.execute("SELECT sha256 FROM files WHERE path = ?", (key,)).fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EPUB/표지 내용 기반 중복 제거")
+    parser.add_argument('command', choices=['report', 'apply'],
+                        help="report: 중복과 회수 가능한 용량 출력, apply: 하드링크로 교체")
+    parser.add_argument('--books-dir', type=Path, default=BOOKS_DIR,
+                        help=f"books 디렉토리 (기본값: {BOOKS_DIR})")
+    parser.add_argument('--index', type=Path, default=CONTENT_INDEX_PATH,
+                        help=f"인덱스 파일 (기본값: {CONTENT_INDEX_PATH})")
+    parser.add_argument('--kind', choices=['epub', 'cover'], help="대상 종류 (기본값: 둘 다)")
+    args = parser.parse_args(argv)
+
+    move_legacy_file(args.books_dir / CONTENT_INDEX_PATH.name, args.index, sqlite=True)
+    index = ContentIndex(args.index, args.books_dir)
+    start = time.time()
+    scanned = index.scan()
+    print(f"🔎 인덱스 갱신: 해시 {scanned['hashed']}개, 그대로 {scanned['unchanged']}개, "
+          f"삭제 {scanned['removed']}개 ({time.time() - start:.1f}초)")
+
+    totals = index.dedupe(kind=args.kind, apply=args.command == 'apply')
+    print(f"\n📊 중복 묶음 {totals['groups']}개, 중복 파일 {totals['duplicates']}개")
+    if args.command == 'apply':
+        print(f"🔗 하드링크로 교체 {totals['linked']}개, 회수 {totals['reclaimed_bytes'] / 1024 / 1024:.1f} MB")
+    else:
+        print(f"💾 회수 가능 {totals['reclaimable_bytes'] / 1024 / 1024:.1f} MB (apply로 실행)")
+    index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
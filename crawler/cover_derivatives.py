@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+표지 파생 이미지 생성
+
+저장된 표지 원본으로부터 목록 화면용 크기별 썸네일(WebP)과
+e-ink 단말용 흑백 JPEG을 books/covers/에 미리 만들어 둡니다.
+
+- {표지 파일명}.w160.webp, {표지 파일명}.w320.webp, {표지 파일명}.w640.webp
+- {표지 파일명}.w160.eink.jpg, {표지 파일명}.w320.eink.jpg, {표지 파일명}.w640.eink.jpg
+
+파일명에 원본 확장자를 포함하므로 (제목.jpg.w160.webp) 확장자만 다른 표지끼리 덮어쓰지 않습니다.
+예전 이름(제목.w160.webp)의 파생 이미지는 새 이름으로 다시 만든 뒤 삭제합니다.
+
+메타데이터의 cover_updated 값을 derivatives.json에 기록해 두고,
+값이 바뀐 표지만 다시 생성합니다. 보완 스크립트가 실행될 때마다 자동으로 호출되며,
+직접 실행하면 기존 표지 전체를 대상으로 백필합니다.
+"""
+
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from catalog import ensure_catalog
+
+# 경로 설정
+BOOKS_DIR = Path("books")
+COVERS_DIR = BOOKS_DIR / "covers"
+MANIFEST_PATH = COVERS_DIR / "derivatives.json"
+
+# 생성할 가로 크기 (원본보다 크게 확대하지 않음)
+DERIVATIVE_WIDTHS = (160, 320, 640)
+WEBP_QUALITY = 80
+EINK_QUALITY = 75
+
+DEFAULT_JOBS = int(os.getenv('COVER_DERIVATIVE_JOBS', str(os.cpu_count() or 2)))
+
+
+def derivative_name(cover_filename: str, width: int, variant: str = 'webp') -> str:
+    """파생 이미지 파일명 (variant: 'webp' 또는 'eink')"""
+    if variant == 'eink':
+        return f"{cover_filename}.w{width}.eink.jpg"
+    return f"{cover_filename}.w{width}.webp"
+
+
+def legacy_derivative_names(cover_filename: str):
+    """원본 확장자 없이 만들던 예전 파생 이미지 파일명"""
+    stem = Path(cover_filename).stem
+    for width in DERIVATIVE_WIDTHS:
+        yield f"{stem}.w{width}.webp"
+        yield f"{stem}.w{width}.eink.jpg"
+
+
+def remove_legacy_derivatives(cover_filename: str):
+    for name in legacy_derivative_names(cover_filename):
+        try:
+            (COVERS_DIR / name).unlink()
+        except FileNotFoundError:
+            pass
+
+
+def render_derivatives(cover_filename: str) -> Tuple[str, Optional[str]]:
+    """한 표지의 파생 이미지 생성 (프로세스 풀 워커에서 실행)
+
+    Returns: (표지 파일명, 오류 메시지 또는 None)
+    """
+    try:
+        with Image.open(COVERS_DIR / cover_filename) as source:
+            source.draft('RGB', (max(DERIVATIVE_WIDTHS), max(DERIVATIVE_WIDTHS) * 2))
+            image = source.convert('RGB')
+
+        for width in DERIVATIVE_WIDTHS:
+            resized = image
+            if image.width > width:
+                height = round(image.height * width / image.width)
+                resized = image.resize((width, height), Image.LANCZOS)
+
+            _save_atomic(resized, derivative_name(cover_filename, width), 'WEBP',
+                         quality=WEBP_QUALITY, method=4)
+
+            grayscale = ImageOps.autocontrast(resized.convert('L'))
+            _save_atomic(grayscale, derivative_name(cover_filename, width, 'eink'), 'JPEG',
+                         quality=EINK_QUALITY, optimize=True)
+
+        return cover_filename, None
+
+    except Exception as e:
+        return cover_filename, str(e)
+
+
+def _save_atomic(image: Image.Image, filename: str, image_format: str, **options):
+    """임시 파일에 저장 후 rename (웹에서 반쯤 쓰인 이미지를 읽지 않도록)"""
+    path = COVERS_DIR / filename
+    tmp_path = COVERS_DIR / f".{filename}.tmp"
+    image.save(tmp_path, image_format, **options)
+    os.replace(tmp_path, path)
+
+
+def load_manifest() -> Dict[str, str]:
+    if MANIFEST_PATH.exists():
+        try:
+            with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️  derivatives.json을 읽을 수 없음, 새로 생성합니다: {e}")
+    return {}
+
+
+def save_manifest(manifest: Dict[str, str]):
+    tmp_path = MANIFEST_PATH.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def cover_version(metadata: Dict, cover_path: Path) -> str:
+    """파생 이미지 갱신 여부 판단용 키 (cover_updated, 없으면 파일 수정 시각)"""
+    return str(metadata.get('cover_updated') or int(cover_path.stat().st_mtime * 1000))
+
+
+def derivatives_current(cover_filename: str, cover_path: Path) -> bool:
+    """파생 이미지가 있고 원본보다 나중에 만들어졌는지 (첫 번째 크기로 확인)"""
+    try:
+        derivative_mtime = (COVERS_DIR / derivative_name(cover_filename, DERIVATIVE_WIDTHS[0])).stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
+    return derivative_mtime >= cover_path.stat().st_mtime_ns
+
+
+def collect_pending(manifest: Dict[str, str], force: bool = False) -> Dict[str, str]:
+    """파생 이미지가 없거나 오래된 표지 목록 {표지 파일명: 버전}"""
+    pending = {}
+
+    # 메타데이터 파일을 하나씩 열지 않고 카탈로그 한 번만 읽음
+    for book in ensure_catalog()['books'].values():
+        metadata = book.get('metadata') or {}
+        cover_filename = metadata.get('cover')
+        if not cover_filename:
+            continue
+
+        cover_path = COVERS_DIR / cover_filename
+        if not cover_path.exists():
+            continue
+
+        version = cover_version(metadata, cover_path)
+        # 파생 이미지 파일이 없거나 (예전 이름으로만 있는 경우 포함) 원본보다 오래되었으면
+        # 버전이 같아도 다시 생성 (웹 관리자가 같은 파일명으로 표지를 교체한 경우)
+        if force or manifest.get(cover_filename) != version or not derivatives_current(cover_filename, cover_path):
+            pending[cover_filename] = version
+
+    return pending
+
+
+def update_derivatives(jobs: int = DEFAULT_JOBS, force: bool = False) -> int:
+    """변경된 표지의 파생 이미지를 프로세스 풀에서 생성, 생성한 표지 수 반환"""
+    if not COVERS_DIR.exists():
+        return 0
+
+    manifest = load_manifest()
+    pending = collect_pending(manifest, force=force)
+
+    if not pending:
+        return 0
+
+    print(f"🖼️  표지 파생 이미지 생성: {len(pending)}개 (프로세스 {jobs}개)")
+    start = time.time()
+    covers = sorted(pending)
+
+    if jobs <= 1:
+        generated = _apply_results(map(render_derivatives, covers), pending, manifest)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = executor.map(render_derivatives, covers, chunksize=8)
+            generated = _apply_results(results, pending, manifest)
+
+    save_manifest(manifest)
+    print(f"  ✅ {generated}개 완료 ({time.time() - start:.1f}초)")
+    return generated
+
+
+def _apply_results(results, pending: Dict[str, str], manifest: Dict[str, str]) -> int:
+    generated = 0
+    for cover_filename, error in results:
+        if error:
+            print(f"  ⚠️  {cover_filename[:50]} - 파생 이미지 생성 실패: {error}")
+            continue
+        manifest[cover_filename] = pending[cover_filename]
+        remove_legacy_derivatives(cover_filename)
+        generated += 1
+    return generated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="표지 썸네일/WebP/e-ink 파생 이미지 생성")
+    parser.add_argument('--force', action='store_true',
+                        help="이미 생성된 파생 이미지도 모두 다시 생성")
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS,
+                        help=f"동시에 실행할 프로세스 수 (기본값: {DEFAULT_JOBS})")
+    args = parser.parse_args()
+
+    update_derivatives(jobs=args.jobs, force=args.force)
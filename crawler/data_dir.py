@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+크롤러 전용 데이터 디렉토리
+
+로그인 세션, 작업 큐, 검색 캐시, 인덱스처럼 크롤러 컨테이너끼리만 쓰는 파일을 둡니다.
+books/ 볼륨은 웹 컨테이너가 그대로 마운트해 /api/download로 내보내므로
+로그인 쿠키나 SQLite 파일을 그 안에 두지 않습니다.
+
+- 위치: CRAWLER_DATA_DIR (기본 data, docker-compose에서 crawler/data를 /app/data로 마운트)
+- 예전 버전이 books/에 만든 파일은 처음 쓸 때 이쪽으로 옮김 (SQLite -wal/-shm 포함)
+"""
+
+import os
+import shutil
+from pathlib import Path
+
+DATA_DIR = Path(os.getenv('CRAWLER_DATA_DIR', 'data'))
+
+# 예전 버전이 상태 파일을 두던 곳 (웹과 공유하는 볼륨)
+LEGACY_BOOKS_DIR = Path("books")
+
+SQLITE_SIDECAR_SUFFIXES = ('-wal', '-shm')
+
+
+def move_legacy_file(legacy_path: Path, path: Path, sqlite: bool = False):
+    """예전 위치의 파일을 path로 옮김 (path가 아직 없고 예전 파일이 있을 때만)
+
+    SQLite 파일은 -wal/-shm을 먼저 옮기고 본 파일을 마지막에 옮김
+    (본 파일이 새 위치에 있으면 옮기기가 끝난 것으로 봄).
+    볼륨이 다르면 shutil.move가 복사 후 삭제함.
+    """
+    legacy_path, path = Path(legacy_path), Path(path)
+    if path.exists() or not legacy_path.exists():
+        return
+    if legacy_path.resolve() == path.resolve():
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if sqlite:
+        for suffix in SQLITE_SIDECAR_SUFFIXES:
+            sidecar = legacy_path.with_name(legacy_path.name + suffix)
+            if sidecar.exists():
+                shutil.move(str(sidecar), str(path.with_name(path.name + suffix)))
+    shutil.move(str(legacy_path), str(path))
+    print(f"📦 Moved {legacy_path} → {path}")
+
+    # 비어 버린 예전 디렉토리 정리 (books/.session 등)
+    if legacy_path.parent != LEGACY_BOOKS_DIR:
+        try:
+            legacy_path.parent.rmdir()
+        except OSError:
+            pass
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+EPUB 직접 다운로드
+
+브라우저 다운로드(page.expect_download + save_as)는 Chromium 임시 디렉토리에 한 번 쓰고
+books/로 다시 복사합니다. 이 모듈은 EPUB 버튼의 href를 브라우저 컨텍스트의 로그인 쿠키로
+직접 요청해 books/에 한 번만 씁니다.
+
+- books/<이름>.epub.part 에 받으면서 SHA-256 계산, 끝나면 fsync 후 os.replace
+- 중단된 .part가 있으면 Range 요청으로 이어 받음
+  (.part.json에 ETag/Last-Modified를 저장해 If-Range로 같은 파일인지 확인,
+  서버가 전체(200)를 보내면 처음부터 다시 받음)
+- 응답이 EPUB(zip)이 아니면(일일 제한 페이지, 로그인 만료 등) DirectDownloadError
+  → 다운로더가 기존 브라우저 다운로드로 다시 시도해 제한 감지도 기존 방식 그대로
+- DIRECT_DOWNLOAD=1 일 때만 사용 (기본은 브라우저 다운로드)
+
+Playwright 동기 API는 스레드에 묶여 있으므로 컨텍스트(워커)마다 하나씩 만듭니다.
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import urljoin
+
+import requests
+
+from http_session import create_session
+
+DIRECT_DOWNLOAD = os.getenv('DIRECT_DOWNLOAD', '0') == '1'
+
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+# (연결, 읽기) 타임아웃 초 - 큰 EPUB은 읽기 간격이 길 수 있음
+DOWNLOAD_TIMEOUT = (10.0, float(os.getenv('DIRECT_DOWNLOAD_READ_TIMEOUT', '60')))
+
+# 연결이 끊기면 같은 호출 안에서 이어 받기 재시도 횟수
+DOWNLOAD_ATTEMPTS = 3
+
+# EPUB은 zip 파일
+ZIP_MAGIC = b'PK\x03\x04'
+
+
+class DirectDownloadError(Exception):
+    """직접 다운로드 불가 (브라우저 다운로드로 대체)"""
+
+
+class IncompleteDownload(DirectDownloadError):
+    """중간에 끊김 (.part를 남겨 두고 이어 받기 가능)"""
+
+
+def _sidecar_path(part_path: Path) -> Path:
+    return part_path.with_name(part_path.name + '.json')
+
+
+def _read_validator(part_path: Path) -> Optional[str]:
+    try:
+        with open(_sidecar_path(part_path), 'r', encoding='utf-8') as f:
+            return json.load(f).get('validator')
+    except (OSError, ValueError):
+        return None
+
+
+def _write_validator(part_path: Path, validator: Optional[str]):
+    with open(_sidecar_path(part_path), 'w', encoding='utf-8') as f:
+        json.dump({'validator': validator}, f)
+
+
+def _hash_existing(path: Path) -> Tuple[int, 'hashlib._Hash']:
+    """이어 받을 .part의 크기와 지금까지의 SHA-256"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    return size, digest
+
+
+def remove_partial(dest_path: Path):
+    """받다 만 파일과 보조 파일 삭제"""
+    part_path = Path(f"{dest_path}.part")
+    for path in (part_path, _sidecar_path(part_path)):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class DirectDownloader:
+    """브라우저 컨텍스트의 쿠키/User-Agent로 EPUB 링크를 직접 받음"""
+
+    def __init__(self, context, base_url: str, user_agent: Optional[str] = None):
+        self.context = context
+        self.base_url = base_url
+        self.session = create_session(default_pool_size=2, timeout=DOWNLOAD_TIMEOUT)
+        if user_agent:
+            self.session.headers['User-Agent'] = user_agent
+
+    def sync_cookies(self):
+        """컨텍스트의 현재 쿠키를 세션에 복사 (로그인 갱신 반영)"""
+        for cookie in self.context.cookies():
+            self.session.cookies.set(cookie['name'], cookie['value'],
+                                     domain=cookie.get('domain'), path=cookie.get('path', '/'))
+
+    def resolve(self, href: Optional[str]) -> str:
+        if not href or href.startswith('javascript:') or href == '#':
+            raise DirectDownloadError("EPUB button has no usable href")
+        return urljoin(self.base_url, href)
+
+    def download(self, href: str, dest_path, referer: Optional[str] = None,
+                 attempts: int = DOWNLOAD_ATTEMPTS) -> Tuple[int, str]:
+        """href를 dest_path로 받음 (끊기면 이어 받기 재시도), (바이트 수, SHA-256 hex) 반환"""
+        url = self.resolve(href)
+        for attempt in range(1, attempts + 1):
+            try:
+                return self._download_once(url, Path(dest_path), referer)
+            except (IncompleteDownload, requests.RequestException) as e:
+                if attempt == attempts:
+                    raise DirectDownloadError(f"Gave up after {attempts} attempts: {e}") from e
+                print(f"    ↻ Download interrupted ({str(e)[:50]}), resuming...")
+
+    def _download_once(self, url: str, dest_path: Path, referer: Optional[str]) -> Tuple[int, str]:
+        part_path = Path(f"{dest_path}.part")
+        self.sync_cookies()
+
+        # 압축 전송이면 Content-Length와 받은 크기가 달라지므로 원본 그대로 요청
+        headers = {'Accept-Encoding': 'identity'}
+        if referer:
+            headers['Referer'] = referer
+        offset = 0
+        digest = hashlib.sha256()
+        if part_path.exists():
+            offset, digest = _hash_existing(part_path)
+            validator = _read_validator(part_path)
+            if offset > 0:
+                headers['Range'] = f"bytes={offset}-"
+                if validator:
+                    headers['If-Range'] = validator
+
+        with self.session.get(url, headers=headers, stream=True, allow_redirects=True) as response:
+            if response.status_code == 416:
+                # 저장된 범위가 맞지 않음 - 다음 시도는 처음부터
+                remove_partial(dest_path)
+                raise DirectDownloadError("Range not satisfiable, partial file discarded")
+            if response.status_code not in (200, 206):
+                raise DirectDownloadError(f"HTTP {response.status_code}")
+
+            content_type = response.headers.get('Content-Type', '')
+            if 'text/html' in content_type:
+                raise DirectDownloadError(f"Got a page instead of a file ({content_type})")
+
+            if response.status_code == 200 and offset:
+                # 서버가 이어 받기를 거부(또는 파일이 바뀜) - 처음부터
+                offset, digest = 0, hashlib.sha256()
+
+            validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+            expected = response.headers.get('Content-Length')
+            expected = offset + int(expected) if expected and expected.isdigit() else None
+
+            mode = 'ab' if offset else 'wb'
+            written = offset
+            with open(part_path, mode) as f:
+                _write_validator(part_path, validator)
+                first_chunk = offset == 0
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    if first_chunk:
+                        if not chunk.startswith(ZIP_MAGIC):
+                            f.close()
+                            remove_partial(dest_path)
+                            raise DirectDownloadError("Response is not an EPUB (zip) file")
+                        first_chunk = False
+                    f.write(chunk)
+                    digest.update(chunk)
+                    written += len(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+
+        if written == 0:
+            remove_partial(dest_path)
+            raise DirectDownloadError("Empty response")
+        if expected is not None and written != expected:
+            # .part는 남겨 두고 다음 시도에서 이어 받음
+            raise IncompleteDownload(f"Incomplete download ({written}/{expected} bytes)")
+
+        os.replace(part_path, dest_path)
+        try:
+            _sidecar_path(part_path).unlink()
+        except FileNotFoundError:
+            pass
+        return written, digest.hexdigest()
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+다운로드 워커 풀 벤치마크
+
+로컬 HTTP 서버에 가짜 책 페이지/EPUB/표지를 띄우고 DownloadWorkerPool을 워커 수별로 실행해
+분당 다운로드 수를 비교합니다. Z-Library에 접속하지 않으며 할당량도 쓰지 않습니다.
+
+- 책 페이지: book_downloader가 읽는 것과 같은 선택자 (img.cover, .book-description,
+  [itemprop="author"], EPUB 버튼)
+- 페이지 응답과 EPUB 응답에 지연을 넣어 실제 사이트의 대기 시간을 흉내 냄 (--page-delay, --download-delay)
+- 워커 1개 = 기존 순차 다운로드와 같은 흐름 (페이지 하나로 책을 하나씩)
+- 동시 다운로드는 MAX_CONCURRENT_PER_ACCOUNT로 제한되므로 그보다 많은 워커는 효과가 없음
+- 실행마다 임시 디렉토리에서 books/를 새로 만들어 씀 (실제 books/는 건드리지 않음)
+
+Playwright Chromium이 설치된 환경(크롤러 컨테이너)에서 실행:
+    python download_bench.py
+    python download_bench.py --workers 1,2,3 --books 30 --download-delay 2
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import book_downloader
+from book_downloader import MAX_CONCURRENT_PER_ACCOUNT, DownloadState, DownloadWorkerPool
+from work_queue import EnrichmentQueue
+
+BOOK_PAGE_HTML = """<!doctype html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body>
+  <img class="cover" src="/covers/{book_id}.jpg">
+  <div class="book-description">{title} 설명 (벤치마크용 가짜 책)</div>
+  <span itemprop="author">벤치 저자 {book_id}</span>
+  <span itemprop="datePublished">2024</span>
+  <a class="addDownloadedBook" href="/dl/{book_id}.epub">EPUB, 512 KB</a>
+</body></html>
+"""
+
+# 표지 응답 (내용은 검사하지 않음)
+COVER_BODY = b'\xff\xd8\xff\xe0' + b'\x00' * 2048
+
+
+def make_handler(page_delay: float, download_delay: float, epub_bytes: int):
+    """지연 시간이 설정된 가짜 사이트 요청 처리기"""
+    epub_body = b'PK\x03\x04' + os.urandom(max(0, epub_bytes - 4))
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status, body, content_type, extra_headers=None):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (extra_headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            parts = self.path.split('?')[0].strip('/').split('/')
+            if parts[0] == 'book' and len(parts) >= 2:
+                time.sleep(page_delay)
+                html = BOOK_PAGE_HTML.format(book_id=parts[1], title=f"벤치 책 {parts[1]}")
+                self._send(200, html.encode('utf-8'), 'text/html; charset=utf-8')
+            elif parts[0] == 'dl' and len(parts) == 2:
+                time.sleep(download_delay)
+                self._send(200, epub_body, 'application/epub+zip',
+                           {'Content-Disposition': f'attachment; filename="{parts[1]}"'})
+            elif parts[0] == 'covers':
+                self._send(200, COVER_BODY, 'image/jpeg')
+            else:
+                self._send(200, b'<!doctype html><html><body></body></html>', 'text/html')
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+def start_fixture_server(page_delay: float, download_delay: float, epub_bytes: int) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(page_delay, download_delay, epub_bytes))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_pool(workers: int, book_count: int, run_dir: Path) -> float:
+    """임시 디렉토리에서 워커 풀로 book_count권을 받고 분당 다운로드 수 반환"""
+    cwd = os.getcwd()
+    run_dir.mkdir(parents=True)
+    os.chdir(run_dir)
+    try:
+        for directory in ('books', 'books/covers', 'books/metadata'):
+            os.makedirs(directory, exist_ok=True)
+
+        state = DownloadState()
+        enrich_queue = EnrichmentQueue(Path('data') / 'enrich_queue.db')
+        books = [{'title': f"벤치 책 {i}", 'href': f"/book/{i}/bench"} for i in range(1, book_count + 1)]
+
+        pool = DownloadWorkerPool(workers, None, state, enrich_queue)
+        try:
+            start = time.monotonic()
+            pool.download_all(books)
+            elapsed = time.monotonic() - start
+        finally:
+            pool.close()
+
+        if state.downloaded_count != book_count:
+            print(f"  ⚠️  {book_count}권 중 {state.downloaded_count}권만 받음")
+        return state.downloaded_count / elapsed * 60
+    finally:
+        os.chdir(cwd)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="다운로드 워커 풀 벤치마크 (로컬 가짜 사이트)")
+    parser.add_argument('--workers', default='1,2,3',
+                        help="비교할 워커 수, 쉼표 구분 (기본값: 1,2,3)")
+    parser.add_argument('--books', type=int, default=24, help="실행마다 받을 책 수 (기본값: 24)")
+    parser.add_argument('--page-delay', type=float, default=0.5, help="책 페이지 응답 지연 초 (기본값: 0.5)")
+    parser.add_argument('--download-delay', type=float, default=1.5, help="EPUB 응답 지연 초 (기본값: 1.5)")
+    parser.add_argument('--epub-kb', type=int, default=512, help="가짜 EPUB 크기 KB (기본값: 512)")
+    args = parser.parse_args(argv)
+
+    worker_counts = [int(w) for w in args.workers.split(',') if w.strip()]
+    server = start_fixture_server(args.page_delay, args.download_delay, args.epub_kb * 1024)
+    book_downloader.BASE_URL = f"http://127.0.0.1:{server.server_port}"
+    print(f"🧪 가짜 사이트 {book_downloader.BASE_URL} (페이지 {args.page_delay}s, EPUB {args.download_delay}s, "
+          f"계정당 동시 다운로드 최대 {MAX_CONCURRENT_PER_ACCOUNT})")
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='download-bench-') as tmp_dir:
+        for workers in worker_counts:
+            print(f"\n▶️  워커 {workers}개, 책 {args.books}권")
+            results[workers] = run_pool(workers, args.books, Path(tmp_dir) / f"workers-{workers}")
+
+    server.shutdown()
+
+    baseline = results.get(worker_counts[0])
+    print("\n📊 결과")
+    for workers, per_minute in results.items():
+        speedup = f" (x{per_minute / baseline:.2f})" if baseline else ""
+        print(f"  워커 {workers}개: 분당 {per_minute:.1f}권{speedup}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
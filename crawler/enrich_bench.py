@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+메타데이터 보완 벤치마크
+
+로컬 HTTPS 서버에 가짜 Naver Books 검색 API와 표지 이미지를 띄우고 측정합니다.
+Naver API에 접속하지 않으며 할당량도 쓰지 않습니다.
+
+- throughput: MetadataEnricher를 워커 수/초당 호출 수 설정별로 실행해 처리 시간 비교
+- latency: 책 하나(검색 1회 + 표지 1장)의 요청 시간 중앙값을 매번 새 연결(requests.get)과
+  공유 keep-alive 세션(http_session.create_session)으로 비교 (TCP+TLS 연결 비용)
+
+- 검색 응답: 검색어와 같은 제목의 책 하나 (설명, 표지, 저자, 출판일 포함)
+- 실제 API/CDN처럼 HTTPS로 응답 (보완 스크립트는 표지 URL을 https로 바꿔 받음)
+  자체 서명 인증서는 openssl 명령으로 만들고 REQUESTS_CA_BUNDLE로 신뢰하게 함 (openssl 필요)
+- 응답마다 지연을 넣어 실제 API의 왕복 시간을 흉내 냄 (--latency)
+- 실행마다 임시 디렉토리에 books/와 data/를 새로 만들어 씀 (캐시 적중 없음, 실제 books/는 건드리지 않음)
+- 표지 파생 이미지 생성은 throughput 측정에서 제외
+
+예전 순차 처리는 책마다 1초씩 쉬었으므로 책 N권에 최소 N초가 걸렸습니다.
+
+실행:
+    python enrich_bench.py throughput
+    python enrich_bench.py throughput --configs 1:5,4:10,8:20 --books 40 --latency 0.05
+    python enrich_bench.py latency --books 50 --latency 0.02
+"""
+
+import os
+import ssl
+import socket
+import sys
+import json
+import time
+import subprocess
+import argparse
+import tempfile
+import threading
+import statistics
+import contextlib
+from io import BytesIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from PIL import Image
+
+import enrich_metadata
+from http_session import create_session
+
+# 검색 API 경로 (NAVER_BOOKS_API와 같은 모양)
+SEARCH_PATH = "/v1/search/book.json"
+
+
+def make_cover_body() -> bytes:
+    """MIN_COVER_WIDTH를 넘는 JPEG 표지"""
+    buffer = BytesIO()
+    Image.new('RGB', (300, 450), (40, 90, 160)).save(buffer, 'JPEG', quality=80)
+    return buffer.getvalue()
+
+
+def make_handler(latency: float, cover_body: bytes):
+    """지연 시간이 설정된 가짜 Naver API 요청 처리기"""
+
+    class NaverStubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            super().setup()
+            # 헤더와 본문을 따로 쓰므로 Nagle을 끄지 않으면 keep-alive 연결에서 지연 ACK만큼(~40ms) 늦어짐
+            # (실제 서버처럼 TCP_NODELAY)
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def _send(self, status, body, content_type):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            time.sleep(latency)
+            if url.path == SEARCH_PATH:
+                query = parse_qs(url.query).get('query', [''])[0]
+                base = f"https://{self.headers['Host']}"
+                item = {
+                    'title': query,
+                    'author': '벤치 저자',
+                    'publisher': '벤치 출판사',
+                    'pubdate': '20240101',
+                    'description': f"{query} 설명 (벤치마크용 가짜 응답)",
+                    'image': f"{base}/covers/{abs(hash(query))}.jpg",
+                    'isbn': str(abs(hash(query))),
+                    'link': '',
+                }
+                body = json.dumps({'total': 1, 'start': 1, 'display': 10, 'items': [item]},
+                                  ensure_ascii=False).encode('utf-8')
+                self._send(200, body, 'application/json; charset=utf-8')
+            elif url.path.startswith('/covers/'):
+                self._send(200, cover_body, 'image/jpeg')
+            else:
+                self._send(404, b'{}', 'application/json')
+
+        def log_message(self, format, *args):
+            pass
+
+    return NaverStubHandler
+
+
+def make_certificate(directory: Path) -> Tuple[Path, Path]:
+    """127.0.0.1용 자체 서명 인증서 (인증서, 키) 생성"""
+    cert_path, key_path = directory / 'stub.crt', directory / 'stub.key'
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-subj', '/CN=127.0.0.1', '-addext', 'subjectAltName=IP:127.0.0.1',
+         '-keyout', str(key_path), '-out', str(cert_path)],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    return cert_path, key_path
+
+
+def start_stub_server(latency: float, cert_path: Path, key_path: Path) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(latency, make_cover_body()))
+    server.daemon_threads = True
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(str(cert_path), str(key_path))
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def prepare_library(book_count: int):
+    """현재 디렉토리에 보완 전 상태의 책 book_count권 생성"""
+    for directory in ('books', 'books/covers', 'books/metadata', 'data'):
+        os.makedirs(directory, exist_ok=True)
+    for i in range(1, book_count + 1):
+        title = f"벤치 책 {i}"
+        Path('books', f"{title}.epub").write_bytes(b'PK\x03\x04')
+        Path('books', 'metadata', f"{title}.json").write_text(
+            json.dumps({'title': title}, ensure_ascii=False), encoding='utf-8')
+
+
+def run_enricher(workers: int, qps: float, book_count: int, run_dir: Path, verbose: bool) -> float:
+    """임시 디렉토리에서 book_count권을 보완하고 걸린 초 반환"""
+    cwd = os.getcwd()
+    run_dir.mkdir(parents=True)
+    os.chdir(run_dir)
+    try:
+        prepare_library(book_count)
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(open(os.devnull, 'w'))
+        with output:
+            enricher = enrich_metadata.MetadataEnricher(workers=workers, qps=qps)
+            start = time.monotonic()
+            try:
+                result = enricher.run()
+                elapsed = time.monotonic() - start
+            finally:
+                enricher.close()
+
+        if result['updated'] != book_count:
+            print(f"  ⚠️  {book_count}권 중 {result['updated']}권만 보완됨")
+        return elapsed
+    finally:
+        os.chdir(cwd)
+
+
+def parse_configs(value: str):
+    """'1:5,8:20' → [(1, 5.0), (8, 20.0)]"""
+    configs = []
+    for part in value.split(','):
+        if part.strip():
+            workers, qps = part.split(':')
+            configs.append((int(workers), float(qps)))
+    return configs
+
+
+def throughput(args) -> int:
+    server, tmp = start_https_stub(args.latency)
+    tmp_dir = Path(tmp.name)
+    base = f"https://127.0.0.1:{server.server_port}"
+
+    # 보완 스크립트를 가짜 API로 향하게 하고, 실행 디렉토리 기준 경로를 쓰도록 설정
+    enrich_metadata.NAVER_BOOKS_API = base + SEARCH_PATH
+    enrich_metadata.NAVER_CLIENT_ID = enrich_metadata.NAVER_CLIENT_ID or 'bench'
+    enrich_metadata.NAVER_CLIENT_SECRET = enrich_metadata.NAVER_CLIENT_SECRET or 'bench'
+    enrich_metadata.QUEUE_PATH = Path('data') / 'enrich_queue.db'
+    enrich_metadata.NAVER_CACHE_PATH = Path('data') / 'naver_cache.db'
+    enrich_metadata.update_derivatives = lambda *a, **kw: 0
+    print(f"🧪 가짜 Naver API {base} (응답 지연 {args.latency}s, 책 {args.books}권)")
+
+    results = {}
+    configs = parse_configs(args.configs)
+    try:
+        for workers, qps in configs:
+            print(f"\n▶️  워커 {workers}개, 초당 {qps:g}회")
+            elapsed = run_enricher(workers, qps, args.books, tmp_dir / f"w{workers}-q{qps:g}", args.verbose)
+            results[(workers, qps)] = elapsed
+            print(f"  ⏱️  {elapsed:.1f}초")
+    finally:
+        server.shutdown()
+        tmp.cleanup()
+
+    print("\n📊 결과")
+    print(f"  예전 순차 처리 (책마다 1초 대기): {args.books}초 이상")
+    baseline = results.get(configs[0])
+    for (workers, qps), elapsed in results.items():
+        speedup = f" (x{baseline / elapsed:.2f})" if baseline else ""
+        print(f"  워커 {workers}개, 초당 {qps:g}회: {elapsed:.1f}초, 분당 {args.books / elapsed * 60:.0f}권{speedup}")
+    return 0
+
+
+def start_https_stub(latency: float) -> Tuple[ThreadingHTTPServer, tempfile.TemporaryDirectory]:
+    """인증서를 만들고 가짜 API 서버 시작 (인증서는 REQUESTS_CA_BUNDLE로 신뢰)"""
+    tmp = tempfile.TemporaryDirectory(prefix='enrich-bench-')
+    cert_path, key_path = make_certificate(Path(tmp.name))
+    os.environ['REQUESTS_CA_BUNDLE'] = str(cert_path)
+    return start_stub_server(latency, cert_path, key_path), tmp
+
+
+def measure_book_latency(get, base: str, book_count: int) -> List[float]:
+    """책마다 검색 1회 + 표지 1장 요청 시간(ms) 목록"""
+    timings = []
+    for i in range(1, book_count + 1):
+        start = time.perf_counter()
+        response = get(base + SEARCH_PATH, params={'query': f"벤치 책 {i}", 'display': 10})
+        response.raise_for_status()
+        cover = get(response.json()['items'][0]['image'])
+        cover.raise_for_status()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def latency(args) -> int:
+    server, tmp = start_https_stub(args.latency)
+    base = f"https://127.0.0.1:{server.server_port}"
+    print(f"🧪 가짜 Naver API {base} (응답 지연 {args.latency}s, 책 {args.books}권)")
+
+    try:
+        # 예전 방식: 요청마다 requests.get (매번 TCP+TLS 연결)
+        fresh = measure_book_latency(requests.get, base, args.books)
+        # 공유 세션: 첫 요청 이후에는 keep-alive 연결 재사용
+        with create_session({base + SEARCH_PATH: 1}, default_pool_size=1) as session:
+            pooled = measure_book_latency(session.get, base, args.books)
+    finally:
+        server.shutdown()
+        tmp.cleanup()
+
+    print("\n📊 책당 요청 시간 (검색 1회 + 표지 1장)")
+    for name, timings in (("매번 새 연결", fresh), ("공유 세션", pooled)):
+        print(f"  {name}: 중앙값 {statistics.median(timings):.1f}ms, "
+              f"p90 {sorted(timings)[int(len(timings) * 0.9) - 1]:.1f}ms")
+    print(f"  중앙값 차이: {statistics.median(fresh) - statistics.median(pooled):.1f}ms")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="메타데이터 보완 벤치마크 (로컬 가짜 Naver API)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    throughput_parser = subparsers.add_parser('throughput', help="워커 수/초당 호출 수별 보완 처리 시간")
+    throughput_parser.add_argument('--configs', default='1:5,4:10,8:20',
+                                   help="비교할 '워커:초당 호출' 목록, 쉼표 구분 (기본값: 1:5,4:10,8:20)")
+    throughput_parser.add_argument('--books', type=int, default=40, help="실행마다 보완할 책 수 (기본값: 40)")
+    throughput_parser.add_argument('--latency', type=float, default=0.05, help="응답 지연 초 (기본값: 0.05)")
+    throughput_parser.add_argument('--verbose', action='store_true', help="보완 스크립트 출력 표시")
+    throughput_parser.set_defaults(func=throughput)
+
+    latency_parser = subparsers.add_parser('latency', help="새 연결과 공유 세션의 책당 요청 시간 비교")
+    latency_parser.add_argument('--books', type=int, default=50, help="측정할 책 수 (기본값: 50)")
+    latency_parser.add_argument('--latency', type=float, default=0.02, help="응답 지연 초 (기본값: 0.02)")
+    latency_parser.set_defaults(func=latency)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,18 +6,30 @@ Z-Library에서 가져오지 못한 책 표지와 설명을 Naver Books API를 
 """
 
 import os
-import json
-import requests
 import time
 import re
+import argparse
+import threading
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, List, Tuple
 from io import BytesIO
 from PIL import Image
-from difflib import SequenceMatcher
 from datetime import datetime
 from dotenv import load_dotenv
 
+from rate_limiter import TokenBucket
+from naver_cache import QueryCache, normalize_query
+from http_session import HTTP_MAX_RETRIES, RETRY_STATUS_CODES, create_session, retry_delay
+from image_probe import probe_image, detect_format, FORMAT_EXTENSIONS
+from cover_derivatives import update_derivatives
+from catalog import ensure_catalog, upsert_books
+from work_queue import EnrichmentQueue, QUEUE_PATH, PENDING, DONE, FAILED
+from metadata_store import FsyncBatch, read_metadata, update_metadata
+from title_similarity import TitleMatcher, normalize_title
+from data_dir import DATA_DIR, LEGACY_BOOKS_DIR, move_legacy_file
+
 # 환경변수 로드 (파일이 있으면 로드, 없으면 환경 변수에서 읽음)
 env_path = 'web/.env'
 if os.path.exists(env_path):
@@ -34,24 +46,123 @@ METADATA_DIR = BOOKS_DIR / "metadata"
 COVERS_DIR = BOOKS_DIR / "covers"
 
 # Naver Books API 설정
-NAVER_BOOKS_API = "https://openapi.naver.com/v1/search/book.json"
+NAVER_BOOKS_API = os.getenv('NAVER_BOOKS_API', "https://openapi.naver.com/v1/search/book.json")
+
+# 동시 처리 설정 (Naver 검색 API 초당 호출 한도에 맞춰 조정)
+DEFAULT_WORKERS = int(os.getenv('ENRICH_WORKERS', '4'))
+DEFAULT_QPS = float(os.getenv('NAVER_API_QPS', '5'))
+
+# 검색 결과 캐시 설정 (재시작/재시도 시 같은 검색어로 API 할당량을 쓰지 않도록)
+NAVER_CACHE_PATH = DATA_DIR / "naver_cache.db"
+NAVER_CACHE_TTL = float(os.getenv('NAVER_CACHE_TTL', str(7 * 24 * 3600)))
+NAVER_CACHE_MAX_ENTRIES = int(os.getenv('NAVER_CACHE_MAX_ENTRIES', '50000'))
 
 # 해상도 임계값 (이보다 작으면 스킵)
 MIN_COVER_WIDTH = 200
 
+# 표지 다운로드 용량 제한 및 스트리밍 설정
+MAX_COVER_BYTES = int(os.getenv('MAX_COVER_BYTES', str(5 * 1024 * 1024)))
+COVER_CHUNK_SIZE = 16 * 1024
+COVER_PROBE_BYTES = 256 * 1024  # 해상도 확인을 위해 모아두는 앞부분 최대 크기
+
 # 제목 유사도 임계값 (이보다 낮으면 다른 책으로 판단)
 MIN_TITLE_SIMILARITY = 0.6
 
+# 가장 닮은 후보의 유사도가 이 이상이면 남은 검색 시도 생략
+# (기본값은 MIN_TITLE_SIMILARITY: 예전처럼 통과한 후보가 나온 첫 검색어에서 멈춤)
+SEARCH_ACCEPT_SIMILARITY = float(os.getenv('SEARCH_ACCEPT_SIMILARITY', str(MIN_TITLE_SIMILARITY)))
+
+# 책 하나의 검색 시도를 동시에 요청 (API 호출은 늘지만 책당 대기 시간은 짧아짐, 기본 끔)
+SEARCH_PARALLEL = os.getenv('SEARCH_PARALLEL', '0') == '1'
+
 class MetadataEnricher:
-    def __init__(self):
+    def __init__(self, workers: int = DEFAULT_WORKERS, qps: float = DEFAULT_QPS,
+                 parallel_search: bool = SEARCH_PARALLEL):
         self.updated_count = 0
         self.failed_count = 0
         self.skipped_count = 0
+        self.search_count = 0
+        self.api_call_count = 0
+
+        # 모든 워커가 하나의 API 할당량을 공유
+        self.workers = max(1, workers)
+        self.rate_limiter = TokenBucket(qps)
+        self.stats_lock = threading.Lock()
+
+        # 예전 버전이 books/에 두던 큐/캐시를 크롤러 전용 데이터 디렉토리로 옮김
+        move_legacy_file(LEGACY_BOOKS_DIR / QUEUE_PATH.name, QUEUE_PATH, sqlite=True)
+        move_legacy_file(LEGACY_BOOKS_DIR / NAVER_CACHE_PATH.name, NAVER_CACHE_PATH, sqlite=True)
+
+        # 보완할 책 목록 (다운로더가 push, 여기서 claim)
+        self.queue = EnrichmentQueue(QUEUE_PATH)
+
+        # 실행 중 바뀐 책 (실행이 끝날 때 catalog.json에 한 번에 반영)
+        self.catalog_updates = {}
+
+        # 메타데이터 파일 fsync는 실행이 끝날 때 한 번에
+        self.fsync_batch = FsyncBatch()
+
+        # 병렬 검색 모드: 책마다 검색 시도(최대 4개)를 동시에 요청
+        self.search_executor = ThreadPoolExecutor(max_workers=self.workers * 4) if parallel_search else None
+        api_pool_size = self.workers * 4 if parallel_search else self.workers
+
+        # keep-alive 연결 재사용 (Naver API는 동시 요청 수만큼, 표지 CDN은 호스트별로 풀 유지)
+        # Naver API의 429/5xx 재시도는 속도 제한기를 거치도록 fetch_naver_books에서 직접 처리
+        self.session = create_session({NAVER_BOOKS_API: api_pool_size}, default_pool_size=self.workers,
+                                      host_status_retries=False)
+
+        self.cache = QueryCache(NAVER_CACHE_PATH, ttl_seconds=NAVER_CACHE_TTL,
+                                max_entries=NAVER_CACHE_MAX_ENTRIES)
 
         # API 키 검증
         if not NAVER_CLIENT_ID or not NAVER_CLIENT_SECRET:
             raise ValueError("Naver API 키가 설정되지 않았습니다. web/.env 파일에 NAVER_CLIENT_ID와 NAVER_CLIENT_SECRET를 설정해주세요.")
 
+    def close(self):
+        """병렬 검색 스레드, HTTP 연결, 큐/캐시 연결 정리 (run()은 여러 번 호출할 수 있으므로 따로 호출)"""
+        if self.search_executor is not None:
+            self.search_executor.shutdown(wait=True, cancel_futures=True)
+            self.search_executor = None
+        self.session.close()
+        self.cache.close()
+        self.queue.close()
+
+    def reset_counters(self):
+        """실행별 집계 초기화 (감시자처럼 한 인스턴스로 여러 번 실행할 때, 세션/캐시 연결은 유지)"""
+        with self.stats_lock:
+            self.updated_count = 0
+            self.failed_count = 0
+            self.skipped_count = 0
+            self.search_count = 0
+            self.api_call_count = 0
+            self.catalog_updates = {}
+        self.cache.reset_stats()
+
+    def _count(self, name: str):
+        """처리 결과 카운터 증가 (워커 간 공유)"""
+        with self.stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _save_metadata(self, epub_filename: str, metadata_path: Path, original: Dict, metadata: Dict):
+        """보완 결과 저장 후 카탈로그 갱신 대상으로 기록
+
+        검색하는 동안 다운로더/관리자가 파일을 고쳤을 수 있으므로, 잠금 안에서 파일을 다시 읽고
+        이번에 바꾼 키(original → metadata)만 반영. 그 사이 다른 쪽이 바꾼 키는 그 값을 유지.
+        """
+        changes = {key: value for key, value in metadata.items() if original.get(key) != value}
+        saved = {}
+
+        def merge(current: Dict):
+            for key, value in changes.items():
+                if current.get(key) == original.get(key):
+                    current[key] = value
+            saved.update(current)
+
+        update_metadata(metadata_path, merge, batch=self.fsync_batch)
+
+        with self.stats_lock:
+            self.catalog_updates[epub_filename] = saved
+
     def clean_title(self, title: str) -> str:
         """제목 정제: 괄호, 대괄호 내용 제거"""
         # (개정판) 제거
@@ -87,28 +198,14 @@ class MetadataEnricher:
 
     def clean_title_for_comparison(self, title: str) -> str:
         """비교용 제목 정제: 괄호/대괄호 이전 부분만 추출"""
-        # 괄호 이전까지만 추출
-        match = re.match(r'^([^\(\[]+)', title)
-        if match:
-            cleaned = match.group(1).strip()
-        else:
-            cleaned = title
-
-        # 소문자 변환 및 공백 정규화
-        cleaned = re.sub(r'\s+', ' ', cleaned.lower().strip())
-        return cleaned
+        return normalize_title(title)
 
     def calculate_title_similarity(self, title1: str, title2: str) -> float:
         """두 제목의 유사도 계산 (0.0 ~ 1.0)"""
-        # 괄호 이전 부분만 비교
-        t1 = self.clean_title_for_comparison(title1)
-        t2 = self.clean_title_for_comparison(title2)
+        return TitleMatcher(title1).score(title2)
 
-        # SequenceMatcher를 사용한 유사도 계산
-        return SequenceMatcher(None, t1, t2).ratio()
-
-    def search_naver_books_api_single(self, query: str, original_title: str) -> Optional[Dict]:
-        """Naver Books API로 단일 쿼리 검색 (제목 유사도 검증 포함)"""
+    def fetch_naver_books(self, query: str) -> Optional[Dict]:
+        """Naver Books API 원본 응답 (캐시 우선, 실패 시 None)"""
         try:
             headers = {
                 'X-Naver-Client-Id': NAVER_CLIENT_ID,
@@ -120,150 +217,260 @@ class MetadataEnricher:
                 'display': 10,  # 최대 10개 결과
             }
 
-            response = requests.get(NAVER_BOOKS_API, headers=headers, params=params, timeout=10)
-
-            if response.status_code == 200:
-                data = response.json()
-
-                if 'items' in data and len(data['items']) > 0:
-                    best_match = None
-                    best_score = 0
-
-                    for item in data['items']:
-                        # HTML 태그 제거
-                        clean_title = self.clean_html_tags(item.get('title', ''))
-                        clean_description = self.clean_html_tags(item.get('description', ''))
-                        clean_author = item.get('author', '').replace('^', ', ')
-
-                        # 제목 유사도 검증
-                        similarity = self.calculate_title_similarity(original_title, clean_title)
-
-                        # 유사도가 너무 낮으면 스킵
-                        if similarity < MIN_TITLE_SIMILARITY:
-                            continue
-
-                        # 완전성 점수 계산
-                        completeness_score = 0
-                        if clean_description:
-                            completeness_score += 2
-                        if item.get('image'):
-                            completeness_score += 2
-                        if clean_author:
-                            completeness_score += 1
-                        if item.get('pubdate'):
-                            completeness_score += 1
-
-                        # 종합 점수 = 완전성 + 유사도 보너스
-                        total_score = completeness_score + (similarity * 3)
-
-                        if total_score > best_score:
-                            best_score = total_score
-                            # 결과 정제해서 저장
-                            best_match = {
-                                'title': clean_title,
-                                'author': clean_author,
-                                'publisher': item.get('publisher', ''),
-                                'pubdate': item.get('pubdate', ''),
-                                'description': clean_description,
-                                'image': item.get('image', ''),
-                                'similarity': similarity
-                            }
-
-                    return best_match
+            # 캐시 적중 시 네트워크 요청과 할당량 소비 없이 원본 응답 재사용
+            data = self.cache.get(query, params['display'])
 
-            return None
+            if data is None:
+                # 재시도도 토큰을 받아야 초당 할당량을 넘지 않음
+                for attempt in range(HTTP_MAX_RETRIES + 1):
+                    self.rate_limiter.acquire()
+                    self._count('api_call_count')
+                    response = self.session.get(NAVER_BOOKS_API, headers=headers, params=params)
+
+                    if response.status_code not in RETRY_STATUS_CODES or attempt == HTTP_MAX_RETRIES:
+                        break
+                    time.sleep(retry_delay(response, attempt))
+
+                if response.status_code == 200:
+                    data = response.json()
+                    self.cache.put(query, data, params['display'])
+
+            return data
 
         except Exception as e:
             print(f"  ⚠️  Naver Books API 오류: {e}")
             return None
 
-    def search_naver_books_api(self, title: str, author: str = None) -> Optional[Dict]:
-        """점진적 검색 전략으로 책 정보 검색"""
-        print(f"  🔍 검색 전략 시작...")
+    def score_search_items(self, items, matcher: TitleMatcher) -> Dict[str, Tuple[float, Dict]]:
+        """검색 결과 항목 채점: {항목 키: (종합 점수, 정제된 결과)} (유사도가 낮은 항목 제외)"""
+        # 제목 유사도 검증 (원본 제목은 한 번만 정제, 결과 전체를 한 번에 비교)
+        titles = [self.clean_html_tags(item.get('title', '')) for item in items]
+        similarities = matcher.score_many(titles, cutoff=MIN_TITLE_SIMILARITY)
+
+        scored = {}
+        for item, clean_title, similarity in zip(items, titles, similarities):
+            # 유사도가 너무 낮으면 스킵
+            if similarity < MIN_TITLE_SIMILARITY:
+                continue
+
+            # HTML 태그 제거
+            clean_description = self.clean_html_tags(item.get('description', ''))
+            clean_author = item.get('author', '').replace('^', ', ')
+
+            # 완전성 점수 계산
+            completeness_score = 0
+            if clean_description:
+                completeness_score += 2
+            if item.get('image'):
+                completeness_score += 2
+            if clean_author:
+                completeness_score += 1
+            if item.get('pubdate'):
+                completeness_score += 1
+
+            # 종합 점수 = 완전성 + 유사도 보너스
+            total_score = completeness_score + (similarity * 3)
+
+            # 여러 검색어의 응답에 같은 책이 나오면 하나로 합침
+            key = item.get('isbn') or item.get('link') or f"{clean_title}|{clean_author}"
+            scored[key] = (total_score, {
+                'title': clean_title,
+                'author': clean_author,
+                'publisher': item.get('publisher', ''),
+                'pubdate': item.get('pubdate', ''),
+                'description': clean_description,
+                'image': item.get('image', ''),
+                'similarity': similarity
+            })
+        return scored
+
+    def search_naver_books_api_single(self, query: str, original_title: str,
+                                      matcher: Optional[TitleMatcher] = None) -> Optional[Dict]:
+        """Naver Books API로 단일 쿼리 검색 (제목 유사도 검증 포함)"""
+        data = self.fetch_naver_books(query)
+        if not data or not data.get('items'):
+            return None
+
+        scored = self.score_search_items(data['items'], matcher or TitleMatcher(original_title))
+        if not scored:
+            return None
+        return max(scored.values(), key=lambda entry: entry[0])[1]
+
+    def plan_search_queries(self, title: str, author: str = None) -> List[Tuple[str, str]]:
+        """검색 시도 목록 [(시도 이름, 검색어)] (정규화하면 같은 검색어는 한 번만)
 
+        넓은 검색어(정제된 제목)를 먼저 시도: 결과가 한 페이지에 다 들어오면
+        같은 단어를 모두 포함하는 좁은 검색어(괄호가 붙은 원본 제목)는 그 결과의 일부이므로 생략 가능.
+        """
         # 정제된 제목 준비
         cleaned_title = self.clean_title(title)
 
         # 검색 시도 순서
         search_attempts = []
 
-        # 1차: 원본 제목 + 저자
         if author:
-            query = f"{title} {author}"
-            search_attempts.append(("원본+저자", query))
-
-        # 2차: 정제된 제목 + 저자 (원본과 다를 때만)
-        if author and cleaned_title != title:
-            query = f"{cleaned_title} {author}"
-            search_attempts.append(("정제+저자", query))
+            # 1차: 정제된 제목 + 저자
+            search_attempts.append(("정제+저자", f"{cleaned_title} {author}"))
+            # 2차: 원본 제목 + 저자 (1차 결과가 너무 많을 때 괄호 속 판 정보로 좁힘)
+            search_attempts.append(("원본+저자", f"{title} {author}"))
 
         # 3차: 정제된 제목만
-        if cleaned_title != title:
-            search_attempts.append(("정제", cleaned_title))
+        search_attempts.append(("정제", cleaned_title))
 
         # 4차: 원본 제목만
         search_attempts.append(("원본", title))
 
-        # 순차적으로 시도
+        # 대소문자/공백만 다른 검색어는 같은 응답이므로 생략 (캐시 키와 같은 정규화)
+        planned = []
+        seen_queries = set()
         for attempt_name, query in search_attempts:
-            print(f"  📖 [{attempt_name}] '{query}' 검색 중...")
-            result = self.search_naver_books_api_single(query, title)
+            normalized = normalize_query(query)
+            if not normalized or normalized in seen_queries:
+                continue
+            seen_queries.add(normalized)
+            planned.append((attempt_name, query))
+        return planned
 
-            if result:
-                result_title = result.get('title', '알 수 없음')
-                similarity = result.get('similarity', 0)
-                print(f"  ✅ 발견! '{result_title}' (유사도: {similarity:.2f})")
-                return result
-            else:
-                print(f"  ❌ 결과 없음")
+    def search_naver_books_api(self, title: str, author: str = None) -> Optional[Dict]:
+        """점진적 검색 전략으로 책 정보 검색
+
+        - 받은 응답의 후보는 모두 합쳐서 비교
+        - 가장 닮은 후보(유사도 최고)가 SEARCH_ACCEPT_SIMILARITY 이상이면 남은 시도 생략
+        - 결과 전체를 받은 검색어가 있으면, 그 단어를 모두 포함하는 검색어는 생략
+          (검색어 단어가 많을수록 결과는 그 일부, 이미 모두 채점함)
+        - 반환하는 것은 합친 후보 중 종합 점수(완전성 + 유사도)가 가장 높은 것
+        """
+        print(f"  🔍 검색 전략 시작...")
 
-        return None
+        matcher = TitleMatcher(title)
+        search_attempts = self.plan_search_queries(title, author)
+        self._count('search_count')
+
+        # 병렬 모드: 모든 시도를 미리 요청해 두고 순서대로 결과 확인 (확신하면 나머지 취소)
+        futures = None
+        if self.search_executor is not None and len(search_attempts) > 1:
+            futures = [self.search_executor.submit(self.fetch_naver_books, query)
+                       for _, query in search_attempts]
+
+        candidates = {}
+        best = None
+        exhausted_terms = []  # 결과를 모두 받은 검색어의 단어 집합
+        try:
+            for i, (attempt_name, query) in enumerate(search_attempts):
+                terms = set(normalize_query(query).split())
+                if any(done <= terms for done in exhausted_terms):
+                    print(f"  ⏭️  [{attempt_name}] 앞선 검색 결과에 포함되어 생략")
+                    continue
+
+                print(f"  📖 [{attempt_name}] '{query}' 검색 중...")
+                data = futures[i].result() if futures else self.fetch_naver_books(query)
+                if data is None:
+                    print(f"  ❌ 결과 없음")
+                    continue
+
+                items = data.get('items') or []
+                if data.get('total', len(items) + 1) <= len(items):
+                    exhausted_terms.append(terms)
+
+                scored = self.score_search_items(items, matcher)
+                if not scored:
+                    print(f"  ❌ 결과 없음")
+                    continue
+
+                for key, entry in scored.items():
+                    if key not in candidates or entry[0] > candidates[key][0]:
+                        candidates[key] = entry
+                best = max(candidates.values(), key=lambda entry: entry[0])[1]
+
+                # 멈출지는 완전성과 상관없이 제목이 가장 닮은 후보로 판단
+                closest = max(candidates.values(), key=lambda entry: entry[1]['similarity'])[1]
+                if closest['similarity'] >= SEARCH_ACCEPT_SIMILARITY:
+                    break
+                print(f"  🤔 후보 '{closest['title']}' (유사도: {closest['similarity']:.2f}), 다음 검색어도 확인")
+        finally:
+            if futures:
+                for future in futures:
+                    future.cancel()
+
+        if best:
+            print(f"  ✅ 발견! '{best.get('title', '알 수 없음')}' (유사도: {best['similarity']:.2f})")
+        return best
 
     def download_cover_image(self, image_url: str, filename: str) -> Optional[str]:
-        """표지 이미지 다운로드"""
+        """표지 이미지 스트리밍 다운로드 (임시 파일에 기록 후 원자적 rename)"""
+        tmp_path = None
         try:
             # HTTP를 HTTPS로 변경
             if image_url.startswith('http://'):
                 image_url = image_url.replace('http://', 'https://')
 
-            response = requests.get(image_url, timeout=10)
-
-            if response.status_code == 200 and len(response.content) > 1000:
-                # 이미지 형식 감지 (magic number 확인)
-                if response.content[:8].startswith(b'\x89PNG'):
-                    ext = '.png'
-                elif response.content[:3].startswith(b'\xff\xd8\xff'):
-                    ext = '.jpg'
-                else:
-                    ext = '.jpg'  # 기본값
+            with self.session.get(image_url, stream=True) as response:
+                if response.status_code != 200:
+                    print(f"  ⚠️  유효한 이미지를 찾을 수 없음 (HTTP {response.status_code})")
+                    return None
+
+                # 본문을 받기 전에 Content-Length로 용량 제한 확인
+                content_length = int(response.headers.get('Content-Length') or 0)
+                if content_length > MAX_COVER_BYTES:
+                    print(f"  ⚠️  이미지가 너무 큼: {content_length // 1024}KB")
+                    return None
+
+                fd, tmp_path = tempfile.mkstemp(dir=COVERS_DIR, prefix='.cover-', suffix='.part')
+                header = b''
+                probed = None
+                total = 0
+
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=COVER_CHUNK_SIZE):
+                        total += len(chunk)
+                        if total > MAX_COVER_BYTES:
+                            print(f"  ⚠️  이미지가 너무 큼: {MAX_COVER_BYTES // 1024}KB 초과, 중단")
+                            return None
+                        f.write(chunk)
+
+                        # 헤더에서 형식/해상도를 읽을 때까지만 앞부분을 모아 검사
+                        if probed is None and len(header) < COVER_PROBE_BYTES:
+                            header += chunk
+                            probed = probe_image(header)
+                            if probed and probed[1] < MIN_COVER_WIDTH:
+                                print(f"  ⚠️  해상도가 너무 낮음: {probed[1]}x{probed[2]}, 중단")
+                                return None
+
+            if total <= 1000:
+                print(f"  ⚠️  유효한 이미지를 찾을 수 없음")
+                return None
 
-                cover_filename = f"{filename.replace('.epub', '')}{ext}"
-                cover_path = COVERS_DIR / cover_filename
+            # 이미지 형식 감지 (magic number 확인)
+            image_format = probed[0] if probed else detect_format(header)
+            ext = FORMAT_EXTENSIONS.get(image_format, '.jpg')  # 기본값 .jpg
 
-                with open(cover_path, 'wb') as f:
-                    f.write(response.content)
+            cover_filename = f"{filename.replace('.epub', '')}{ext}"
+            cover_path = COVERS_DIR / cover_filename
+            os.replace(tmp_path, cover_path)
+            tmp_path = None
 
-                size_kb = len(response.content) // 1024
-                print(f"  📐 이미지 크기: {size_kb}KB ({ext[1:].upper()})")
-                return cover_filename
-            else:
-                print(f"  ⚠️  유효한 이미지를 찾을 수 없음")
-                return None
+            size_kb = total // 1024
+            resolution = f", {probed[1]}x{probed[2]}" if probed else ""
+            print(f"  📐 이미지 크기: {size_kb}KB ({ext[1:].upper()}{resolution})")
+            return cover_filename
 
         except Exception as e:
             print(f"  ⚠️  표지 다운로드 오류: {e}")
             return None
 
+        finally:
+            # 중단/실패 시 임시 파일 정리
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
     def enrich_metadata(self, epub_filename: str) -> bool:
         """단일 책의 메타데이터 보완"""
         title = epub_filename.replace('.epub', '')
         metadata_path = METADATA_DIR / f"{title}.json"
 
-        # 기존 메타데이터 읽기
-        metadata = {}
-        if metadata_path.exists():
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
+        # 기존 메타데이터 읽기 (저장할 때 이 시점과 비교해 바꾼 키만 반영)
+        original = read_metadata(metadata_path)
+        metadata = dict(original)
 
         # title이 없으면 파일명을 기본값으로 사용
         if not metadata.get('title'):
@@ -272,7 +479,7 @@ class MetadataEnricher:
         # 이미 시도했으면 스킵
         if metadata.get('enrichment_attempted'):
             print(f"⏭️  {title[:50]}... - 이미 보완 시도함")
-            self.skipped_count += 1
+            self._count('skipped_count')
             return False
 
         # 이미 완전한 메타데이터가 있으면 스킵 (실제 파일 존재 확인)
@@ -287,9 +494,8 @@ class MetadataEnricher:
         if has_cover and has_description:
             print(f"⏭️  {title[:50]}... - 이미 완전한 메타데이터 존재")
             metadata['enrichment_attempted'] = True
-            with open(metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-            self.skipped_count += 1
+            self._save_metadata(epub_filename, metadata_path, original, metadata)
+            self._count('skipped_count')
             return False
 
         print(f"🔍 {title[:50]}...")
@@ -304,10 +510,8 @@ class MetadataEnricher:
             print(f"  ❌ 검색 결과 없음")
             # 실패해도 플래그 저장 (재시도 방지)
             metadata['enrichment_attempted'] = True
-            METADATA_DIR.mkdir(parents=True, exist_ok=True)
-            with open(metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-            self.failed_count += 1
+            self._save_metadata(epub_filename, metadata_path, original, metadata)
+            self._count('failed_count')
             return False
 
         updated = False
@@ -355,25 +559,21 @@ class MetadataEnricher:
         metadata['enrichment_attempted'] = True
 
         if updated:
-            METADATA_DIR.mkdir(parents=True, exist_ok=True)
-
-            with open(metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
+            self._save_metadata(epub_filename, metadata_path, original, metadata)
 
-            self.updated_count += 1
+            self._count('updated_count')
             print(f"  💾 메타데이터 저장 완료")
             return True
         else:
             print(f"  ⚠️  보완할 정보 없음")
             # 업데이트 없어도 플래그는 저장
-            METADATA_DIR.mkdir(parents=True, exist_ok=True)
-            with open(metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-            self.failed_count += 1
+            self._save_metadata(epub_filename, metadata_path, original, metadata)
+            self._count('failed_count')
             return False
 
-    def run(self):
-        """모든 EPUB 파일의 메타데이터 보완"""
+    def run(self) -> Dict[str, int]:
+        """작업 큐에 쌓인 책의 메타데이터 보완 (이번 실행의 처리 결과 반환)"""
+        self.reset_counters()
         start_time = datetime.now()
         print("\n" + "=" * 60)
         print("📚 Dream Library 메타데이터 보완 시작")
@@ -383,58 +583,76 @@ class MetadataEnricher:
         # covers 디렉토리 생성
         COVERS_DIR.mkdir(parents=True, exist_ok=True)
 
-        # Check for download_status.json to get list of newly downloaded files
-        status_path = BOOKS_DIR / "download_status.json"
-        target_titles = None
-
-        if status_path.exists():
-            try:
-                with open(status_path, 'r', encoding='utf-8') as f:
-                    status_data = json.load(f)
-                    if 'downloadedFiles' in status_data:
-                        # Empty list is valid - means 0 new downloads
-                        target_titles = set(status_data['downloadedFiles'])
-                        print(f"📋 Processing {len(target_titles)} newly downloaded files from download_status.json")
-                        print("=" * 60)
-            except Exception as e:
-                print(f"⚠️  Could not read download_status.json: {e}")
-                print("  → Processing all files instead")
-
-        # EPUB 파일 목록 가져오기
-        all_epub_files = list(BOOKS_DIR.glob("*.epub"))
-
-        if not all_epub_files:
-            print("❌ EPUB 파일이 없습니다.")
-            return
-
-        # Filter to only newly downloaded files if we have the list
-        if target_titles is not None:
-            # We have download_status.json with downloadedFiles
-            if len(target_titles) == 0:
-                # Empty list = no NEW downloads this cycle
-                # But we should still process any unenriched files from previous cycles
-                print("📋 No new downloads this cycle - checking for unenriched files from previous cycles")
-                epub_files = all_epub_files
-            else:
-                epub_files = [f for f in all_epub_files if f.stem in target_titles]
-                print(f"🎯 Found {len(epub_files)} matching files out of {len(all_epub_files)} total")
-                if len(epub_files) == 0:
-                    print("⚠️  No matching files found - checking for unenriched files instead")
-                    epub_files = all_epub_files
+        # 이전 실행이 중단되며 남긴 작업 복구
+        recovered = self.queue.recover_stale()
+        if recovered:
+            print(f"♻️  중단된 작업 {recovered}개를 다시 대기열에 넣었습니다")
+
+        # 큐 도입 전에 받은 책 중 아직 보완하지 않은 책을 한 번만 등록
+        if not self.queue.is_backfilled():
+            backlog = [
+                book['filename'] for book in ensure_catalog()['books'].values()
+                if not (book.get('metadata') or {}).get('enrichment_attempted')
+            ]
+            self.queue.backfill(backlog)
+            print(f"📋 기존 라이브러리에서 보완 대상 {len(backlog)}권을 작업 큐에 등록했습니다")
+
+        pending_count = self.queue.counts()[PENDING]
+        print(f"\n총 {pending_count}개의 책을 처리합니다. (워커 {self.workers}개, 초당 {self.rate_limiter.rate:g}회)\n")
+
+        processed = [0]
+
+        def worker():
+            # 다운로더가 넣어 둔 작업만 처리하므로 비용은 라이브러리 크기가 아닌 새 책 수에 비례
+            while True:
+                epub_filename = self.queue.claim(retry_before=start_time.timestamp())
+                if epub_filename is None:
+                    return
+
+                with self.stats_lock:
+                    processed[0] += 1
+                    i = processed[0]
+                print(f"\n[{i}/{pending_count}] ", end="")
+
+                try:
+                    if not (BOOKS_DIR / epub_filename).exists():
+                        print(f"⏭️  {epub_filename[:50]} - EPUB 파일 없음")
+                        self.queue.complete(epub_filename)
+                        continue
+
+                    self.enrich_metadata(epub_filename)
+                    self.queue.complete(epub_filename)
+                except Exception as e:
+                    print(f"  ❌ 처리 오류 ({epub_filename[:50]}): {e}")
+                    self._count('failed_count')
+                    self.queue.fail(epub_filename, str(e))
+
+        # API 호출 속도는 공유 토큰 버킷이 제한하므로 책 사이 고정 대기 없음
+        if self.workers == 1:
+            worker()
         else:
-            # No download_status.json, process all files (fallback)
-            epub_files = all_epub_files
-            print(f"📚 Processing all {len(epub_files)} files (no download list found)")
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for future in [executor.submit(worker) for _ in range(self.workers)]:
+                    future.result()
 
-        print(f"\n총 {len(epub_files)}개의 책을 처리합니다.\n")
+        # 이번 실행에서 쓴 메타데이터 파일을 디스크에 반영
+        try:
+            self.fsync_batch.flush()
+        except Exception as e:
+            print(f"⚠️  메타데이터 fsync 실패: {e}")
 
-        for i, epub_path in enumerate(epub_files, 1):
-            print(f"\n[{i}/{len(epub_files)}] ", end="")
-            self.enrich_metadata(epub_path.name)
+        # 바뀐 책만 카탈로그에 반영
+        try:
+            upsert_books(self.catalog_updates)
+            self.catalog_updates = {}
+        except Exception as e:
+            print(f"⚠️  카탈로그 갱신 실패: {e}")
 
-            # API 호출 제한 고려 (1초 대기)
-            if i < len(epub_files):
-                time.sleep(1)
+        # 새로 저장되거나 바뀐 표지의 썸네일/e-ink 이미지 생성
+        try:
+            update_derivatives()
+        except Exception as e:
+            print(f"⚠️  표지 파생 이미지 생성 실패: {e}")
 
         # 결과 요약
         end_time = datetime.now()
@@ -449,8 +667,34 @@ class MetadataEnricher:
         print(f"✅ 업데이트됨: {self.updated_count}개")
         print(f"⏭️  스킵됨: {self.skipped_count}개")
         print(f"❌ 실패: {self.failed_count}개")
+        cache_stats = self.cache.stats()
+        queue_counts = self.queue.counts()
+        print(f"📋 작업 큐: 대기 {queue_counts[PENDING]}개 / 완료 {queue_counts[DONE]}개 / 포기 {queue_counts[FAILED]}개")
+        if self.search_count:
+            print(f"🔎 검색: {self.search_count}회, API 호출 {self.api_call_count}회 "
+                  f"(책당 평균 {self.api_call_count / self.search_count:.2f}회)")
+        print(f"🗄️  검색 캐시: 적중 {cache_stats['hits']}회 / 미적중 {cache_stats['misses']}회 "
+              f"(적중률 {cache_stats['hit_rate'] * 100:.0f}%)")
         print("=" * 60)
 
+        return {
+            'updated': self.updated_count,
+            'skipped': self.skipped_count,
+            'failed': self.failed_count,
+        }
+
 if __name__ == "__main__":
-    enricher = MetadataEnricher()
-    enricher.run()
+    parser = argparse.ArgumentParser(description="Naver Books API로 책 메타데이터 보완")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"동시에 처리할 책 수 (기본값: {DEFAULT_WORKERS})")
+    parser.add_argument('--qps', type=float, default=DEFAULT_QPS,
+                        help=f"Naver API 초당 최대 호출 수 (기본값: {DEFAULT_QPS:g})")
+    parser.add_argument('--parallel-search', action='store_true', default=SEARCH_PARALLEL,
+                        help="책 하나의 검색 시도를 동시에 요청 (SEARCH_PARALLEL=1과 같음)")
+    args = parser.parse_args()
+
+    enricher = MetadataEnricher(workers=args.workers, qps=args.qps, parallel_search=args.parallel_search)
+    try:
+        enricher.run()
+    finally:
+        enricher.close()
@@ -1,118 +1,232 @@
 #!/usr/bin/env python3
 """
-File watcher for download_status.json
-Triggers metadata enrichment 5 minutes after download limit is detected
+File watcher for the books volume
+Triggers metadata enrichment when the download limit is hit or new books arrive
+
+Enrichment runs in-process on one long-lived MetadataEnricher, so HTTP
+connection pools, the search cache and imported modules stay warm between
+triggers and progress is printed live.
+
+File events are debounced and coalesced: a burst of events becomes one run,
+and events that arrive while a run is in flight queue exactly one follow-up run.
 """
 
 import time
-import subprocess
 import os
 import json
 import threading
+import traceback
+from pathlib import Path
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
-class DownloadStatusHandler(FileSystemEventHandler):
+from enrich_metadata import MetadataEnricher
+from work_queue import PENDING
+
+WATCH_DIR = Path('/app/books')
+METADATA_WATCH_DIR = WATCH_DIR / 'metadata'
+STATUS_FILENAME = 'download_status.json'
+
+# Start a run once events have been quiet this long...
+DEBOUNCE_SECONDS = float(os.getenv('ENRICH_DEBOUNCE_SECONDS', '5'))
+# ...but never later than this after the first event of a burst
+MAX_DEBOUNCE_SECONDS = float(os.getenv('ENRICH_MAX_DEBOUNCE_SECONDS', '30'))
+
+class EnrichmentTrigger:
+    """Coalesces run requests into debounced enrichment runs on one thread"""
+
+    def __init__(self, run_callback, debounce=DEBOUNCE_SECONDS, max_delay=MAX_DEBOUNCE_SECONDS):
+        self.run_callback = run_callback
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.condition = threading.Condition()
+        self.pending = False
+        self.forced = False
+        self.reasons = set()
+        self.first_request = 0.0
+        self.last_request = 0.0
+        self.stopped = False
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.thread.join()
+
+    def request(self, reason, force=False):
+        """Ask for a run. Repeated requests before the run starts collapse into one."""
+        with self.condition:
+            now = time.monotonic()
+            if not self.pending:
+                self.first_request = now
+            self.pending = True
+            self.forced = self.forced or force
+            self.reasons.add(reason)
+            self.last_request = now
+            self.condition.notify()
+
+    def _next_batch(self):
+        """Block until a debounced request is due; returns (reasons, forced) or None when stopped"""
+        with self.condition:
+            while not self.pending and not self.stopped:
+                self.condition.wait()
+
+            while not self.stopped:
+                due = min(self.last_request + self.debounce, self.first_request + self.max_delay)
+                now = time.monotonic()
+                if now >= due:
+                    break
+                self.condition.wait(due - now)
+
+            if self.stopped:
+                return None
+
+            batch = (sorted(self.reasons), self.forced)
+            self.pending = False
+            self.forced = False
+            self.reasons = set()
+            return batch
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self.run_callback(*batch)
+            except Exception as e:
+                print(f"❌ Enrichment trigger failed: {e}")
+                traceback.print_exc()
+
+class EnrichmentRunner:
+    """Runs enrichment on a MetadataEnricher created on first use and reused across runs"""
+
     def __init__(self):
-        self.lock = threading.Lock()
-        self.last_processed_timestamp = None  # Track last processed timestamp
+        self.enricher = None
+
+    def get_enricher(self):
+        if self.enricher is None:
+            self.enricher = MetadataEnricher()
+        return self.enricher
+
+    def close(self):
+        if self.enricher is not None:
+            self.enricher.close()
+            self.enricher = None
+
+    def __call__(self, reasons, forced):
+        started = time.perf_counter()
+        try:
+            enricher = self.get_enricher()
+        except Exception as e:
+            print(f"❌ Could not start enricher: {e}")
+            return
+
+        # File events also fire for the enricher's own writes; only run when there is work
+        pending = enricher.queue.counts()[PENDING]
+        if not forced and pending == 0:
+            return
+
+        print("\n" + "="*70)
+        print(f"🎨 Starting Metadata Enrichment ({', '.join(reasons)}; {pending} queued)")
+        print("="*70)
+        print(f"⚡ Enricher ready in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        # Run enricher in-process (output streams as it happens)
+        try:
+            result = enricher.run()
+            print(f"✅ Metadata enrichment completed successfully "
+                  f"({result['updated']} updated, {result['skipped']} skipped, {result['failed']} failed)")
+        except Exception as e:
+            print(f"❌ Metadata enrichment failed: {e}")
+            traceback.print_exc()
+
+        print("="*70)
+
+class LibraryEventHandler(FileSystemEventHandler):
+    """Turns file events on the books volume into enrichment requests"""
+
+    def __init__(self, trigger):
+        self.trigger = trigger
+        self.last_processed_timestamp = None  # Track last processed waitUntil
 
     def on_created(self, event):
-        # Trigger on download_status.json creation
-        if event.src_path.endswith('download_status.json'):
-            self.trigger_enrichment()
+        self.handle(event.src_path, event.is_directory)
 
     def on_modified(self, event):
-        # Trigger on download_status.json modification
         # os.replace() on existing file generates MODIFY event (not CREATE)
-        # This ensures we catch file updates even when file already exists
-        if event.src_path.endswith('download_status.json'):
-            self.trigger_enrichment()
-
-    def trigger_enrichment(self):
-        # Try to acquire lock (non-blocking)
-        if not self.lock.acquire(blocking=False):
-            print("⏭️  Already processing, skipping duplicate trigger")
+        self.handle(event.src_path, event.is_directory)
+
+    def on_moved(self, event):
+        # Atomic writes (temp file + rename) arrive as moves onto the final name
+        self.handle(event.dest_path, event.is_directory)
+
+    def handle(self, src_path, is_directory):
+        if is_directory:
             return
 
-        try:
-            # Check if this is a duplicate trigger (same timestamp)
-            # Atomic rename guarantees complete file, no race condition
-            status_file = '/app/books/download_status.json'
+        path = Path(src_path)
+        if path.name == STATUS_FILENAME:
+            self.handle_status(path)
+        elif path.suffix == '.epub' and path.parent == WATCH_DIR:
+            self.trigger.request('new EPUB')
+        elif path.suffix == '.json' and path.parent == METADATA_WATCH_DIR:
+            self.trigger.request('metadata change')
 
-            try:
-                with open(status_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    current_timestamp = data.get('waitUntil')
+    def handle_status(self, status_path):
+        # Atomic rename guarantees complete file, no race condition
+        try:
+            with open(status_path, 'r', encoding='utf-8') as f:
+                current_timestamp = json.load(f).get('waitUntil')
+        except FileNotFoundError:
+            return  # Cleared after the wait
+        except Exception as e:
+            print(f"⚠️  Could not read status file: {e}")
+            return
 
-                    if current_timestamp == self.last_processed_timestamp:
-                        print(f"⏭️  Already processed timestamp {current_timestamp}, ignoring")
-                        return
+        # Check if this is a duplicate trigger (same timestamp)
+        if current_timestamp == self.last_processed_timestamp:
+            return
+        self.last_processed_timestamp = current_timestamp
 
-                    # Update last processed timestamp
-                    self.last_processed_timestamp = current_timestamp
-            except Exception as e:
-                print(f"⚠️  Could not read status file: {e}")
-                return  # Skip this trigger
-
-            print("\n" + "="*70)
-            print("⏳ Download limit detected!")
-            print("="*70)
-            print("Waiting 10 seconds before running metadata enrichment...")
-
-            # Wait 10 seconds
-            wait_seconds = 10
-            for remaining in range(wait_seconds, 0, -2):
-                print(f"  ⏰ {remaining} seconds remaining...")
-                time.sleep(2)
-
-            print("\n" + "="*70)
-            print("🎨 Starting Metadata Enrichment")
-            print("="*70)
-
-            # Run enricher
-            result = subprocess.run(
-                ['python', '/app/enrich_metadata.py'],
-                capture_output=True,
-                text=True
-            )
-
-            print(result.stdout)
-            if result.stderr:
-                print("⚠️  Errors:", result.stderr)
-
-            if result.returncode == 0:
-                print("✅ Metadata enrichment completed successfully")
-            else:
-                print(f"❌ Metadata enrichment failed with code {result.returncode}")
-
-            print("="*70)
-
-        finally:
-            # Always release lock, even on exception or early return
-            self.lock.release()
+        print(f"⏳ Download limit detected (wait until {current_timestamp})")
+        self.trigger.request('download limit', force=True)
 
 def main():
-    watch_dir = '/app/books'
+    watch_dir = str(WATCH_DIR)
 
     if not os.path.exists(watch_dir):
         print(f"❌ Watch directory does not exist: {watch_dir}")
         return
 
+    METADATA_WATCH_DIR.mkdir(parents=True, exist_ok=True)
+
     print("="*70)
     print("Dream Library - Metadata Enrichment Watcher")
     print("="*70)
-    print(f"👀 Watching: {watch_dir}")
-    print("📝 Trigger: download_status.json creation/modification")
-    print("⏳ Delay: 10 seconds")
-    print("🎨 Action: Run enrich_metadata.py")
+    print(f"👀 Watching: {watch_dir}, {METADATA_WATCH_DIR}")
+    print(f"📝 Trigger: {STATUS_FILENAME}, new EPUBs, metadata changes")
+    print(f"⏳ Debounce: {DEBOUNCE_SECONDS:g}s quiet (max {MAX_DEBOUNCE_SECONDS:g}s)")
+    print("🎨 Action: Run MetadataEnricher (in-process)")
     print("="*70 + "\n")
 
-    event_handler = DownloadStatusHandler()
+    runner = EnrichmentRunner()
+    trigger = EnrichmentTrigger(runner)
+    trigger.start()
+
+    event_handler = LibraryEventHandler(trigger)
     observer = Observer()
     observer.schedule(event_handler, watch_dir, recursive=False)
+    observer.schedule(event_handler, str(METADATA_WATCH_DIR), recursive=False)
     observer.start()
 
+    # Pick up anything queued while the watcher was down
+    trigger.request('startup')
+
     print("✅ Watcher started. Press Ctrl+C to stop.\n")
 
     try:
@@ -123,6 +237,8 @@ def main():
         observer.stop()
 
     observer.join()
+    trigger.stop()
+    runner.close()
     print("👋 Watcher stopped")
 
 if __name__ == "__main__":
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+공유 HTTP 세션
+
+keep-alive 연결 풀을 재사용하는 requests.Session을 만듭니다.
+호스트별 풀 크기, 429/5xx 재시도(지수 백오프), 기본 타임아웃을 한 곳에서 설정합니다.
+
+속도 제한기(TokenBucket)를 거쳐 호출하는 호스트(Naver API)는 urllib3 안에서 상태 코드 재시도를 하지
+않도록 하고(host_status_retries=False), 호출 측이 재시도마다 토큰을 받아 retry_delay만큼 기다립니다.
+urllib3 재시도는 제한기를 거치지 않아 초당 할당량을 넘길 수 있기 때문입니다.
+
+Retry-After는 HTTP_MAX_RETRY_AFTER초까지만 따름 (큰 값이나 악의적인 값으로 워커가 멈춰 있지 않도록).
+"""
+
+import os
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (연결, 읽기) 타임아웃 초
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '10'))
+DEFAULT_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+# 재시도 설정
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '3'))
+HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', '0.5'))
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+HTTP_MAX_RETRY_AFTER = float(os.getenv('HTTP_MAX_RETRY_AFTER', '60'))
+
+
+class CappedRetry(Retry):
+    """Retry-After 대기 시간을 HTTP_MAX_RETRY_AFTER초로 제한하는 재시도 설정"""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, HTTP_MAX_RETRY_AFTER)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """요청에 timeout이 없으면 기본 타임아웃을 적용하는 어댑터"""
+
+    def __init__(self, *args, timeout=DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def origin_of(url: str) -> str:
+    """URL에서 어댑터 마운트용 'scheme://host/' 접두어 추출"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/"
+
+
+def build_retry(max_retries: int = HTTP_MAX_RETRIES, backoff_factor: float = HTTP_BACKOFF_FACTOR,
+                status_retries: bool = True) -> Retry:
+    """재시도 설정 (status_retries=False면 연결 실패만 재시도, 요청이 서버에 닿은 경우는 호출 측에 맡김)"""
+    if not status_retries:
+        return CappedRetry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=0,
+            backoff_factor=backoff_factor,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False,
+        )
+    return CappedRetry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def retry_delay(response: requests.Response, attempt: int,
+                backoff_factor: float = HTTP_BACKOFF_FACTOR) -> float:
+    """재시도 전 대기 시간 (Retry-After 헤더 우선, 없으면 지수 백오프, attempt는 0부터)
+
+    Retry-After는 최대 HTTP_MAX_RETRY_AFTER초.
+    """
+    retry_after = response.headers.get('Retry-After')
+    if retry_after:
+        retry_after = retry_after.strip()
+        if retry_after.isdigit():
+            return min(float(retry_after), HTTP_MAX_RETRY_AFTER)
+        try:
+            delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            return min(max(0.0, delay), HTTP_MAX_RETRY_AFTER)
+        except (TypeError, ValueError):
+            pass
+    return backoff_factor * (2 ** attempt)
+
+
+def create_session(host_pool_sizes: Optional[Dict[str, int]] = None,
+                   default_pool_size: int = 10,
+                   timeout=DEFAULT_TIMEOUT,
+                   host_status_retries: bool = True) -> requests.Session:
+    """연결 풀이 설정된 세션 생성
+
+    host_pool_sizes: {URL 또는 origin: 최대 연결 수} - 해당 호스트 전용 풀
+    default_pool_size: 그 밖의 호스트(표지 CDN 등)에 쓰는 호스트당 최대 연결 수
+    host_status_retries: False면 host_pool_sizes 호스트의 429/5xx 응답을 재시도하지 않고 그대로 반환
+    """
+    session = requests.Session()
+    retry = build_retry()
+    host_retry = build_retry(status_retries=host_status_retries)
+
+    default_adapter = TimeoutHTTPAdapter(
+        timeout=timeout,
+        pool_connections=10,
+        pool_maxsize=default_pool_size,
+        max_retries=retry,
+    )
+    session.mount('https://', default_adapter)
+    session.mount('http://', default_adapter)
+
+    # 더 긴 접두어가 우선 매칭되므로 호스트별 어댑터가 기본 어댑터보다 먼저 사용됨
+    for url, pool_size in (host_pool_sizes or {}).items():
+        session.mount(origin_of(url), TimeoutHTTPAdapter(
+            timeout=timeout,
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=host_retry,
+        ))
+
+    return session
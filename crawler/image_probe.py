@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+이미지 헤더 분석
+
+파일 앞부분 바이트만으로 이미지 형식과 크기(가로, 세로)를 읽습니다.
+PIL로 전체를 디코딩하지 않으므로 다운로드 도중에도 검증할 수 있습니다.
+"""
+
+import struct
+from typing import Optional, Tuple
+
+# 형식별 저장 확장자
+FORMAT_EXTENSIONS = {
+    'jpeg': '.jpg',
+    'png': '.png',
+    'gif': '.gif',
+    'webp': '.webp',
+}
+
+# JPEG SOF 마커 (DHT/JPG/DAC 제외)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def detect_format(header: bytes) -> Optional[str]:
+    """magic number로 이미지 형식 감지"""
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if header[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def _jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """JPEG 세그먼트를 따라가며 SOF에서 크기 추출 (데이터가 부족하면 None)"""
+    pos = 2
+    length = len(data)
+
+    while pos + 4 <= length:
+        if data[pos] != 0xFF:
+            return None  # 손상된 스트림
+        marker = data[pos + 1]
+
+        # 채움 바이트
+        if marker == 0xFF:
+            pos += 1
+            continue
+
+        # 길이 필드가 없는 마커
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+            pos += 2
+            continue
+
+        segment_length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+
+        if marker in _JPEG_SOF_MARKERS:
+            if pos + 9 > length:
+                return None
+            height, width = struct.unpack('>HH', data[pos + 5:pos + 9])
+            return width, height
+
+        pos += 2 + segment_length
+
+    return None
+
+
+def _webp_size(data: bytes) -> Optional[Tuple[int, int]]:
+    chunk = data[12:16]
+    if chunk == b'VP8 ' and len(data) >= 30:
+        width, height = struct.unpack('<HH', data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and len(data) >= 25:
+        bits = int.from_bytes(data[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X' and len(data) >= 30:
+        width = int.from_bytes(data[24:27], 'little') + 1
+        height = int.from_bytes(data[27:30], 'little') + 1
+        return width, height
+    return None
+
+
+def probe_image(header: bytes) -> Optional[Tuple[str, int, int]]:
+    """헤더 바이트에서 (형식, 가로, 세로) 추출
+
+    형식을 알 수 없거나 크기를 읽기에 데이터가 아직 부족하면 None 반환
+    """
+    image_format = detect_format(header)
+
+    if image_format == 'png':
+        if len(header) < 24:
+            return None
+        width, height = struct.unpack('>II', header[16:24])
+        return image_format, width, height
+
+    if image_format == 'gif':
+        if len(header) < 10:
+            return None
+        width, height = struct.unpack('<HH', header[6:10])
+        return image_format, width, height
+
+    if image_format == 'jpeg':
+        size = _jpeg_size(header)
+    elif image_format == 'webp':
+        size = _webp_size(header)
+    else:
+        return None
+
+    if size is None:
+        return None
+    return image_format, size[0], size[1]
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+제목 필터
+
+제외 키워드 목록을 Aho-Corasick 오토마톤으로 한 번 컴파일해 두고,
+제목은 글자 수만큼만 훑어 검사합니다 (키워드가 수천 개여도 제목당 비용은 같음).
+
+- 키워드 파일: 한 줄에 하나, 빈 줄과 '#' 주석은 무시, 대소문자 구분 없음
+- 파일 경로는 EXCLUDE_KEYWORDS_FILE 환경변수 (기본 books/excluded_keywords.txt),
+  파일이 없으면 내장 목록 사용
+- 파일 수정 시각이 바뀌면 다음 검사 때 자동으로 다시 읽음 (재시작 불필요)
+
+직접 실행하면 기존 부분 문자열 반복 방식과 속도를 비교합니다.
+"""
+
+import os
+import re
+import sys
+import time
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+# 키워드 파일이 없을 때 사용하는 기본 제외 키워드
+DEFAULT_KEYWORDS = ['주식', '금융', '투자', '재테크', '경제학', '증권', '자본가', '자본',
+                    'sex', '섹스']
+
+KEYWORDS_PATH = Path(os.getenv('EXCLUDE_KEYWORDS_FILE', str(Path("books") / "excluded_keywords.txt")))
+
+# 파일 변경 확인 간격 (초) - 제목마다 stat을 부르지 않도록
+RELOAD_CHECK_INTERVAL = 5.0
+
+HANGUL_RE = re.compile('[가-힣]')
+
+
+def has_korean(text: str) -> bool:
+    """한글 음절이 하나라도 있는지"""
+    return HANGUL_RE.search(text) is not None
+
+
+class AhoCorasick:
+    """여러 키워드를 동시에 찾는 오토마톤 (대소문자 구분 없음)"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output: List[Optional[str]] = [None]
+
+        for keyword in keywords:
+            keyword = keyword.strip().lower()
+            if not keyword:
+                continue
+            node = 0
+            for ch in keyword:
+                next_node = self.goto[node].get(ch)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][ch] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(None)
+                node = next_node
+            if self.output[node] is None:
+                self.output[node] = keyword
+
+        # BFS로 실패 링크 연결, 실패 링크 쪽에서 끝나는 키워드도 출력에 합침
+        pending = deque(self.goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for ch, child in self.goto[node].items():
+                pending.append(child)
+                fallback = self.fail[node]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(ch, 0)
+                if self.output[child] is None:
+                    self.output[child] = self.output[self.fail[child]]
+
+    def find_first(self, text: str) -> Optional[str]:
+        """text에 포함된 키워드 하나 반환 (없으면 None)"""
+        goto, fail, output = self.goto, self.fail, self.output
+        node = 0
+        for ch in text.lower():
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if output[node] is not None:
+                return output[node]
+        return None
+
+
+def load_keywords(path: Path) -> List[str]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+class KeywordFilter:
+    """키워드 파일 기반 제외 필터 (파일이 바뀌면 자동으로 다시 컴파일)"""
+
+    def __init__(self, path: Optional[Path] = KEYWORDS_PATH, default_keywords: Iterable[str] = DEFAULT_KEYWORDS,
+                 reload_interval: float = RELOAD_CHECK_INTERVAL):
+        self.path = Path(path) if path else None
+        self.default_keywords = list(default_keywords)
+        self.reload_interval = reload_interval
+        self.lock = threading.Lock()
+        self.loaded_mtime = None
+        self.next_check = 0.0
+        self.keyword_count = 0
+        self.matcher = None
+        self.reload()
+
+    def reload(self):
+        """키워드 파일을 다시 읽어 컴파일 (파일이 없거나 읽을 수 없으면 기본 목록)"""
+        mtime = self._file_mtime()
+        keywords = self.default_keywords
+        if mtime is not None:
+            try:
+                keywords = load_keywords(self.path)
+            except Exception as e:
+                print(f"⚠️  키워드 파일을 읽을 수 없음 ({self.path}): {e}")
+
+        matcher = AhoCorasick(keywords)
+        with self.lock:
+            self.matcher = matcher
+            self.keyword_count = len(keywords)
+            self.loaded_mtime = mtime
+            self.next_check = time.monotonic() + self.reload_interval
+
+    def _file_mtime(self) -> Optional[float]:
+        if self.path is None:
+            return None
+        try:
+            return self.path.stat().st_mtime
+        except OSError:
+            return None
+
+    def _maybe_reload(self):
+        if time.monotonic() < self.next_check:
+            return
+        mtime = self._file_mtime()
+        if mtime != self.loaded_mtime:
+            self.reload()
+            print(f"🔄 제외 키워드 다시 읽음: {self.keyword_count}개")
+        else:
+            self.next_check = time.monotonic() + self.reload_interval
+
+    def match(self, title: str) -> Optional[str]:
+        """제목에 포함된 제외 키워드 (없으면 None)"""
+        self._maybe_reload()
+        return self.matcher.find_first(title)
+
+    def should_exclude(self, title: str) -> bool:
+        return self.match(title) is not None
+
+
+def _benchmark():
+    """기존 방식(키워드마다 부분 문자열 검색) vs 오토마톤, 키워드 수별 제목당 시간"""
+    import random
+
+    random.seed(0)
+    syllables = [chr(c) for c in range(0xac00, 0xd7a4, 37)]
+
+    def word(n):
+        return ''.join(random.choice(syllables) for _ in range(n))
+
+    titles = [' '.join(word(random.randint(2, 5)) for _ in range(random.randint(2, 6))) for _ in range(2000)]
+
+    def loop_exclude(keywords, title):
+        title_lower = title.lower()
+        for keyword in keywords:
+            if keyword.lower() in title_lower:
+                return True
+        return False
+
+    print(f"{'keywords':>9} {'loop µs/title':>14} {'automaton µs/title':>19}")
+    for count in (10, 100, 1000, 5000):
+        keywords = DEFAULT_KEYWORDS + [word(random.randint(3, 6)) for _ in range(count - len(DEFAULT_KEYWORDS))]
+        matcher = AhoCorasick(keywords)
+
+        start = time.perf_counter()
+        loop_hits = sum(loop_exclude(keywords, t) for t in titles)
+        loop_us = (time.perf_counter() - start) / len(titles) * 1e6
+
+        start = time.perf_counter()
+        ac_hits = sum(matcher.find_first(t) is not None for t in titles)
+        ac_us = (time.perf_counter() - start) / len(titles) * 1e6
+
+        assert loop_hits == ac_hits
+        print(f"{count:>9} {loop_us:>14.1f} {ac_us:>19.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--bench':
+        _benchmark()
+    else:
+        keyword_filter = KeywordFilter()
+        print(f"키워드 {keyword_filter.keyword_count}개 ({keyword_filter.path if keyword_filter.loaded_mtime else '기본 목록'})")
+        for title in sys.argv[1:]:
+            print(f"{title}: {keyword_filter.match(title) or '-'} (한글: {has_korean(title)})")
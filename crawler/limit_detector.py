@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+다운로드 제한 감지
+
+일일 다운로드 제한 안내문을 찾아 남은 대기 시간을 계산합니다.
+
+- 페이지에서는 page.evaluate 한 번으로 URL과 제한 안내문 영역의 텍스트만 가져옴
+  (전체 HTML을 받아 정규식을 여러 번 돌리지 않음)
+- 대기 시간은 미리 컴파일한 정규식 하나로 안내문을 한 번만 훑어 계산
+- 안내문 밖의 "분"/"minute" 문구(본문, 광고 등)는 읽지 않음
+
+parse_wait_seconds / find_limit_notice는 순수 함수라 저장해 둔 HTML로 확인할 수 있습니다:
+    python limit_detector.py saved_limit_page.html
+"""
+
+import re
+import sys
+from html.parser import HTMLParser
+from typing import List, Optional
+
+# 제한 안내문 문구 (영문 + 한국어)
+LIMIT_TEXT_RE = re.compile(r'daily.*limit.*reached|1일.*제한.*최대|제한.*도달', re.IGNORECASE)
+
+# 시간/분 단위 토큰 하나: "11h", "11 hours", "11시간", "23m", "23 minutes", "23분"
+# 조사가 붙은 "23분이", "23분만", "23분에", "23분 뒤"도 분으로 읽음
+# 단위 뒤에 다른 글자가 붙은 경우("5 mb")와 "분"으로 시작하는 다른 낱말("3분야", "2분석", "5분량", "4분류")은 제외
+DURATION_TOKEN_RE = re.compile(
+    r'(\d+)\s*(?:'
+    r'(?P<hours>hours?(?![a-z])|hrs?(?![a-z])|h(?![a-z])|시간)'
+    r'|(?P<minutes>minutes?(?![a-z])|mins?(?![a-z])|m(?![a-z])|분(?!야|석|량|류))'
+    r')',
+    re.IGNORECASE
+)
+
+# 같은 기간으로 이어 읽을 토큰 사이 문자열 ("11h 23m", "11 hours and 23 minutes", "11시간 23분")
+DURATION_JOINER_RE = re.compile(r'[\s,]*(?:and\s+|및\s+)?', re.IGNORECASE)
+
+# 안내문 영역의 최대 길이 (이보다 큰 조상은 본문 전체일 가능성이 높음)
+MAX_NOTICE_CHARS = 1500
+
+# 제한 안내문이 든 가장 안쪽 요소를 찾아, 그 요소를 감싼 블록 중 MAX_NOTICE_CHARS 이하인 가장 바깥 블록의 텍스트만 반환
+# 문구가 텍스트 노드 하나에 있으면 그 노드, 인라인 요소로 나뉘어 있으면("Daily <b>limit</b> reached")
+# innerText가 문구와 맞는 가장 안쪽 요소
+READ_LIMIT_NOTICE_JS = """
+([pattern, maxChars]) => {
+    const re = new RegExp(pattern, 'i');
+    const root = document.body || document.documentElement;
+    let start = null;
+    const walker = document.createTreeWalker(root, NodeFilter.SHOW_TEXT);
+    for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+        if (re.test(node.nodeValue)) {
+            start = node.parentElement;
+            break;
+        }
+    }
+    if (!start && re.test(root.innerText || '')) {
+        start = root;
+        for (let descended = true; descended;) {
+            descended = false;
+            for (const child of start.children) {
+                if (re.test(child.innerText || '')) {
+                    start = child;
+                    descended = true;
+                    break;
+                }
+            }
+        }
+    }
+
+    let notice = null;
+    if (start) {
+        let el = start;
+        while (el.parentElement && el.parentElement !== document.body &&
+               (el.parentElement.innerText || '').length <= maxChars) {
+            el = el.parentElement;
+        }
+        const titles = Array.from(el.querySelectorAll('[title], [data-original-title]'))
+            .map((t) => t.getAttribute('title') || t.getAttribute('data-original-title'));
+        notice = [(el.innerText || '').slice(0, maxChars), ...titles].join('\\n');
+    }
+    // 제한 전용 페이지인데 문구가 바뀐 경우: 본문 전체가 안내문
+    if (!notice && /dailylimit/i.test(location.href)) {
+        notice = (document.body ? document.body.innerText : '').slice(0, maxChars);
+    }
+    return {url: location.href, notice};
+}
+"""
+
+
+def parse_wait_seconds(notice_text: Optional[str]) -> int:
+    """안내문에서 첫 번째 기간을 읽어 초로 반환 (없으면 0)
+
+    "11h 23m", "11 hours 23 minutes", "11시간 23분", "5 hours", "23분" 등.
+    조사가 붙은 문구도 같음: "11시간 23분이 남았습니다", "23분이 지나면", "23분만", "23분에", "23분 뒤".
+    """
+    if not notice_text:
+        return 0
+
+    total_seconds = 0
+    end = None
+    last_was_hours = False
+    for match in DURATION_TOKEN_RE.finditer(notice_text):
+        is_hours = match.group('hours') is not None
+        if end is not None:
+            # 첫 기간 뒤에 떨어져 있는 토큰은 다른 문장, "시간" 다음에만 "분"이 이어짐
+            # (툴팁 "11h 23m" 바로 뒤의 "11 hours 23 minutes"를 더하지 않도록)
+            if is_hours or not last_was_hours or \
+                    not DURATION_JOINER_RE.fullmatch(notice_text, end, match.start()):
+                break
+        value = int(match.group(1))
+        total_seconds += value * 3600 if is_hours else value * 60
+        last_was_hours = is_hours
+        end = match.end()
+
+    return total_seconds
+
+
+def is_limit_page(url: str, notice_text: Optional[str]) -> bool:
+    return 'dailylimit' in (url or '').lower() or bool(notice_text)
+
+
+class _TextCollector(HTMLParser):
+    """HTML에서 블록 단위 텍스트 조각 수집 (script/style 제외)"""
+
+    BLOCK_TAGS = {'p', 'div', 'section', 'article', 'li', 'h1', 'h2', 'h3', 'h4', 'span', 'td', 'br'}
+
+    def __init__(self):
+        super().__init__()
+        self.chunks: List[str] = []
+        self.current: List[str] = []
+        self.skip_depth = 0
+
+    def _flush(self):
+        text = ' '.join(''.join(self.current).split())
+        if text:
+            self.chunks.append(text)
+        self.current = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style'):
+            self.skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self._flush()
+        for name, value in attrs:
+            if name in ('title', 'data-original-title') and value:
+                self._flush()
+                self.chunks.append(value)
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style'):
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in self.BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.current.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def find_limit_notice(html: str) -> Optional[str]:
+    """HTML에서 제한 안내문과 그 뒤 몇 조각의 텍스트 반환 (저장한 페이지 확인용, 페이지에서는 READ_LIMIT_NOTICE_JS 사용)"""
+    collector = _TextCollector()
+    collector.feed(html)
+    collector.close()
+
+    # 문구가 인라인 블록(span 등)으로 나뉜 경우 이어지는 조각 몇 개를 붙여서도 확인
+    for i in range(len(collector.chunks)):
+        if any(LIMIT_TEXT_RE.search(' '.join(collector.chunks[i:i + size])) for size in (1, 2, 3)):
+            notice = []
+            for text in collector.chunks[i:]:
+                if sum(len(t) for t in notice) + len(text) > MAX_NOTICE_CHARS:
+                    break
+                notice.append(text)
+            return '\n'.join(notice)
+    return None
+
+
+def check_download_limit(page) -> Optional[int]:
+    """제한 페이지면 대기 시간(초, 읽지 못하면 0), 아니면 None"""
+    result = page.evaluate(READ_LIMIT_NOTICE_JS, [LIMIT_TEXT_RE.pattern, MAX_NOTICE_CHARS])
+    if not is_limit_page(result['url'], result['notice']):
+        return None
+    return parse_wait_seconds(result['notice'])
+
+
+def format_wait(seconds: int) -> str:
+    hours, minutes = divmod(seconds // 60, 60)
+    return f"{hours}h {minutes}m = {seconds}s"
+
+
+if __name__ == "__main__":
+    for html_path in sys.argv[1:]:
+        with open(html_path, 'r', encoding='utf-8') as f:
+            notice = find_limit_notice(f.read())
+        if notice is None:
+            print(f"{html_path}: 제한 안내문 없음")
+        else:
+            print(f"{html_path}: {format_wait(parse_wait_seconds(notice))}\n  {notice[:200]!r}")
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+메타데이터 JSON 저장소
+
+books/metadata/*.json 을 읽고 쓰는 공용 모듈입니다.
+다운로더, 보완 스크립트, 마이그레이션 스크립트가 모두 이 모듈로 씁니다.
+
+- 원자적 쓰기: 같은 디렉토리의 임시 파일에 쓴 뒤 os.replace
+  (웹 목록 API 등 동시에 읽는 쪽은 항상 완전한 파일을 봄)
+- 파일별 advisory lock (flock): 같은 파일의 읽기-수정-쓰기를 프로세스/스레드 간 직렬화
+  잠금 파일은 파일명 해시로 고정 개수만 사용 (책마다 잠금 파일을 만들지 않음)
+- 내용이 같으면 쓰지 않음 (mtime/디스크 쓰기 절약)
+- fsync 선택: 파일마다 즉시(fsync=True) 또는 FsyncBatch로 모았다가 한 번에
+"""
+
+import os
+import json
+import fcntl
+import threading
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+# 경로 설정
+METADATA_DIR = Path("books") / "metadata"
+
+# 잠금 파일 개수 (파일명 해시로 분산)
+LOCK_STRIPES = 64
+
+
+def metadata_path_for(epub_filename: str, metadata_dir: Path = METADATA_DIR) -> Path:
+    """EPUB 파일명에 대응하는 메타데이터 JSON 경로"""
+    return Path(metadata_dir) / f"{epub_filename.replace('.epub', '')}.json"
+
+
+def encode_metadata(metadata: Dict) -> bytes:
+    """저장 형식 (기존 파일과 같은 indent=2, 한글 그대로)"""
+    return json.dumps(metadata, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _fsync_dir(directory: Path):
+    fd = os.open(str(directory), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# 잠금 파일은 프로세스마다 한 번만 열어 둠 {(잠금 디렉토리, 번호): (파일, 스레드 잠금)}
+# flock은 같은 파일 객체를 쓰는 스레드끼리는 배타적이지 않으므로 스레드 잠금을 함께 잡음
+_lock_files = {}
+_lock_files_pid = None
+_lock_files_guard = threading.Lock()
+
+
+def _stripe_lock(lock_dir: Path, stripe: int):
+    global _lock_files, _lock_files_pid
+    with _lock_files_guard:
+        # fork된 자식은 부모와 파일 객체를 공유하므로 새로 열어야 함
+        if _lock_files_pid != os.getpid():
+            _lock_files, _lock_files_pid = {}, os.getpid()
+        key = (str(lock_dir), stripe)
+        entry = _lock_files.get(key)
+        if entry is None:
+            lock_dir.mkdir(parents=True, exist_ok=True)
+            entry = (open(lock_dir / f"{stripe:02d}.lock", 'a'), threading.Lock())
+            _lock_files[key] = entry
+        return entry
+
+
+@contextmanager
+def file_lock(path: Path):
+    """path에 대한 배타적 advisory lock"""
+    path = Path(path)
+    stripe = zlib.crc32(path.name.encode('utf-8')) % LOCK_STRIPES
+    lock_file, thread_lock = _stripe_lock(path.parent / ".locks", stripe)
+    with thread_lock:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class FsyncBatch:
+    """여러 파일을 쓴 뒤 flush()에서 한 번에 fsync (디렉토리는 한 번씩)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.paths = set()
+
+    def add(self, path: Path):
+        with self.lock:
+            self.paths.add(Path(path))
+
+    def flush(self) -> int:
+        with self.lock:
+            paths, self.paths = self.paths, set()
+
+        for path in paths:
+            try:
+                fd = os.open(str(path), os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        for directory in {path.parent for path in paths}:
+            _fsync_dir(directory)
+        return len(paths)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+
+def atomic_write(path: Path, data: bytes, fsync: bool = False, batch: Optional[FsyncBatch] = None):
+    """임시 파일에 쓴 뒤 rename (호출 측에서 잠금)"""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        try:
+            f = open(tmp_path, 'wb')
+        except FileNotFoundError:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            f = open(tmp_path, 'wb')
+        with f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except FileNotFoundError:
+            pass
+        raise
+
+    if fsync:
+        _fsync_dir(path.parent)
+    elif batch is not None:
+        batch.add(path)
+
+
+def read_metadata_bytes(path: Path) -> Optional[bytes]:
+    """파일 내용 그대로 (없으면 None)"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def read_metadata(path: Path) -> Dict:
+    """메타데이터 읽기 (없으면 빈 dict, 손상된 파일은 예외)"""
+    raw = read_metadata_bytes(path)
+    return json.loads(raw) if raw is not None else {}
+
+
+def _write_if_changed(path: Path, metadata: Dict, existing: Optional[bytes],
+                      fsync: bool, batch: Optional[FsyncBatch]) -> bool:
+    data = encode_metadata(metadata)
+    if existing is not None:
+        if existing == data:
+            return False
+        # 형식만 다른 파일(다른 도구로 쓴 JSON)도 내용이 같으면 그대로 둠
+        try:
+            if json.loads(existing) == metadata:
+                return False
+        except ValueError:
+            pass  # 손상된 파일은 덮어씀
+    atomic_write(path, data, fsync=fsync, batch=batch)
+    return True
+
+
+def write_metadata(path: Path, metadata: Dict, fsync: bool = False,
+                   batch: Optional[FsyncBatch] = None) -> bool:
+    """메타데이터 저장 (내용이 같으면 쓰지 않음), 실제로 썼는지 반환"""
+    with file_lock(path):
+        return _write_if_changed(path, metadata, read_metadata_bytes(path), fsync, batch)
+
+
+def update_metadata(path: Path, mutate: Callable[[Dict], Optional[Dict]], fsync: bool = False,
+                    batch: Optional[FsyncBatch] = None) -> bool:
+    """잠금을 잡은 채 읽기-수정-쓰기 (mutate가 dict를 고치거나 새 dict 반환), 실제로 썼는지 반환"""
+    with file_lock(path):
+        existing = read_metadata_bytes(path)
+        metadata = json.loads(existing) if existing is not None else {}
+        result = mutate(metadata)
+        return _write_if_changed(path, metadata if result is None else result, existing, fsync, batch)
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+메타데이터 일괄 마이그레이션
+
+books/metadata/*.json 전체에 적용할 변환을 함수로 등록해 두고,
+프로세스 풀에서 묶음(chunk) 단위로 실행합니다.
+
+- 마이그레이션 함수: (metadata, context) → metadata를 직접 고치거나 새 dict 반환
+  context는 실행 전체가 공유하는 값 (예: 모든 파일에 같은 타임스탬프)
+- 바뀐 레코드만 씀 (metadata_store: 파일 잠금 + 원자적 쓰기)
+- 묶음마다 바뀐 책을 catalog.json에 반영 (웹 목록은 카탈로그만 읽음)
+- --dry-run: 쓰지 않고 바뀔 개수만, --diff: 바뀌는 내용까지 출력
+- 체크포인트 파일에 끝난 묶음을 기록해 중단된 실행은 이어서 진행, 끝나면 삭제
+  묶음은 [첫 파일, 마지막 파일, 파일 수, 파일명 해시]로 기록하고, 이어서 실행할 때 그 범위의
+  파일 목록이 그대로인 묶음만 건너뜀 (범위 안에 새로 생긴 파일이 있으면 범위 전체를 다시 실행)
+  (마이그레이션은 다시 실행해도 결과가 같도록 작성)
+
+사용법:
+    python migrations.py list
+    python migrations.py run cover_timestamps --dry-run --diff
+    python migrations.py run cover_timestamps --jobs 8
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import bisect
+import difflib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import catalog
+from metadata_store import (FsyncBatch, METADATA_DIR, atomic_write, encode_metadata,
+                            read_metadata_bytes, update_metadata)
+
+DEFAULT_JOBS = int(os.getenv('MIGRATION_JOBS', str(os.cpu_count() or 2)))
+DEFAULT_CHUNK_SIZE = 500
+
+# 체크포인트 위치 (metadata 디렉토리 옆)
+CHECKPOINT_DIRNAME = ".migrations"
+
+# 출력할 diff 최대 개수 (묶음당)
+MAX_DIFFS_PER_CHUNK = 20
+
+MigrationFunc = Callable[[Dict, Dict], Optional[Dict]]
+
+# 이름 → (함수, 설명, context 생성 함수)
+MIGRATIONS: Dict[str, Tuple[MigrationFunc, str, Callable[[], Dict]]] = {}
+
+
+def migration(name: str, description: str = "", make_context: Callable[[], Dict] = dict):
+    """마이그레이션 등록 데코레이터 (워커 프로세스도 이 모듈을 import하면 같은 목록을 가짐)"""
+    def register(func: MigrationFunc) -> MigrationFunc:
+        MIGRATIONS[name] = (func, description, make_context)
+        return func
+    return register
+
+
+# ---------------------------------------------------------------------------
+# 등록된 마이그레이션
+# ---------------------------------------------------------------------------
+
+@migration('cover_timestamps', "cover는 있는데 cover_updated가 없는 책에 타임스탬프 추가",
+           make_context=lambda: {'timestamp': str(int(time.time() * 1000))})
+def add_cover_timestamps(metadata: Dict, context: Dict):
+    if metadata.get('cover') and not metadata.get('cover_updated'):
+        metadata['cover_updated'] = context['timestamp']
+
+
+# ---------------------------------------------------------------------------
+# 실행기
+# ---------------------------------------------------------------------------
+
+def _apply(func: MigrationFunc, metadata: Dict, context: Dict) -> Dict:
+    result = func(metadata, context)
+    return metadata if result is None else result
+
+
+def _migrate_chunk(name: str, paths: List[str], context: Dict, dry_run: bool, want_diff: bool) -> Dict:
+    """워커 프로세스: 묶음 하나 처리 후 집계 반환 (updated: 실제로 쓴 책 {EPUB 파일명: 메타데이터})"""
+    func = MIGRATIONS[name][0]
+    result = {'changed': 0, 'unchanged': 0, 'errors': [], 'diffs': [], 'updated': {}}
+
+    with FsyncBatch() as batch:
+        for path in paths:
+            try:
+                # 대부분은 바뀌지 않으므로 잠금 없이 먼저 확인 (복사 대신 같은 내용을 두 번 파싱)
+                raw = read_metadata_bytes(path)
+                if raw is None:
+                    continue
+                before = json.loads(raw)
+                after = _apply(func, json.loads(raw), context)
+                changed = after != before
+
+                if dry_run:
+                    if changed and want_diff and len(result['diffs']) < MAX_DIFFS_PER_CHUNK:
+                        diff = difflib.unified_diff(
+                            encode_metadata(before).decode('utf-8').splitlines(),
+                            encode_metadata(after).decode('utf-8').splitlines(),
+                            fromfile=Path(path).name, tofile=Path(path).name, lineterm='')
+                        result['diffs'].append('\n'.join(diff))
+                elif changed:
+                    # 바뀌는 파일만 잠금 안에서 다시 읽어 적용
+                    written = {}
+
+                    def mutate(metadata):
+                        written['metadata'] = _apply(func, metadata, context)
+                        return written['metadata']
+
+                    changed = update_metadata(path, mutate, batch=batch)
+                    if changed:
+                        result['updated'][f"{Path(path).stem}.epub"] = written['metadata']
+            except Exception as e:
+                result['errors'].append(f"{Path(path).name}: {e}")
+                continue
+
+            result['changed' if changed else 'unchanged'] += 1
+
+    return result
+
+
+def checkpoint_path_for(name: str, metadata_dir: Path) -> Path:
+    return Path(metadata_dir).parent / CHECKPOINT_DIRNAME / f"{name}.json"
+
+
+def _load_checkpoint(path: Path) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️  체크포인트를 읽을 수 없음, 처음부터 실행: {e}")
+        return None
+
+
+def _save_checkpoint(path: Path, checkpoint: Dict):
+    atomic_write(path, json.dumps(checkpoint, ensure_ascii=False).encode('utf-8'))
+
+
+def _names_digest(names: List[str]) -> int:
+    return zlib.crc32('\n'.join(names).encode('utf-8'))
+
+
+def _done_entry(chunk: List[str]) -> List:
+    """체크포인트에 기록할 끝난 묶음 [첫 파일명, 마지막 파일명, 파일 수, 파일명 해시]"""
+    names = [Path(path).name for path in chunk]
+    return [names[0], names[-1], len(names), _names_digest(names)]
+
+
+def _verified_done(done: List, names: List[str]) -> List:
+    """지금도 파일 목록이 같은 끝난 묶음만 (names는 정렬된 현재 파일명)"""
+    verified = []
+    for entry in done:
+        if len(entry) != 4:
+            continue  # 예전 형식 ([첫 파일, 마지막 파일])은 확인할 수 없어 다시 실행
+        first, last, count, digest = entry
+        in_range = names[bisect.bisect_left(names, first):bisect.bisect_right(names, last)]
+        if len(in_range) == count and _names_digest(in_range) == digest:
+            verified.append(entry)
+        else:
+            print(f"  ↻ 묶음 {first[:30]} … {last[:30]}: 파일 목록이 바뀌어 다시 실행")
+    return verified
+
+
+def _sync_catalog(updated: Dict[str, Dict], metadata_dir: Path):
+    """바뀐 책을 catalog.json에 반영 (카탈로그가 보는 메타데이터 디렉토리일 때만)"""
+    if not updated or metadata_dir.resolve() != catalog.METADATA_DIR.resolve():
+        return
+    try:
+        catalog.upsert_books(updated)
+    except Exception as e:
+        print(f"  ⚠️  카탈로그 갱신 실패 (python catalog.py로 다시 생성): {e}")
+
+
+def run_migration(name: str, metadata_dir: Path = METADATA_DIR, jobs: int = DEFAULT_JOBS,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, dry_run: bool = False, diff: bool = False,
+                  restart: bool = False) -> Dict[str, int]:
+    """등록된 마이그레이션을 metadata_dir 전체에 실행, 집계 반환"""
+    if name not in MIGRATIONS:
+        raise KeyError(f"등록되지 않은 마이그레이션: {name} (가능: {', '.join(sorted(MIGRATIONS))})")
+
+    metadata_dir = Path(metadata_dir)
+    if not metadata_dir.exists():
+        raise FileNotFoundError(f"메타데이터 디렉토리를 찾을 수 없습니다: {metadata_dir}")
+
+    start = time.time()
+    paths = sorted(str(p) for p in metadata_dir.glob("*.json"))
+    if not dry_run and metadata_dir.resolve() != catalog.METADATA_DIR.resolve():
+        print(f"ℹ️  {metadata_dir}는 catalog.json이 보는 디렉토리가 아니므로 카탈로그는 갱신하지 않습니다")
+
+    # 체크포인트: 끝난 묶음의 범위/파일 수/파일명 해시와 실행 context
+    checkpoint_path = checkpoint_path_for(name, metadata_dir)
+    checkpoint = None if (dry_run or restart) else _load_checkpoint(checkpoint_path)
+    if checkpoint:
+        context = checkpoint['context']
+        checkpoint['done'] = _verified_done(checkpoint['done'], [Path(path).name for path in paths])
+        print(f"♻️  체크포인트에서 이어서 실행 (완료된 묶음 {len(checkpoint['done'])}개)")
+    else:
+        context = MIGRATIONS[name][2]()
+        checkpoint = {'name': name, 'context': context, 'done': []}
+
+    # 확인된 끝난 묶음 범위 밖의 파일만 새로 묶음
+    done_ranges = [(first, last) for first, last, _, _ in checkpoint['done']]
+    remaining = [path for path in paths
+                 if not any(first <= Path(path).name <= last for first, last in done_ranges)]
+    todo = [remaining[i:i + chunk_size] for i in range(0, len(remaining), chunk_size)]
+    mode = "dry-run" if dry_run else "실행"
+    print(f"🔧 마이그레이션 {name} ({mode}): 파일 {len(paths)}개 중 {len(remaining)}개, 묶음 {len(todo)}개, "
+          f"프로세스 {jobs}개")
+
+    totals = {'changed': 0, 'unchanged': 0, 'errors': 0, 'chunks': 0}
+
+    def apply_result(chunk, result):
+        totals['changed'] += result['changed']
+        totals['unchanged'] += result['unchanged']
+        totals['errors'] += len(result['errors'])
+        for error in result['errors']:
+            print(f"  ❌ {error}")
+        for chunk_diff in result['diffs']:
+            print(chunk_diff)
+
+        # 웹 목록이 바로 바뀐 값을 보도록 묶음마다 카탈로그 반영
+        _sync_catalog(result['updated'], metadata_dir)
+
+        if not dry_run and not result['errors']:
+            checkpoint['done'].append(_done_entry(chunk))
+            _save_checkpoint(checkpoint_path, checkpoint)
+
+        # 진행 상황은 약 10%마다
+        totals['chunks'] += 1
+        if totals['chunks'] % max(1, len(todo) // 10) == 0 or totals['chunks'] == len(todo):
+            finished = totals['changed'] + totals['unchanged'] + totals['errors']
+            print(f"  [{finished}/{sum(len(c) for c in todo)}] 변경 {totals['changed']}개, "
+                  f"유지 {totals['unchanged']}개, 오류 {totals['errors']}개")
+
+    if jobs <= 1 or len(todo) <= 1:
+        for chunk in todo:
+            apply_result(chunk, _migrate_chunk(name, chunk, context, dry_run, diff))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {executor.submit(_migrate_chunk, name, chunk, context, dry_run, diff): chunk
+                       for chunk in todo}
+            for future in as_completed(futures):
+                apply_result(futures[future], future.result())
+
+    # 오류 없이 끝났으면 체크포인트 삭제 (다음 실행은 처음부터, 바뀔 것이 없으면 쓰지 않음)
+    if not dry_run and totals['errors'] == 0 and checkpoint_path.exists():
+        checkpoint_path.unlink()
+
+    print(f"✅ {name} 완료: 변경 {totals['changed']}개, 유지 {totals['unchanged']}개, "
+          f"오류 {totals['errors']}개 ({time.time() - start:.1f}초)")
+    del totals['chunks']
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="메타데이터 일괄 마이그레이션")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('list', help="등록된 마이그레이션 목록")
+
+    run_parser = subparsers.add_parser('run', help="마이그레이션 실행")
+    run_parser.add_argument('name', help="마이그레이션 이름")
+    run_parser.add_argument('--metadata-dir', type=Path, default=METADATA_DIR,
+                            help=f"메타데이터 디렉토리 (기본값: {METADATA_DIR})")
+    run_parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS,
+                            help=f"동시에 실행할 프로세스 수 (기본값: {DEFAULT_JOBS})")
+    run_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help=f"묶음당 파일 수 (기본값: {DEFAULT_CHUNK_SIZE})")
+    run_parser.add_argument('--dry-run', action='store_true', help="파일을 쓰지 않고 바뀔 개수만 확인")
+    run_parser.add_argument('--diff', action='store_true', help="--dry-run에서 바뀌는 내용 출력")
+    run_parser.add_argument('--restart', action='store_true', help="체크포인트를 무시하고 처음부터 실행")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        for name, (_, description, _) in sorted(MIGRATIONS.items()):
+            print(f"{name}: {description}")
+        return 0
+
+    totals = run_migration(args.name, metadata_dir=args.metadata_dir, jobs=max(1, args.jobs),
+                           chunk_size=max(1, args.chunk_size), dry_run=args.dry_run,
+                           diff=args.diff, restart=args.restart)
+    return 1 if totals['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
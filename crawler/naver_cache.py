@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Naver Books API 응답 캐시
+
+정규화한 검색어를 키로 원본 JSON 응답을 SQLite 파일에 저장합니다.
+TTL이 지난 항목은 무시하고, 최대 개수를 넘으면 가장 오래 사용하지 않은 항목부터 삭제합니다.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Optional, Dict
+
+
+def normalize_query(query: str) -> str:
+    """캐시 키용 검색어 정규화 (유니코드 NFC, 소문자, 공백 정리)"""
+    normalized = unicodedata.normalize('NFC', query)
+    normalized = re.sub(r'\s+', ' ', normalized.lower())
+    return normalized.strip()
+
+
+class QueryCache:
+    """TTL + LRU 방식의 SQLite 응답 캐시 (스레드 안전)"""
+
+    def __init__(self, path: Path, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 50000):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_created_at ON responses(created_at)")
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(query: str, display: int) -> str:
+        return f"{display}:{normalize_query(query)}"
+
+    def get(self, query: str, display: int = 10) -> Optional[Dict]:
+        """캐시된 응답 반환 (없거나 만료되면 None)"""
+        key = self.make_key(query, display)
+        now = time.time()
+
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+
+            self.conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def put(self, query: str, data: Dict, display: int = 10):
+        """응답 저장 후 최대 개수를 넘으면 LRU 항목 삭제"""
+        key = self.make_key(query, display)
+        now = time.time()
+        body = json.dumps(data, ensure_ascii=False)
+
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, body, now, now)
+            )
+            self.conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+
+            count = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                self.conn.execute(
+                    """
+                    DELETE FROM responses WHERE key IN (
+                        SELECT key FROM responses ORDER BY last_access ASC LIMIT ?
+                    )
+                    """,
+                    (count - self.max_entries,)
+                )
+            self.conn.commit()
+
+    def stats(self) -> Dict:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / total) if total else 0.0,
+            }
+
+    def reset_stats(self):
+        """적중/미적중 횟수 초기화 (한 프로세스에서 여러 번 실행할 때 실행별 통계용)"""
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+토큰 버킷 기반 호출 속도 제한기
+
+여러 스레드가 하나의 Naver API 할당량을 공유할 수 있도록 초당 호출 수를 제한합니다.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """스레드 안전한 토큰 버킷 (초당 rate개 충전, 최대 capacity개 보관)"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        if rate <= 0:
+            raise ValueError("rate는 0보다 커야 합니다.")
+
+        self.rate = float(rate)
+        # 버스트 크기: 기본값은 1초 분량 (최소 1개)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.last_refill = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """토큰을 즉시 얻을 수 있으면 소비하고 True 반환"""
+        with self.lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """토큰을 얻을 때까지 대기, 실제로 대기한 시간(초) 반환"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                # 부족한 토큰이 채워질 때까지 걸리는 시간
+                wait = (tokens - self.tokens) / self.rate
+
+            # 락을 놓고 대기해야 다른 스레드가 막히지 않음
+            time.sleep(wait)
+            waited += wait
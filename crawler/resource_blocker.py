@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+불필요한 브라우저 요청 차단
+
+목록/책 페이지에서 쓰지 않는 리소스(이미지, 폰트, 미디어, 광고/분석 스크립트)를
+route 가로채기로 중단하고, 실행마다 차단/허용 통계를 출력합니다.
+
+- 차단 기준: 리소스 종류 (BLOCK_RESOURCE_TYPES, 기본 image,media,font)
+  또는 URL에 포함된 문자열 (BLOCK_URL_PATTERNS, 쉼표 구분, 기본은 광고/분석 도메인)
+- 페이지 이동(document)과 EPUB 다운로드는 차단하지 않음
+- 표지는 page.request.get(APIRequestContext)으로 받으므로 route의 영향을 받지 않음
+  (목록의 z-cover 요소와 img.cover의 src 속성은 이미지가 없어도 그대로 있음)
+- BLOCK_RESOURCES=0 이면 끔
+
+차단한 요청은 받지 않았으므로 크기를 알 수 없어 개수로 집계하고,
+허용한 응답은 Content-Length 기준으로 받은 양을 집계합니다.
+"""
+
+import os
+import threading
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+BLOCK_RESOURCES = os.getenv('BLOCK_RESOURCES', '1') != '0'
+
+BLOCKED_RESOURCE_TYPES = frozenset(
+    t.strip() for t in os.getenv('BLOCK_RESOURCE_TYPES', 'image,media,font').split(',') if t.strip()
+)
+
+DEFAULT_BLOCKED_URL_PATTERNS = [
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'googlesyndication.com',
+    'adservice.google',
+    'mc.yandex.',
+    'facebook.net',
+    'hotjar.com',
+    'clarity.ms',
+]
+
+BLOCKED_URL_PATTERNS = [
+    p.strip() for p in os.getenv('BLOCK_URL_PATTERNS', ','.join(DEFAULT_BLOCKED_URL_PATTERNS)).split(',')
+    if p.strip()
+]
+
+# 헤드리스 크롤링에 필요 없는 Chromium 기능 끄기 (컨테이너 메모리/백그라운드 트래픽 절약)
+LEAN_CHROMIUM_ARGS = [
+    '--disable-dev-shm-usage',          # 컨테이너의 작은 /dev/shm 대신 /tmp 사용
+    '--disable-gpu',
+    '--disable-extensions',
+    '--disable-background-networking',  # 업데이트 확인, 세이프 브라우징 목록 등
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication',
+    '--metrics-recording-only',
+    '--mute-audio',
+    '--no-first-run',
+]
+
+# 차단하지 않는 리소스 종류 (페이지 이동)
+NEVER_BLOCKED_TYPES = frozenset({'document'})
+
+
+def launch_browser(playwright, lean: bool = BLOCK_RESOURCES):
+    """헤드리스 Chromium 실행 (lean이면 불필요한 기능을 끈 실행 옵션)"""
+    return playwright.chromium.launch(headless=True, args=LEAN_CHROMIUM_ARGS if lean else None)
+
+
+class ResourceBlocker:
+    """BrowserContext에 붙이는 요청 차단기 (여러 워커 스레드의 컨텍스트가 통계를 공유)"""
+
+    def __init__(self, resource_types: Iterable[str] = BLOCKED_RESOURCE_TYPES,
+                 url_patterns: Iterable[str] = BLOCKED_URL_PATTERNS, enabled: bool = BLOCK_RESOURCES):
+        self.resource_types = frozenset(resource_types) - NEVER_BLOCKED_TYPES
+        self.url_patterns = tuple(url_patterns)
+        self.enabled = enabled and bool(self.resource_types or self.url_patterns)
+        self.lock = threading.Lock()
+        self.blocked = Counter()       # 차단 이유(리소스 종류 또는 'url')별 요청 수
+        self.allowed_requests = 0
+        self.allowed_bytes = 0
+
+    def blocked_reason(self, url: str, resource_type: str) -> Optional[str]:
+        """차단할 요청이면 이유, 아니면 None"""
+        if resource_type in NEVER_BLOCKED_TYPES:
+            return None
+        if resource_type in self.resource_types:
+            return resource_type
+        for pattern in self.url_patterns:
+            if pattern in url:
+                return 'url'
+        return None
+
+    def attach(self, context):
+        """컨텍스트의 모든 페이지 요청에 차단 규칙 적용"""
+        if not self.enabled:
+            return
+        context.route('**/*', self._handle_route)
+        context.on('response', self._on_response)
+
+    def _handle_route(self, route, request):
+        reason = None
+        if not request.is_navigation_request():
+            reason = self.blocked_reason(request.url, request.resource_type)
+
+        if reason is None:
+            route.continue_()
+            return
+
+        with self.lock:
+            self.blocked[reason] += 1
+        route.abort('blockedbyclient')
+
+    def _on_response(self, response):
+        try:
+            size = int(response.headers.get('content-length') or 0)
+        except ValueError:
+            size = 0
+        with self.lock:
+            self.allowed_requests += 1
+            self.allowed_bytes += size
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                'blocked': sum(self.blocked.values()),
+                'blocked_by_reason': dict(self.blocked),
+                'allowed': self.allowed_requests,
+                'allowed_bytes': self.allowed_bytes,
+            }
+
+    def report(self) -> str:
+        """실행 요약 한 줄"""
+        if not self.enabled:
+            return "🚫 Resource blocking: off"
+        stats = self.stats()
+        reasons = ', '.join(f"{reason} {count}" for reason, count in
+                            sorted(stats['blocked_by_reason'].items(), key=lambda item: -item[1]))
+        return (f"🚫 Blocked {stats['blocked']} requests ({reasons or 'none'}), "
+                f"allowed {stats['allowed']} responses "
+                f"({stats['allowed_bytes'] / 1024 / 1024:.1f} MB by Content-Length)")
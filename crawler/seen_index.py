@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+영속 확인 목록 (seen index)
+
+다운로더가 이미 처리한 책의 제목, 목록 링크, EPUB 파일명을 8바이트 BLAKE2b 해시로
+추가 전용 파일에 기록합니다. 컨테이너가 재시작되어도 책 페이지를 열지 않고 건너뛸 수 있습니다.
+항목 10만 개 ≈ 디스크 800KB.
+"""
+
+import os
+import hashlib
+import threading
+from pathlib import Path
+
+from data_dir import DATA_DIR
+
+SEEN_INDEX_PATH = DATA_DIR / "seen_index.bin"
+
+DIGEST_SIZE = 8
+
+
+def _digest(kind: str, value: str) -> bytes:
+    return hashlib.blake2b(f"{kind}:{value}".encode('utf-8'), digest_size=DIGEST_SIZE).digest()
+
+
+class SeenIndex:
+    """해시 키 집합 (시작 시 메모리로 읽고, 새 키는 파일 끝에 추가)"""
+
+    def __init__(self, path: Path = SEEN_INDEX_PATH):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.digests = set()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            data = self.path.read_bytes()
+            # 쓰는 도중 중단되어 잘린 마지막 레코드는 버림
+            usable = len(data) - len(data) % DIGEST_SIZE
+            self.digests = {data[i:i + DIGEST_SIZE] for i in range(0, usable, DIGEST_SIZE)}
+            if usable != len(data):
+                with open(self.path, 'r+b') as f:
+                    f.truncate(usable)
+
+    def __len__(self):
+        return len(self.digests)
+
+    def _append(self, digests):
+        new = [d for d in dict.fromkeys(digests) if d not in self.digests]
+        if not new:
+            return 0
+        with open(self.path, 'ab') as f:
+            f.write(b''.join(new))
+            f.flush()
+            os.fsync(f.fileno())
+        self.digests.update(new)
+        return len(new)
+
+    def remember(self, title: str = None, href: str = None, filename_stem: str = None):
+        """처리한 책을 나중에 마주칠 수 있는 모든 키로 기록"""
+        digests = []
+        if title:
+            digests.append(_digest('title', title))
+        if href:
+            digests.append(_digest('href', href))
+        if filename_stem:
+            digests.append(_digest('file', filename_stem))
+        with self.lock:
+            self._append(digests)
+
+    def is_known(self, title: str = None, href: str = None, filename_stem: str = None) -> bool:
+        keys = [('href', href), ('title', title), ('file', filename_stem)]
+        with self.lock:
+            return any(value and _digest(kind, value) in self.digests for kind, value in keys)
+
+    def seed_from_library(self, books_dir: Path = Path("books")) -> int:
+        """books/에 이미 있는 EPUB 등록 (인덱스 도입 전 다운로드분, 수동 추가분), 새로 추가된 수 반환"""
+        digests = [_digest('file', p.stem) for p in Path(books_dir).glob("*.epub")]
+        with self.lock:
+            return self._append(digests)
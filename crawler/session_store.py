@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+로그인 세션 저장
+
+Playwright storage_state(쿠키 + localStorage)를 크롤러 전용 데이터 디렉토리에 저장해 두고,
+다음 실행에서 그대로 불러와 로그인 과정을 건너뜁니다.
+
+- 저장 위치: SESSION_STATE_FILE (기본 data/session/storage_state.json)
+  웹이 내보내는 books/ 볼륨에는 두지 않음 (예전 books/.session 파일은 다운로더 시작 시 옮김)
+  디렉토리는 0700, 파일은 0600 (로그인 쿠키가 들어 있음)
+- 임시 파일에 쓴 뒤 os.replace (처음부터 0600으로 생성)
+- 불러올 때 인증 쿠키 만료 시각을 먼저 확인해, 이미 만료된 세션은 페이지를 열지 않고 버림
+  (실제로 로그인된 상태인지는 다운로더가 첫 페이지에서 확인)
+"""
+
+import os
+import json
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from data_dir import DATA_DIR, LEGACY_BOOKS_DIR
+
+SESSION_STATE_PATH = Path(os.getenv('SESSION_STATE_FILE', str(DATA_DIR / "session" / "storage_state.json")))
+
+# 예전 버전의 저장 위치 (웹이 내보내는 books/ 볼륨 안)
+LEGACY_SESSION_STATE_PATH = LEGACY_BOOKS_DIR / ".session" / "storage_state.json"
+
+# 로그인 상태를 나타내는 쿠키 (Z-Library)
+AUTH_COOKIE_NAMES = ('remix_userid', 'remix_userkey')
+
+# 만료까지 이보다 적게 남은 세션은 쓰지 않음 (실행 도중 만료 방지)
+MIN_REMAINING_SECONDS = 10 * 60
+
+
+def auth_cookies_valid(state: Dict, now: float = None) -> bool:
+    """인증 쿠키가 아직 만료되지 않았는지 (만료 시각이 없는 세션 쿠키는 유효로 봄)
+
+    인증 쿠키 이름을 찾지 못하면(사이트 변경 등) 쿠키가 하나라도 있으면 유효로 보고
+    첫 페이지 확인에 맡김.
+    """
+    now = time.time() if now is None else now
+    cookies = [c for c in state.get('cookies', []) if c.get('name') in AUTH_COOKIE_NAMES]
+    if not cookies:
+        return bool(state.get('cookies'))
+    for cookie in cookies:
+        expires = cookie.get('expires', -1)
+        if expires is not None and expires > 0 and expires < now + MIN_REMAINING_SECONDS:
+            return False
+    return True
+
+
+def load_storage_state(path: Path = SESSION_STATE_PATH) -> Optional[Dict]:
+    """저장된 세션 (없거나, 손상되었거나, 인증 쿠키가 만료되었으면 None)"""
+    path = Path(path)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Saved session unreadable, logging in again: {e}")
+        return None
+
+    if not auth_cookies_valid(state):
+        print("⌛ Saved session expired")
+        return None
+    return state
+
+
+def save_storage_state(state: Dict, path: Path = SESSION_STATE_PATH):
+    """세션 저장 (소유자만 읽기/쓰기)"""
+    path = Path(path)
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    os.chmod(path.parent, 0o700)
+
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    fd = os.open(str(tmp_path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def clear_storage_state(path: Path = SESSION_STATE_PATH):
+    """저장된 세션 삭제 (서버에서 거부된 세션)"""
+    try:
+        Path(path).unlink()
+    except FileNotFoundError:
+        pass
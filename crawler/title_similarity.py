@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+제목 유사도
+
+검색 결과 후보들을 원본 제목 하나와 비교할 때 쓰는 모듈입니다.
+
+- 원본 제목은 TitleMatcher를 만들 때 한 번만 정규화하고 글자별 비트 마스크를 만들어 둠
+- 후보 제목 정규화는 캐시 (여러 검색어의 응답에 같은 책이 반복해서 나옴)
+- 점수: 최장 공통 부분열(LCS) 기반 indel 유사도 2·LCS / (len1 + len2)
+  비트 병렬(Hyyrö) 방식이라 후보 글자 하나당 정수 연산 몇 번이면 됨
+  SequenceMatcher.ratio()와 같은 식이지만, 탐욕적으로 찾은 일치 블록 대신 최적의 LCS를 쓰므로
+  항상 같거나 높게 나옴 (기존에 통과하던 후보는 계속 통과)
+- 최소 점수(cutoff)를 주면 길이 차이만으로 넘을 수 없는 후보는 계산하지 않음
+
+직접 실행하면 회귀용 제목 쌍으로 기존 SequenceMatcher와 판정/속도를 비교합니다.
+"""
+
+import re
+import sys
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, List
+
+# 괄호/대괄호 이전 부분 (부제, 판 정보 제외)
+TITLE_HEAD_RE = re.compile(r'^([^\(\[]+)')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=8192)
+def normalize_title(title: str) -> str:
+    """비교용 제목 정제: 괄호/대괄호 이전 부분, 소문자, 공백 정규화"""
+    match = TITLE_HEAD_RE.match(title)
+    cleaned = match.group(1).strip() if match else title
+    return WHITESPACE_RE.sub(' ', cleaned.lower().strip())
+
+
+def _indel_ratio(lcs: int, total: int) -> float:
+    # 둘 다 빈 문자열이면 SequenceMatcher와 같이 1.0
+    return 2.0 * lcs / total if total else 1.0
+
+
+class TitleMatcher:
+    """원본 제목 하나를 여러 후보 제목과 비교"""
+
+    def __init__(self, title: str):
+        self.title = title
+        self.normalized = normalize_title(title)
+        self.length = len(self.normalized)
+        self.full_mask = (1 << self.length) - 1
+
+        # 글자 → 원본에서 그 글자가 나오는 위치의 비트
+        self.masks: Dict[str, int] = {}
+        for i, ch in enumerate(self.normalized):
+            self.masks[ch] = self.masks.get(ch, 0) | (1 << i)
+
+    def lcs_length(self, normalized: str) -> int:
+        """정규화된 후보와 원본의 최장 공통 부분열 길이"""
+        masks = self.masks
+        full_mask = self.full_mask
+        s = full_mask
+        for ch in normalized:
+            m = masks.get(ch)
+            if m is None:
+                continue
+            u = s & m
+            s = ((s + u) | (s - u)) & full_mask
+        return self.length - bin(s).count('1')
+
+    def score(self, candidate: str, cutoff: float = 0.0) -> float:
+        """유사도 (0.0 ~ 1.0), cutoff보다 낮을 수밖에 없으면 0.0"""
+        normalized = normalize_title(candidate)
+        total = self.length + len(normalized)
+        if cutoff > 0.0 and _indel_ratio(min(self.length, len(normalized)), total) < cutoff:
+            return 0.0
+        return _indel_ratio(self.lcs_length(normalized), total)
+
+    def score_many(self, candidates: Iterable[str], cutoff: float = 0.0) -> List[float]:
+        """후보 여러 개의 유사도 (입력 순서대로)"""
+        return [self.score(candidate, cutoff) for candidate in candidates]
+
+
+def title_similarity(title1: str, title2: str) -> float:
+    """두 제목의 유사도 (0.0 ~ 1.0)"""
+    return TitleMatcher(title1).score(title2)
+
+
+# 회귀용 제목 쌍: (원본 제목, 검색 결과 제목, 같은 책인지)
+REGRESSION_PAIRS = [
+    ("삼체 (휴고상 수상작)", "삼체", True),
+    ("삼체 2부 암흑의 숲", "삼체 2부: 암흑의 숲", True),
+    ("삼체 2부 암흑의 숲", "삼체 3부: 사신의 영생", False),
+    ("[개정판] 코스모스", "코스모스", True),
+    ("코스모스", "코스모스 오디세이", False),
+    ("사피엔스 (무선본)", "사피엔스", True),
+    ("사피엔스", "호모 데우스", False),
+    ("채식주의자", "채식주의자 (리마스터판)", True),
+    ("소년이 온다", "소년이 온다 - 2024 노벨문학상 수상작가", True),
+    ("소년이 온다", "소녀는 어디로 가는가", False),
+    ("아몬드", "아몬드 (양장 특별판)", True),
+    ("불편한 편의점", "불편한 편의점 2", True),
+    ("불편한 편의점", "편의점 인간", False),
+    ("데미안", "데미안(일러스트판)", True),
+    ("데미안", "데미안과 싯다르타", False),
+    ("1984", "1984 (한글판)", True),
+    ("1984", "1Q84 1", False),
+    ("Clean Code", "클린 코드", False),
+    ("Clean Code", "Clean Code: 애자일 소프트웨어 장인 정신", True),
+    ("해리 포터와 마법사의 돌", "해리포터와 마법사의 돌 1", True),
+    ("해리 포터와 마법사의 돌", "해리 포터와 비밀의 방", False),
+    ("지구 끝의 온실", "지구 끝의 온실 (김초엽 장편소설)", True),
+    ("지구 끝의 온실", "우리가 빛의 속도로 갈 수 없다면", False),
+    ("달러구트 꿈 백화점", "달러구트 꿈 백화점 2", True),
+    ("달러구트 꿈 백화점", "꿈꾸는 백화점", False),
+    ("파친코 1", "파친코 1 (애플TV 오리지널 드라마 원작)", True),
+    ("파친코 1", "파친코 2", False),
+    ("이기적 유전자", "이기적 유전자 40주년 기념판", True),
+    ("이기적 유전자", "유전자 스위치", False),
+    ("총, 균, 쇠", "총균쇠", True),
+    ("총, 균, 쇠", "총 균 쇠 - 무기 병균 금속은 인류의 운명을 어떻게 바꿨는가", True),
+    ("어린 왕자", "어린왕자", True),
+    ("어린 왕자", "왕자와 거지", False),
+    ("노인과 바다", "노인과 바다 (영문판)", True),
+    ("노인과 바다", "바다의 노인", False),
+    ("나미야 잡화점의 기적", "나미야잡화점의 기적 (양장)", True),
+    ("82년생 김지영", "김지영 82년생", True),
+    ("미움받을 용기", "미움 받을 용기 1", True),
+    ("역행자", "역행자 확장판", True),
+]
+
+
+def _benchmark(rounds: int = 200):
+    """기존 SequenceMatcher 방식 vs TitleMatcher: 판정 정확도와 후보 10개 비교 시간"""
+    from difflib import SequenceMatcher
+
+    threshold = 0.6
+
+    def old_similarity(title1, title2):
+        return SequenceMatcher(None, normalize_title.__wrapped__(title1),
+                               normalize_title.__wrapped__(title2)).ratio()
+
+    print(f"{'원본':<16} {'후보':<30} {'정답':>4} {'기존':>6} {'신규':>6}")
+    old_correct = new_correct = 0
+    for original, candidate, same in REGRESSION_PAIRS:
+        old = old_similarity(original, candidate)
+        new = title_similarity(original, candidate)
+        assert new >= old - 1e-9, (original, candidate, old, new)
+        old_correct += (old >= threshold) == same
+        new_correct += (new >= threshold) == same
+        print(f"{original[:16]:<16} {candidate[:30]:<30} {'O' if same else 'X':>4} {old:>6.2f} {new:>6.2f}")
+    print(f"\n정확도 (임계값 {threshold}): 기존 {old_correct}/{len(REGRESSION_PAIRS)}, "
+          f"신규 {new_correct}/{len(REGRESSION_PAIRS)}")
+
+    # 책 하나의 검색 한 번: 원본 1개 vs 후보 10개 (기존은 매번 양쪽을 다시 정제)
+    originals = sorted({original for original, _, _ in REGRESSION_PAIRS})
+    candidates = [candidate for _, candidate, _ in REGRESSION_PAIRS][:10]
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for original in originals:
+            [old_similarity(original, candidate) for candidate in candidates]
+    old_us = (time.perf_counter() - start) / (rounds * len(originals)) * 1e6
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for original in originals:
+            TitleMatcher(original).score_many(candidates, cutoff=threshold)
+    new_us = (time.perf_counter() - start) / (rounds * len(originals)) * 1e6
+
+    print(f"후보 10개 비교: 기존 {old_us:.1f}µs, 신규 {new_us:.1f}µs")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--bench':
+        _benchmark()
+    elif len(sys.argv) > 2:
+        matcher = TitleMatcher(sys.argv[1])
+        for candidate, similarity in zip(sys.argv[2:], matcher.score_many(sys.argv[2:])):
+            print(f"{candidate}: {similarity:.2f}")
+    else:
+        print("사용법: python title_similarity.py --bench | 원본제목 후보제목...")
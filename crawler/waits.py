@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+페이지 대기
+
+고정 time.sleep 대신 "페이지가 준비됐다"는 조건(선택자, 네트워크 유휴, 요소 수 증가)을
+기다리고, 조건마다 상한 시간(timeout)을 둡니다. 조건이 먼저 맞으면 바로 진행합니다.
+
+- 모든 대기는 이름(label)별로 걸린 시간과 시간 초과 여부를 기록
+  실행이 끝나면 WaitLog.summary()로 이름별 횟수/평균/최대/시간 초과 횟수 출력
+- 시간 초과는 예외가 아니라 False 반환 (기존 sleep처럼 그대로 진행할 수 있도록)
+- WAIT_LOG_VERBOSE=1 이면 대기마다 한 줄씩 출력
+- 여러 다운로드 워커 스레드가 같은 기록을 공유 (스레드 안전)
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+WAIT_LOG_VERBOSE = os.getenv('WAIT_LOG_VERBOSE', '0') == '1'
+
+# 스크롤 후 화면 갱신 2번 (IntersectionObserver 기반 지연 로딩이 요청을 시작할 시점)
+# 백그라운드 탭은 requestAnimationFrame이 멈출 수 있으므로 setTimeout으로 상한
+TWO_FRAMES_JS = """
+(timeoutMs) => new Promise((resolve) => {
+    const timer = setTimeout(() => resolve(false), timeoutMs);
+    requestAnimationFrame(() => requestAnimationFrame(() => {
+        clearTimeout(timer);
+        resolve(true);
+    }));
+})
+"""
+
+COUNT_ABOVE_JS = "([selector, count]) => document.querySelectorAll(selector).length > count"
+
+
+class WaitLog:
+    """이름별 대기 시간 기록"""
+
+    def __init__(self, verbose: bool = WAIT_LOG_VERBOSE):
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.entries: Dict[str, List[float]] = {}
+        self.timeouts: Dict[str, int] = {}
+
+    def record(self, label: str, elapsed: float, timed_out: bool):
+        with self.lock:
+            self.entries.setdefault(label, []).append(elapsed)
+            if timed_out:
+                self.timeouts[label] = self.timeouts.get(label, 0) + 1
+        if self.verbose:
+            print(f"    ⏱️  {label}: {elapsed * 1000:.0f} ms{' (timeout)' if timed_out else ''}")
+
+    @contextmanager
+    def timed(self, label: str):
+        """with 블록 시간 기록 (블록 안에서 시간 초과 예외가 나면 timeout으로 기록 후 무시)"""
+        start = time.monotonic()
+        outcome = {'timed_out': False}
+        try:
+            yield outcome
+        except PlaywrightTimeoutError:
+            outcome['timed_out'] = True
+        finally:
+            self.record(label, time.monotonic() - start, outcome['timed_out'])
+
+    def summary(self) -> str:
+        with self.lock:
+            items = sorted(self.entries.items(), key=lambda item: -sum(item[1]))
+            timeouts = dict(self.timeouts)
+        if not items:
+            return "⏱️  Waits: none"
+
+        total = sum(sum(elapsed) for _, elapsed in items)
+        lines = [f"⏱️  Waits: {total:.1f}s total"]
+        for label, elapsed in items:
+            lines.append(f"    {label:<28} {len(elapsed):>5}x  avg {sum(elapsed) / len(elapsed) * 1000:>6.0f} ms  "
+                         f"max {max(elapsed) * 1000:>6.0f} ms  timeouts {timeouts.get(label, 0)}")
+        return "\n".join(lines)
+
+
+# 실행 전체가 공유하는 기록 (download_incremental 시작 시 새로 만듦)
+wait_log = WaitLog()
+
+
+def reset_wait_log() -> WaitLog:
+    global wait_log
+    wait_log = WaitLog()
+    return wait_log
+
+
+def wait_for_selector(page, selector: str, label: str, timeout: float = 10.0, state: str = 'visible') -> bool:
+    """선택자가 state가 될 때까지 (최대 timeout초), 맞으면 True"""
+    with wait_log.timed(label) as outcome:
+        page.wait_for_selector(selector, state=state, timeout=timeout * 1000)
+    return not outcome['timed_out']
+
+
+def wait_for_load(page, label: str, state: str = 'networkidle', timeout: float = 10.0) -> bool:
+    """load / domcontentloaded / networkidle 상태까지 (최대 timeout초), 맞으면 True"""
+    with wait_log.timed(label) as outcome:
+        page.wait_for_load_state(state, timeout=timeout * 1000)
+    return not outcome['timed_out']
+
+
+def wait_for_count_above(page, selector: str, count: int, label: str, timeout: float = 15.0) -> bool:
+    """선택자에 맞는 요소가 count개보다 많아질 때까지 (Load more 후 새 목록), 맞으면 True"""
+    with wait_log.timed(label) as outcome:
+        page.wait_for_function(COUNT_ABOVE_JS, arg=[selector, count], polling=100, timeout=timeout * 1000)
+    return not outcome['timed_out']
+
+
+def scroll_and_settle(page, label: str, dy: int = None, timeout: float = 2.0) -> bool:
+    """스크롤(dy가 없으면 맨 아래로) 후 화면이 두 번 갱신될 때까지 대기"""
+    if dy is None:
+        page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+    else:
+        page.evaluate(f"window.scrollBy(0, {int(dy)})")
+    start = time.monotonic()
+    settled = bool(page.evaluate(TWO_FRAMES_JS, int(timeout * 1000)))
+    wait_log.record(label, time.monotonic() - start, not settled)
+    return settled
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+메타데이터 보완 작업 큐
+
+보완이 필요한 책을 SQLite 테이블에 보관합니다.
+다운로더가 책을 저장할 때 push하고, 보완 스크립트가 claim → complete/fail 순서로 처리합니다.
+
+상태: pending → in_progress → done
+                            ↘ pending (재시도) → ... → failed (최대 시도 횟수 초과)
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from data_dir import DATA_DIR
+
+# 다운로더와 보완 스크립트가 공유하는 큐 파일 (크롤러 전용 데이터 디렉토리)
+QUEUE_PATH = DATA_DIR / "enrich_queue.db"
+
+PENDING = 'pending'
+IN_PROGRESS = 'in_progress'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class EnrichmentQueue:
+    """프로세스/스레드 간 공유 가능한 영속 작업 큐"""
+
+    def __init__(self, path: Path, max_attempts: int = 3, stale_seconds: float = 30 * 60):
+        self.path = Path(path)
+        self.max_attempts = max_attempts
+        self.stale_seconds = stale_seconds
+        self.lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 다운로더와 보완 컨테이너가 같은 파일을 쓰므로 잠금 대기 시간을 넉넉히
+        self.conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False,
+                                    isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS items (
+                filename TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                enqueued_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_items_state ON items(state, enqueued_at)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def push(self, filename: str, force: bool = False):
+        """작업 추가 (이미 있으면 무시, force=True면 완료/실패 항목도 다시 대기 상태로)"""
+        now = time.time()
+        with self.lock:
+            if force:
+                self.conn.execute(
+                    """
+                    INSERT INTO items (filename, state, attempts, enqueued_at, updated_at)
+                    VALUES (?, ?, 0, ?, ?)
+                    ON CONFLICT(filename) DO UPDATE SET
+                        state = excluded.state, attempts = 0, last_error = NULL,
+                        enqueued_at = excluded.enqueued_at, updated_at = excluded.updated_at
+                    WHERE items.state != ?
+                    """,
+                    (filename, PENDING, now, now, IN_PROGRESS)
+                )
+            else:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO items (filename, state, attempts, enqueued_at, updated_at) "
+                    "VALUES (?, ?, 0, ?, ?)",
+                    (filename, PENDING, now, now)
+                )
+
+    def push_many(self, filenames: Iterable[str]):
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO items (filename, state, attempts, enqueued_at, updated_at) "
+                    "VALUES (?, ?, 0, ?, ?)",
+                    [(filename, PENDING, now, now) for filename in filenames]
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def claim(self, retry_before: Optional[float] = None) -> Optional[str]:
+        """가장 오래된 대기 작업을 진행 중으로 바꾸고 파일명 반환 (없으면 None)
+
+        retry_before: 지정하면 이미 실패한 적 있는 작업은 이 시각 이전에 실패한 것만 가져옴
+                      (같은 실행 안에서 바로 재시도하지 않도록)
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if retry_before is None:
+                    row = self.conn.execute(
+                        "SELECT filename FROM items WHERE state = ? ORDER BY enqueued_at LIMIT 1",
+                        (PENDING,)
+                    ).fetchone()
+                else:
+                    row = self.conn.execute(
+                        "SELECT filename FROM items WHERE state = ? AND (attempts = 0 OR updated_at < ?) "
+                        "ORDER BY enqueued_at LIMIT 1",
+                        (PENDING, retry_before)
+                    ).fetchone()
+
+                if row:
+                    self.conn.execute(
+                        "UPDATE items SET state = ?, attempts = attempts + 1, updated_at = ? WHERE filename = ?",
+                        (IN_PROGRESS, now, row[0])
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+        return row[0] if row else None
+
+    def complete(self, filename: str):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE items SET state = ?, last_error = NULL, updated_at = ? WHERE filename = ?",
+                (DONE, time.time(), filename)
+            )
+
+    def fail(self, filename: str, error: str):
+        """실패 기록: 최대 시도 횟수 전이면 다시 대기, 넘으면 failed"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE items SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "last_error = ?, updated_at = ? WHERE filename = ?",
+                (self.max_attempts, FAILED, PENDING, error[:500], time.time(), filename)
+            )
+
+    def recover_stale(self) -> int:
+        """중단된 실행이 남긴 진행 중 작업을 대기 상태로 되돌림"""
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE items SET state = ? WHERE state = ? AND updated_at < ?",
+                (PENDING, IN_PROGRESS, time.time() - self.stale_seconds)
+            )
+            return cursor.rowcount
+
+    def is_backfilled(self) -> bool:
+        """큐 도입 이전의 기존 책을 한 번 등록했는지 여부"""
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'backfilled'").fetchone()
+        return row is not None
+
+    def backfill(self, filenames: Iterable[str]):
+        """기존 책 일괄 등록 후 완료 표시 (한 번만 실행)"""
+        self.push_many(filenames)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('backfilled', ?)", (str(time.time()),)
+            )
+
+    def counts(self) -> Dict[str, int]:
+        with self.lock:
+            rows = self.conn.execute("SELECT state, COUNT(*) FROM items GROUP BY state").fetchall()
+        counts = {PENDING: 0, IN_PROGRESS: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -2,6 +2,7 @@ import { NextResponse } from 'next/server';
 import { getUsers, getDownloads } from '@/lib/auth';
 import fs from 'fs';
 import path from 'path';
+import { readBooksById } from '@/lib/catalog';
 
 interface AnalyticsData {
   userEngagement: {
@@ -178,33 +179,15 @@ export async function GET() {
     if (downloadsWithMissingTitles.length > 0) {
       console.log(`[Analytics] Found ${downloadsWithMissingTitles.length} downloads without bookTitle, loading metadata...`);
 
-      // Load book metadata from filesystem
+      // Load book metadata (bookId = catalog id, directory order only without a catalog)
       const booksDir = process.env.BOOKS_DIR || path.join(process.cwd(), '..', 'books');
-      const metadataDir = path.join(booksDir, 'metadata');
       const bookIdToMetadata: Record<number, { title: string; author?: string }> = {};
 
       try {
         if (fs.existsSync(booksDir)) {
-          const files = fs.readdirSync(booksDir);
-          const epubFiles = files.filter(file => file.endsWith('.epub'));
-
-          epubFiles.forEach((filename, index) => {
-            const bookId = index + 1;
-            const title = filename.replace('.epub', '');
-            const metadataPath = path.join(metadataDir, `${title}.json`);
-
-            let metadata: Record<string, string> = {};
-            if (fs.existsSync(metadataPath)) {
-              try {
-                const metadataContent = fs.readFileSync(metadataPath, 'utf-8');
-                metadata = JSON.parse(metadataContent);
-              } catch (error) {
-                console.error(`[Analytics] Failed to read metadata for ${filename}:`, error);
-              }
-            }
-
+          readBooksById(booksDir).forEach(({ filename, metadata }, bookId) => {
             bookIdToMetadata[bookId] = {
-              title: metadata.title || title,
+              title: metadata.title || filename.replace('.epub', ''),
               author: metadata.author,
             };
           });
@@ -1,6 +1,7 @@
 import { NextResponse } from 'next/server';
 import fs from 'fs';
 import path from 'path';
+import { readCatalog } from '@/lib/catalog';
 
 export async function GET() {
   try {
@@ -21,6 +22,32 @@ export async function GET() {
       return NextResponse.json({ books: [] });
     }
 
+    // catalog.json이 있으면 파일 하나만 읽음
+    const catalog = readCatalog(booksDir);
+    if (catalog) {
+      const books = Object.values(catalog.books).map((book) => {
+        const metadata = book.metadata || {};
+        const metadataPath = path.join(metadataDir, `${book.filename.replace('.epub', '')}.json`);
+        return {
+          filename: book.filename, // Unique identifier
+          title: metadata.title || book.filename.replace('.epub', ''),
+          author: metadata.author || null,
+          year: metadata.year || null,
+          description: metadata.description || null,
+          cover: metadata.cover || null,
+          coverUpdated: metadata.cover_updated || null,
+          needsReview: reviewStatus[book.filename] || false,
+          size: book.size,
+          addedDate: new Date(book.addedDate),
+          metadataPath: Object.keys(metadata).length > 0 ? metadataPath : null,
+        };
+      });
+
+      books.sort((a, b) => b.addedDate.getTime() - a.addedDate.getTime());
+
+      return NextResponse.json({ books });
+    }
+
     const files = fs.readdirSync(booksDir);
     const epubFiles = files.filter(file => file.endsWith('.epub'));
 
@@ -1,6 +1,21 @@
 import { NextRequest, NextResponse } from 'next/server';
 import fs from 'fs';
 import path from 'path';
+import { updateCatalogMetadata } from '@/lib/catalog';
+import { removeDerivatives } from '@/lib/covers';
+
+// 임시 파일에 쓴 뒤 rename으로 교체 (표지 라우트/크롤러가 반쯤 쓰인 파일을 읽지 않도록)
+// 임시 파일은 점으로 시작해 크롤러의 표지/내용 인덱스 스캔에서 제외됨
+function writeFileAtomic(filePath: string, data: string | Buffer) {
+  const tmpPath = path.join(path.dirname(filePath), `.${path.basename(filePath)}.${process.pid}.tmp`);
+  try {
+    fs.writeFileSync(tmpPath, data);
+    fs.renameSync(tmpPath, filePath);
+  } catch (error) {
+    fs.rmSync(tmpPath, { force: true });
+    throw error;
+  }
+}
 
 export async function POST(request: NextRequest) {
   try {
@@ -75,7 +90,8 @@ export async function POST(request: NextRequest) {
       // Save image file
       const bytes = await coverFile.arrayBuffer();
       const buffer = Buffer.from(bytes);
-      fs.writeFileSync(coverPath, buffer);
+      writeFileAtomic(coverPath, buffer);
+      removeDerivatives(coversDir, coverFilename);
 
       // Update metadata with cover filename and timestamp
       metadata.cover = coverFilename;
@@ -104,7 +120,8 @@ export async function POST(request: NextRequest) {
           const coverPath = path.join(coversDir, coverFilename);
 
           // Save image file
-          fs.writeFileSync(coverPath, imgBuffer);
+          writeFileAtomic(coverPath, imgBuffer);
+          removeDerivatives(coversDir, coverFilename);
           console.log('Cover saved successfully:', coverFilename);
 
           // Update metadata with cover filename and timestamp
@@ -120,7 +137,8 @@ export async function POST(request: NextRequest) {
     }
 
     // Save metadata
-    fs.writeFileSync(metadataPath, JSON.stringify(metadata, null, 2));
+    writeFileAtomic(metadataPath, JSON.stringify(metadata, null, 2));
+    await updateCatalogMetadata(booksDir, filename, metadata);
 
     // Clear review status when book is edited (신고 마크 해제)
     const dataDir = path.join(process.cwd(), 'data');
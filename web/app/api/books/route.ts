@@ -1,8 +1,10 @@
-import { NextResponse } from 'next/server';
+import { NextRequest, NextResponse } from 'next/server';
 import fs from 'fs';
 import path from 'path';
+import crypto from 'crypto';
+import { readCatalog } from '@/lib/catalog';
 
-export async function GET() {
+export async function GET(request: NextRequest) {
   try {
     // /books 폴더 경로 (Docker 볼륨 마운트)
     const booksDir = process.env.BOOKS_DIR || path.join(process.cwd(), '..', 'books');
@@ -22,7 +24,39 @@ export async function GET() {
       return NextResponse.json({ books: [] });
     }
 
-    // .epub 파일만 필터링
+    // catalog.json이 있으면 파일 하나만 읽음 (crawler/catalog.py가 갱신)
+    const catalog = readCatalog(booksDir);
+    if (catalog) {
+      // 카탈로그 etag + 신고 상태로 응답 ETag 구성
+      const reviewHash = crypto.createHash('md5').update(JSON.stringify(reviewStatus)).digest('hex');
+      const etag = `"${catalog.etag}-${reviewHash.slice(0, 8)}"`;
+      if (request.headers.get('if-none-match') === etag) {
+        return new NextResponse(null, { status: 304, headers: { 'ETag': etag } });
+      }
+
+      const books = Object.values(catalog.books).map((book) => {
+        const metadata = book.metadata || {};
+        return {
+          id: book.id,
+          title: metadata.title || book.filename.replace('.epub', ''),
+          filename: book.filename,
+          size: book.size,
+          addedDate: new Date(book.addedDate),
+          cover: metadata.cover || null,
+          coverUpdated: metadata.cover_updated || null,
+          description: metadata.description || null,
+          author: metadata.author || null,
+          year: metadata.year || null,
+          needsReview: reviewStatus[book.filename] || false,
+        };
+      });
+
+      books.sort((a, b) => b.addedDate.getTime() - a.addedDate.getTime());
+
+      return NextResponse.json({ books }, { headers: { 'ETag': etag } });
+    }
+
+    // 카탈로그가 없으면 디렉토리 스캔 (.epub 파일만 필터링)
     const files = fs.readdirSync(booksDir);
     const epubFiles = files.filter(file => file.endsWith('.epub'));
 
@@ -1,6 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server';
 import fs from 'fs';
 import path from 'path';
+import { DERIVATIVE_WIDTHS, derivativeName } from '@/lib/covers';
 
 export async function GET(
   request: NextRequest,
@@ -8,20 +9,44 @@ export async function GET(
 ) {
   try {
     const { filename } = await params;
+
+    // covers/ 바로 아래 파일만 제공 (경로 구분자, .., 숨김/임시 파일 거부)
+    if (path.basename(filename) !== filename || filename.startsWith('.')) {
+      return NextResponse.json({ error: 'Cover not found' }, { status: 404 });
+    }
+
     const booksDir = process.env.BOOKS_DIR || path.join(process.cwd(), '..', 'books');
     const coversDir = path.join(booksDir, 'covers');
-    const filepath = path.join(coversDir, filename);
+    let filepath = path.join(coversDir, filename);
 
     // 파일이 존재하는지 확인
     if (!fs.existsSync(filepath)) {
       return NextResponse.json({ error: 'Cover not found' }, { status: 404 });
     }
 
+    // ?w=320 → 미리 생성된 WebP 썸네일, ?w=320&variant=eink → 흑백 JPEG
+    // 파생 이미지가 아직 없거나, 원본보다 오래되었거나, WebP를 지원하지 않으면 원본 제공
+    const width = parseInt(request.nextUrl.searchParams.get('w') || '', 10);
+    const isEink = request.nextUrl.searchParams.get('variant') === 'eink';
+    const acceptsWebp = (request.headers.get('accept') || '').includes('image/webp');
+    // 파생 이미지 이름은 원본 확장자를 포함 (제목.jpg.w320.webp) - 확장자만 다른 표지끼리 구분
+    if (DERIVATIVE_WIDTHS.includes(width) && (isEink || acceptsWebp)) {
+      const derivativePath = path.join(coversDir, derivativeName(filename, width, isEink ? 'eink' : 'webp'));
+      // 관리자가 같은 파일명으로 표지를 바꾸면 파생 이미지는 다음 보완 실행까지 예전 것이므로 수정 시각 비교
+      try {
+        if (fs.statSync(derivativePath).mtimeMs >= fs.statSync(filepath).mtimeMs) {
+          filepath = derivativePath;
+        }
+      } catch {
+        // 파생 이미지 없음 → 원본
+      }
+    }
+
     // 파일 읽기
     const fileBuffer = fs.readFileSync(filepath);
 
     // 확장자에 따라 content-type 설정
-    const ext = path.extname(filename).toLowerCase();
+    const ext = path.extname(filepath).toLowerCase();
     const contentTypes: Record<string, string> = {
       '.jpg': 'image/jpeg',
       '.jpeg': 'image/jpeg',
@@ -44,6 +69,7 @@ export async function GET(
           ? 'public, max-age=3600, must-revalidate'
           : 'no-cache, no-store, must-revalidate',
         'ETag': etag,
+        'Vary': 'Accept',
       },
     });
   } catch (error) {
@@ -20,6 +20,16 @@ export async function GET(
     }
 
     const { filename } = await params;
+
+    // books/ 바로 아래의 EPUB만 제공 (경로 구분자, .., 숨김 파일 거부)
+    if (
+      path.basename(filename) !== filename ||
+      filename.startsWith('.') ||
+      !filename.toLowerCase().endsWith('.epub')
+    ) {
+      return NextResponse.json({ error: 'File not found' }, { status: 404 });
+    }
+
     const bookId = request.nextUrl.searchParams.get('bookId');
     const deviceType = request.nextUrl.searchParams.get('deviceType') as DeviceType | null;
     const uiMode = request.nextUrl.searchParams.get('uiMode') as UIMode | null;
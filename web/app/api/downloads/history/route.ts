@@ -1,7 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { verifyToken, getDownloads } from '@/lib/auth';
-import fs from 'fs';
 import path from 'path';
+import { readBooksById } from '@/lib/catalog';
 
 export async function GET(request: NextRequest) {
   try {
@@ -25,27 +25,14 @@ export async function GET(request: NextRequest) {
     const downloads = getDownloads();
     const userDownloads = downloads.filter(d => d.userId === payload.userId);
 
-    // Get book metadata for each download
+    // Get book metadata for each download (bookId = catalog id)
     const booksDir = process.env.BOOKS_DIR || path.join(process.cwd(), '..', 'books');
-    const metadataDir = path.join(booksDir, 'metadata');
-
-    // Get all books to map bookId to metadata
-    const files = fs.existsSync(booksDir) ? fs.readdirSync(booksDir) : [];
-    const epubFiles = files.filter(file => file.endsWith('.epub'));
+    const booksById = readBooksById(booksDir);
 
     const bookMetadataMap = new Map();
-    epubFiles.forEach((filename, index) => {
-      const title = filename.replace('.epub', '');
-      const metadataPath = path.join(metadataDir, `${title}.json`);
-
-      let metadata: Record<string, string> = {};
-      if (fs.existsSync(metadataPath)) {
-        const metadataContent = fs.readFileSync(metadataPath, 'utf-8');
-        metadata = JSON.parse(metadataContent);
-      }
-
-      bookMetadataMap.set(index + 1, {
-        title: metadata.title || title,
+    booksById.forEach(({ filename, metadata }, bookId) => {
+      bookMetadataMap.set(bookId, {
+        title: metadata.title || filename.replace('.epub', ''),
         author: metadata.author || null,
         year: metadata.year || null,
       });
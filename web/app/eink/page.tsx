@@ -700,7 +700,7 @@ export default function EinkHome() {
                     }}>
                       {book.cover ? (
                         <img
-                          src={`/api/covers/${book.cover}${book.coverUpdated ? `?v=${book.coverUpdated}` : ''}`}
+                          src={`/api/covers/${book.cover}?w=320&variant=eink${book.coverUpdated ? `&v=${book.coverUpdated}` : ''}`}
                           alt={book.title}
                           style={{
                             width: '100%',
@@ -635,7 +635,7 @@ export default function Home() {
                     <div className="aspect-[2/3] bg-gradient-to-br from-purple-100 via-pink-50 to-blue-50 flex items-center justify-center relative overflow-hidden">
                       {book.cover ? (
                         <img
-                          src={`/api/covers/${book.cover}${book.coverUpdated ? `?v=${book.coverUpdated}` : ''}`}
+                          src={`/api/covers/${book.cover}?w=320${book.coverUpdated ? `&v=${book.coverUpdated}` : ''}`}
                           alt={book.title}
                           className="w-full h-full object-cover"
                         />
@@ -0,0 +1,163 @@
+import fs from 'fs';
+import path from 'path';
+
+// crawler/catalog.py 가 관리하는 books/catalog.json 형식
+export const CATALOG_VERSION = 1;
+
+// crawler/catalog.py catalog_lock()과 같은 잠금 파일 규칙
+// ('wx' = O_CREAT | O_EXCL 로 만들면 잠금, 지우면 해제, 오래된 잠금 파일은 죽은 프로세스가 남긴 것)
+const CATALOG_LOCK_STALE_MS = 60 * 1000;
+const CATALOG_LOCK_TIMEOUT_MS = 120 * 1000;
+const CATALOG_LOCK_POLL_MS = 50;
+
+export interface CatalogBook {
+  id: number;
+  filename: string;
+  size: number;
+  addedDate: string;
+  metadata: Record<string, string>;
+}
+
+export interface Catalog {
+  version: number;
+  etag: string | null;
+  updatedAt: string | null;
+  nextId: number;
+  books: Record<string, CatalogBook>;
+}
+
+function getCatalogPath(booksDir: string) {
+  return path.join(booksDir, 'catalog.json');
+}
+
+function getCatalogLockPath(booksDir: string) {
+  return path.join(booksDir, '.catalog.lock');
+}
+
+function removeStaleLock(lockPath: string) {
+  try {
+    const stats = fs.statSync(lockPath);
+    if (Date.now() - stats.mtimeMs > CATALOG_LOCK_STALE_MS) {
+      console.warn('Removing stale catalog lock:', lockPath);
+      fs.unlinkSync(lockPath);
+    }
+  } catch (error) {
+    if ((error as NodeJS.ErrnoException).code !== 'ENOENT') {
+      throw error;
+    }
+  }
+}
+
+// 카탈로그 쓰기를 크롤러 컨테이너(다운로더/보완 스크립트)와 직렬화
+export async function withCatalogLock<T>(booksDir: string, fn: () => T | Promise<T>): Promise<T> {
+  const lockPath = getCatalogLockPath(booksDir);
+  const deadline = Date.now() + CATALOG_LOCK_TIMEOUT_MS;
+  let lockInode: number;
+
+  for (;;) {
+    try {
+      const handle = await fs.promises.open(lockPath, 'wx');
+      try {
+        await handle.writeFile(`${process.pid} web\n`);
+        lockInode = (await handle.stat()).ino;
+      } finally {
+        await handle.close();
+      }
+      break;
+    } catch (error) {
+      if ((error as NodeJS.ErrnoException).code !== 'EEXIST') {
+        throw error;
+      }
+      removeStaleLock(lockPath);
+      if (Date.now() > deadline) {
+        throw new Error(`Timed out waiting for catalog lock: ${lockPath}`);
+      }
+      await new Promise((resolve) => setTimeout(resolve, CATALOG_LOCK_POLL_MS));
+    }
+  }
+
+  try {
+    return await fn();
+  } finally {
+    // 오래된 잠금으로 제거된 뒤 다른 프로세스가 잡은 잠금은 지우지 않음
+    try {
+      if (fs.statSync(lockPath).ino === lockInode) {
+        fs.unlinkSync(lockPath);
+      }
+    } catch {
+      // 이미 제거됨
+    }
+  }
+}
+
+// 카탈로그 읽기 (없거나 버전이 다르면 null → 호출 측에서 디렉토리 스캔으로 대체)
+export function readCatalog(booksDir: string): Catalog | null {
+  try {
+    const catalogPath = getCatalogPath(booksDir);
+    if (!fs.existsSync(catalogPath)) {
+      return null;
+    }
+    const catalog: Catalog = JSON.parse(fs.readFileSync(catalogPath, 'utf-8'));
+    return catalog.version === CATALOG_VERSION ? catalog : null;
+  } catch (error) {
+    console.error('Error reading catalog:', error);
+    return null;
+  }
+}
+
+// 다운로드 기록의 bookId → 책 (파일명 + 메타데이터)
+// 카탈로그의 id를 쓰고, 카탈로그가 없을 때만 예전 방식(디렉토리 순서 + 1)으로 대체
+export function readBooksById(
+  booksDir: string
+): Map<number, { filename: string; metadata: Record<string, string> }> {
+  const booksById = new Map<number, { filename: string; metadata: Record<string, string> }>();
+
+  const catalog = readCatalog(booksDir);
+  if (catalog) {
+    for (const book of Object.values(catalog.books)) {
+      booksById.set(book.id, { filename: book.filename, metadata: book.metadata || {} });
+    }
+    return booksById;
+  }
+
+  if (!fs.existsSync(booksDir)) {
+    return booksById;
+  }
+  const epubFiles = fs.readdirSync(booksDir).filter(file => file.endsWith('.epub'));
+  epubFiles.forEach((filename, index) => {
+    const metadataPath = path.join(booksDir, 'metadata', `${filename.replace('.epub', '')}.json`);
+    let metadata: Record<string, string> = {};
+    try {
+      if (fs.existsSync(metadataPath)) {
+        metadata = JSON.parse(fs.readFileSync(metadataPath, 'utf-8'));
+      }
+    } catch (error) {
+      console.error(`Failed to read metadata for ${filename}:`, error);
+    }
+    booksById.set(index + 1, { filename, metadata });
+  });
+  return booksById;
+}
+
+// 관리자 수정 후 해당 책 항목만 갱신 (잠금 안에서 다시 읽고, 임시 파일 + rename으로 원자적 교체)
+export async function updateCatalogMetadata(
+  booksDir: string,
+  filename: string,
+  metadata: Record<string, string>
+) {
+  await withCatalogLock(booksDir, () => {
+    const catalog = readCatalog(booksDir);
+    if (!catalog || !catalog.books[filename]) {
+      return;
+    }
+
+    catalog.books[filename].metadata = metadata;
+    catalog.etag = `${Date.now().toString(16)}${Math.random().toString(16).slice(2)}`;
+    catalog.updatedAt = new Date().toISOString();
+
+    const catalogPath = getCatalogPath(booksDir);
+    const tmpPath = `${catalogPath}.${process.pid}.tmp`;
+    fs.writeFileSync(tmpPath, JSON.stringify(catalog));
+    fs.renameSync(tmpPath, catalogPath);
+  });
+}
@@ -0,0 +1,19 @@
+import fs from 'fs';
+import path from 'path';
+
+// crawler/cover_derivatives.py 가 미리 생성하는 파생 이미지 크기
+export const DERIVATIVE_WIDTHS = [160, 320, 640];
+
+// 파생 이미지 이름은 원본 확장자를 포함 (제목.jpg.w320.webp) - 확장자만 다른 표지끼리 구분
+export function derivativeName(coverFilename: string, width: number, variant: 'webp' | 'eink' = 'webp') {
+  return variant === 'eink' ? `${coverFilename}.w${width}.eink.jpg` : `${coverFilename}.w${width}.webp`;
+}
+
+// 표지를 교체할 때 예전 파생 이미지 삭제 (다음 보완 실행에서 cover_updated를 보고 다시 생성)
+export function removeDerivatives(coversDir: string, coverFilename: string) {
+  for (const width of DERIVATIVE_WIDTHS) {
+    for (const variant of ['webp', 'eink'] as const) {
+      fs.rmSync(path.join(coversDir, derivativeName(coverFilename, width, variant)), { force: true });
+    }
+  }
+}